@@ -0,0 +1,125 @@
+"""
+Compara as operações unitárias dos repositórios (get, update, update_agent_status chamados N vezes)
+com as versões em lote (get_many, update_many, update_agents_status) para lotes de 1, 10, 100 e 1000.
+Mostra round-trips ao banco e latência por lote.
+
+Uso:
+    python -m benchmarks.bulk_operations [--url postgresql+asyncpg://...] [--repeat 5]
+
+Sem --url usa um arquivo SQLite temporário.
+"""
+import argparse
+import asyncio
+import statistics
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from benchmarks.repository_writes import StatementCounter
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.models import AgentModel
+from src.infrastructure.database.unit_of_work import SQLAlchemyUnitOfWork
+from src.infrastructure.repositories.sqlalchemy import SQLAlchemyAgentRepository, SQLAlchemyCustomerRepository
+
+BATCH_SIZES = (1, 10, 100, 1000)
+
+
+async def measure(
+    name: str,
+    database: Database,
+    counter: StatementCounter,
+    batch_size: int,
+    repeat: int,
+    operation: Callable[[], Awaitable[object]],
+) -> None:
+    timings: list[float] = []
+    statements_before = counter.count
+    for _ in range(repeat):
+        started = time.perf_counter()
+        # Uma transação por lote, como no processamento de uma entrega do webhook
+        async with SQLAlchemyUnitOfWork(database):
+            _ = await operation()
+        timings.append(time.perf_counter() - started)
+    statements = (counter.count - statements_before) / repeat
+
+    latency = statistics.median(timings)
+    print(
+        f"{name:<28} {batch_size:>5}"
+        + f" {statements:>10.1f} round-trips/batch"
+        + f" {latency * 1e3:>9.2f} ms/batch"
+        + f" {batch_size / latency:>10.0f} rows/s"
+    )
+
+
+async def main(url: str, repeat: int) -> None:
+    database = Database(url)
+    await database.create_tables()
+    counter = StatementCounter(database)
+    customers = SQLAlchemyCustomerRepository(database)
+    agents = SQLAlchemyAgentRepository(database)
+
+    population = max(BATCH_SIZES)
+    now = datetime.now(timezone.utc)
+    customer_ids = [f"5511{index:08d}" for index in range(population)]
+    agent_ids = [f"AGENT_{index}" for index in range(population)]
+    await customers.update_many([
+        Customer(customer_id, Department.SUPPORT, CustomerStatus.WAITING, waiting_since=now, last_interaction=now)
+        for customer_id in customer_ids
+    ])
+    async with database.session() as session:
+        session.add_all(AgentModel(agent_id=agent_id, department=Department.SUPPORT) for agent_id in agent_ids)
+
+    def batch(size: int) -> list[Customer]:
+        return [
+            Customer(customer_id, Department.SUPPORT, CustomerStatus.IN_SERVICE, last_interaction=datetime.now(timezone.utc))
+            for customer_id in customer_ids[:size]
+        ]
+
+    async def get_each(ids: list[str]) -> None:
+        for customer_id in ids:
+            _ = await customers.get(customer_id)
+
+    async def update_each(batch: list[Customer]) -> None:
+        for customer in batch:
+            await customers.update(customer)
+
+    async def status_each(ids: list[str], is_available: bool) -> None:
+        for agent_id in ids:
+            await agents.update_agent_status(agent_id, is_available)
+
+    async def agents_update_each(batch: list[Agent]) -> None:
+        for agent in batch:
+            await agents.update_agent_status(agent.agent_id, agent.is_available, agent.current_customer_id)
+
+    def agent_batch(size: int) -> list[Agent]:
+        return [Agent(agent_id, Department.SUPPORT, False, customer_ids[index]) for index, agent_id in enumerate(agent_ids[:size])]
+
+    print(f"dialect={database.dialect} repeat={repeat}")
+    for size in BATCH_SIZES:
+        ids = customer_ids[:size]
+        agents_ids = agent_ids[:size]
+        await measure("customer get x N", database, counter, size, repeat, lambda: get_each(ids))
+        await measure("customer get_many", database, counter, size, repeat, lambda: customers.get_many(ids))
+        await measure("customer update x N", database, counter, size, repeat, lambda: update_each(batch(size)))
+        await measure("customer update_many", database, counter, size, repeat, lambda: customers.update_many(batch(size)))
+        await measure("agent status x N", database, counter, size, repeat, lambda: status_each(agents_ids, True))
+        await measure("agent update_agents_status", database, counter, size, repeat, lambda: agents.update_agents_status(agents_ids, True))
+        await measure("agent update x N", database, counter, size, repeat, lambda: agents_update_each(agent_batch(size)))
+        await measure("agent update_many", database, counter, size, repeat, lambda: agents.update_many(agent_batch(size)))
+        print()
+
+    await database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--url", default=None)
+    _ = parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url: str = args.url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        asyncio.run(main(url, args.repeat))
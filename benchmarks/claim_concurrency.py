@@ -0,0 +1,126 @@
+"""
+Verifica que /proximo nunca entrega o mesmo cliente a dois agentes: N agentes disparam
+/proximo ao mesmo tempo contra uma fila com menos clientes do que agentes.
+
+Uso:
+    python -m benchmarks.claim_concurrency [--url postgresql+asyncpg://...] [--agents 100] [--customers 60]
+
+Sem --url usa um arquivo SQLite temporário (que serializa as escritas); o cenário que exercita
+o SKIP LOCKED de verdade é o PostgreSQL.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import override
+from uuid import uuid4
+
+from sqlalchemy import delete, select
+
+from src.domain.entities import Customer, CustomerStatus, Department
+from src.domain.interfaces.messaging import MessageSender
+from src.domain.messages import MessageType, WhatsAppMessage
+from src.domain.services import MessageRouter
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.models import AgentModel, CustomerModel
+from src.infrastructure.database.unit_of_work import SQLAlchemyUnitOfWork
+from src.infrastructure.repositories.sqlalchemy import SQLAlchemyAgentRepository, SQLAlchemyCustomerRepository
+
+
+class DiscardingSender(MessageSender):
+    @override
+    async def send_message(self, message: WhatsAppMessage) -> bool:
+        return True
+
+
+async def seed(database: Database, agents: int, customers: int) -> None:
+    customer_repo = SQLAlchemyCustomerRepository(database)
+    started = datetime.now(timezone.utc)
+
+    async with database.session() as session:
+        _ = await session.execute(delete(AgentModel))
+        _ = await session.execute(delete(CustomerModel))
+
+    async with database.session() as session:
+        session.add_all(
+            AgentModel(agent_id=f"AGENT_{index}", department=Department.SUPPORT, is_available=True)
+            for index in range(agents)
+        )
+
+    for index in range(customers):
+        await customer_repo.add(Customer(
+            customer_id=f"5511{index:08d}",
+            department=Department.SUPPORT,
+            status=CustomerStatus.WAITING,
+            waiting_since=started + timedelta(milliseconds=index),
+        ))
+
+
+async def main(url: str, agents: int, customers: int) -> None:
+    database = Database(url)
+    await database.create_tables()
+    await seed(database, agents, customers)
+
+    router = MessageRouter(
+        customer_repo=SQLAlchemyCustomerRepository(database),
+        agent_repo=SQLAlchemyAgentRepository(database),
+        message_sender=DiscardingSender(),
+        unit_of_work=lambda: SQLAlchemyUnitOfWork(database)
+    )
+
+    async def claim(agent_id: str) -> None:
+        async with SQLAlchemyUnitOfWork(database):
+            _ = await router.route_message(WhatsAppMessage(
+                message_id=uuid4(),
+                sender_id=agent_id,
+                recipient_id="SYSTEM",
+                content="/proximo",
+                message_type=MessageType.TEXT,
+                timestamp=datetime.now()
+            ))
+
+    started = time.perf_counter()
+    _ = await asyncio.gather(*(claim(f"AGENT_{index}") for index in range(agents)))
+    elapsed = time.perf_counter() - started
+
+    async with database.session() as session:
+        db_customers = (await session.execute(select(CustomerModel))).scalars().all()
+        db_agents = (await session.execute(select(AgentModel))).scalars().all()
+
+    assigned = Counter(customer.current_agent_id for customer in db_customers if customer.current_agent_id)
+    agent_customers = {agent.agent_id: agent.current_customer_id for agent in db_agents if agent.current_customer_id}
+    double_assigned = [agent_id for agent_id, count in assigned.items() if count > 1]
+    claimed_twice = [customer_id for customer_id, count in Counter(agent_customers.values()).items() if count > 1]
+    mismatched = [
+        customer.customer_id
+        for customer in db_customers
+        if customer.current_agent_id and agent_customers.get(customer.current_agent_id) != customer.customer_id
+    ]
+    still_waiting = sum(1 for customer in db_customers if customer.status == CustomerStatus.WAITING)
+
+    print(f"dialect={database.dialect} agents={agents} customers={customers} elapsed={elapsed * 1000:.1f}ms")
+    print(f"claimed={len(agent_customers)} still_waiting={still_waiting}")
+    print(f"agents with more than one customer={len(double_assigned)} customers claimed twice={len(claimed_twice)}")
+    print(f"customer/agent mismatches={len(mismatched)}")
+
+    await database.engine.dispose()
+
+    expected_claims = min(agents, customers)
+    if double_assigned or claimed_twice or mismatched or len(agent_customers) != expected_claims:
+        raise SystemExit("FAILED: inconsistent assignments")
+    print("OK")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--url", default=None)
+    _ = parser.add_argument("--agents", type=int, default=100)
+    _ = parser.add_argument("--customers", type=int, default=60)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url: str = args.url or f"sqlite+aiosqlite:///{Path(tmp) / 'claim.db'}"
+        asyncio.run(main(url, args.agents, args.customers))
@@ -0,0 +1,67 @@
+"""
+Mede as operações do DepartmentQueueService com uma fila grande de clientes aguardando,
+comparando /fila em O(1) com a contagem por varredura da lista de espera.
+
+Uso:
+    python -m benchmarks.department_queues [--customers 100000]
+"""
+import argparse
+import random
+import time
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from src.domain.entities import Customer, CustomerStatus, Department
+from src.domain.queues import DepartmentQueueService
+
+
+def measure(name: str, operations: int, run: Callable[[], object]) -> None:
+    started = time.perf_counter()
+    _ = run()
+    elapsed = time.perf_counter() - started
+    print(f"{name:<36} {operations:>9} ops {elapsed * 1000:>10.1f} ms {elapsed / operations * 1e9:>10.0f} ns/op")
+
+
+def main(total: int) -> None:
+    started = datetime.now(timezone.utc)
+    departments = list(Department)
+    customers = [
+        Customer(
+            customer_id=f"5511{index:09d}",
+            department=departments[index % len(departments)],
+            status=CustomerStatus.WAITING,
+            # Horários embaralhados para o heap não receber os clientes já ordenados
+            waiting_since=started + timedelta(milliseconds=random.randrange(total * 10)),
+        )
+        for index in range(total)
+    ]
+    service = DepartmentQueueService()
+
+    measure("enqueue (observe WAITING)", total, lambda: [service.observe(customer) for customer in customers])
+    print(f"queue sizes: {service.stats().sizes}")
+
+    queries = 1_000_000
+    measure("size (/fila)", queries, lambda: [service.size(Department.SUPPORT) for _ in range(queries)])
+
+    waiting_list = [customer for customer in customers if customer.department == Department.SUPPORT]
+    scans = 100
+    measure(
+        "size by scanning the waiting list",
+        scans,
+        lambda: [sum(1 for customer in waiting_list if customer.status == CustomerStatus.WAITING) for _ in range(scans)]
+    )
+
+    abandoned = random.sample(customers, total // 10)
+    measure("remove (abandon/expire)", len(abandoned), lambda: [service.remove(customer.customer_id) for customer in abandoned])
+
+    claims = total // 10
+    measure("claim oldest", claims, lambda: [service.claim(departments[index % len(departments)]) for index in range(claims)])
+
+    print(f"remaining: {service.stats().total}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--customers", type=int, default=100_000)
+    args = parser.parse_args()
+    main(args.customers)
@@ -0,0 +1,314 @@
+"""
+Stub local do endpoint /messages da WhatsApp Cloud API, para benchmarks e testes de carga.
+Responde como a Graph API, com latência configurável e injeção de 429 (com Retry-After) e 5xx.
+Também simula os endpoints de mídia (consulta do media ID, download e upload em /media),
+com conteúdo gerado em streaming, para testar o repasse de mídias sem guardar arquivos.
+
+Uso isolado:
+    python -m benchmarks.fake_graph_api [--port 8081] [--latency 0.05] [--rate-limit-rate 0.01] [--error-rate 0.01]
+
+Aponte WhatsAppConfig.base_url para http://127.0.0.1:<port>.
+"""
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import random
+import socket
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass, field
+from typing import cast
+
+from aiohttp import BodyPartReader, web
+
+
+@dataclass
+class FakeGraphAPIConfig:
+    # Latência de cada resposta: latency + uniforme(0, jitter) segundos
+    latency: float = 0.0
+    jitter: float = 0.0
+    # Fração das requisições respondidas com 429 (limite de throughput) e com 503
+    rate_limit_rate: float = 0.0
+    error_rate: float = 0.0
+    # Valor do header Retry-After nos 429; None omite o header
+    retry_after: float | None = 1.0
+    seed: int | None = None
+    # Se os media IDs recebidos (add_media) podem ser usados direto no envio; se não, só os do upload
+    reusable_media: bool = True
+    # Tamanho dos pedaços do download de mídia
+    media_chunk_size: int = 64 * 1024
+
+
+@dataclass
+class FakeMedia:
+    media_id: str
+    mime_type: str
+    size: int
+    sha256: str
+
+
+@dataclass
+class FakeDelivery:
+    recipient_id: str
+    body: str
+    received_at: float
+
+
+@dataclass
+class FakeGraphAPIStats:
+    requests: int
+    delivered: int
+    rate_limited: int
+    errors: int
+    by_status: dict[int, int] = field(default_factory=dict)
+    media_downloads: int = 0
+    media_uploads: int = 0
+    media_uploaded_bytes: int = 0
+
+
+class FakeGraphAPI:
+    """
+    Servidor aiohttp que aceita POST /{versão}/{phone_number_id}/messages.
+    Cada mensagem aceita (200) é registrada em `deliveries` e repassada a on_delivery,
+    com o horário de chegada em time.perf_counter().
+
+    Mídias recebidas são cadastradas com add_media (só tamanho e hash: o conteúdo é gerado a cada
+    download). Os uploads em POST /{versão}/{phone_number_id}/media são lidos em streaming e ficam
+    em `uploads`, com tamanho e sha256 para conferir a integridade do repasse.
+    """
+
+    config: FakeGraphAPIConfig
+
+    def __init__(
+        self,
+        config: FakeGraphAPIConfig | None = None,
+        on_delivery: Callable[[FakeDelivery], None] | None = None
+    ):
+        self.config = config or FakeGraphAPIConfig()
+        self.on_delivery = on_delivery
+        self.deliveries: list[FakeDelivery] = []
+        self._random = random.Random(self.config.seed)
+        self._ids = itertools.count(1)
+        self._by_status: dict[int, int] = {}
+        self._requests = 0
+        self.media: dict[str, FakeMedia] = {}
+        self.uploads: dict[str, FakeMedia] = {}
+        self._media_downloads = 0
+        self._runner: web.AppRunner | None = None
+        self._url: str | None = None
+
+    @property
+    def base_url(self) -> str:
+        if self._url is None:
+            raise RuntimeError("FakeGraphAPI is not running")
+        return self._url
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Sobe o servidor (porta 0 = qualquer porta livre) e devolve a base_url"""
+        app = web.Application()
+        _ = app.router.add_post("/{version}/{phone_number_id}/messages", self._handle_message)
+        _ = app.router.add_post("/{version}/{phone_number_id}/media", self._handle_upload)
+        _ = app.router.add_get("/{version}/{media_id}", self._handle_media_lookup)
+        _ = app.router.add_get("/media/download/{media_id}", self._handle_download)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        # Socket próprio para saber qual porta foi escolhida quando port=0
+        sock = socket.create_server((host, port))
+        await web.SockSite(self._runner, sock).start()
+        self._url = f"http://{host}:{sock.getsockname()[1]}"
+        return self._url
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        self._url = None
+
+    def stats(self) -> FakeGraphAPIStats:
+        return FakeGraphAPIStats(
+            requests=self._requests,
+            delivered=self._by_status.get(200, 0),
+            rate_limited=self._by_status.get(429, 0),
+            errors=sum(count for status, count in self._by_status.items() if status >= 500),
+            by_status=dict(sorted(self._by_status.items())),
+            media_downloads=self._media_downloads,
+            media_uploads=len(self.uploads),
+            media_uploaded_bytes=sum(upload.size for upload in self.uploads.values()),
+        )
+
+    def add_media(self, media_id: str, mime_type: str, size: int) -> FakeMedia:
+        """Cadastra uma mídia recebida de `size` bytes, como se tivesse vindo num webhook"""
+        digest = hashlib.sha256()
+        for chunk in _media_content(media_id, size, self.config.media_chunk_size):
+            digest.update(chunk)
+        media = FakeMedia(media_id, mime_type, size, digest.hexdigest())
+        self.media[media_id] = media
+        return media
+
+    async def _handle_message(self, request: web.Request) -> web.Response:
+        self._requests += 1
+        payload = await request.json()
+
+        delay = self.config.latency + self._random.uniform(0, self.config.jitter)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            headers = {"Retry-After": f"{self.config.retry_after:g}"} if self.config.retry_after is not None else None
+            return self._error(429, 130429, "Rate limit hit", headers)
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            return self._error(503, 131000, "Service temporarily unavailable")
+
+        recipient_id = payload.get("to")
+        if not isinstance(recipient_id, str) or not recipient_id:
+            # Como a Cloud API: destinatário ausente ou vazio é parâmetro inválido
+            return self._error(400, 100, "(#100) The parameter to is required.")
+        if not self._sendable(payload):
+            return self._error(400, 131053, "Media upload error")
+
+        delivery = FakeDelivery(recipient_id, _body(payload), time.perf_counter())
+        self.deliveries.append(delivery)
+        if self.on_delivery is not None:
+            self.on_delivery(delivery)
+
+        self._count(200)
+        return web.json_response({
+            "messaging_product": "whatsapp",
+            "contacts": [{"input": recipient_id, "wa_id": recipient_id}],
+            "messages": [{"id": f"wamid.fake.{next(self._ids)}"}],
+        })
+
+    async def _handle_media_lookup(self, request: web.Request) -> web.Response:
+        self._requests += 1
+        media = self.media.get(request.match_info["media_id"])
+        if media is None:
+            return self._error(400, 100, "Invalid media ID")
+
+        self._count(200)
+        return web.json_response({
+            "messaging_product": "whatsapp",
+            "url": f"{self.base_url}/media/download/{media.media_id}",
+            "mime_type": media.mime_type,
+            "sha256": media.sha256,
+            "file_size": media.size,
+            "id": media.media_id,
+        })
+
+    async def _handle_download(self, request: web.Request) -> web.StreamResponse:
+        self._requests += 1
+        media = self.media.get(request.match_info["media_id"])
+        if media is None:
+            return self._error(404, 100, "Media not found")
+
+        self._count(200)
+        self._media_downloads += 1
+        response = web.StreamResponse(headers={"Content-Type": media.mime_type})
+        response.content_length = media.size
+        _ = await response.prepare(request)
+        for chunk in _media_content(media.media_id, media.size, self.config.media_chunk_size):
+            await response.write(chunk)
+        await response.write_eof()
+        return response
+
+    async def _handle_upload(self, request: web.Request) -> web.Response:
+        self._requests += 1
+        fields: dict[str, str] = {}
+        digest = hashlib.sha256()
+        size = 0
+        mime_type = ""
+        reader = await request.multipart()
+        async for part in reader:
+            if not isinstance(part, BodyPartReader):
+                continue
+            if part.name != "file":
+                fields[part.name or ""] = await part.text()
+                continue
+            mime_type = part.headers.get("Content-Type", "")
+            while chunk := await part.read_chunk(self.config.media_chunk_size):
+                digest.update(chunk)
+                size += len(chunk)
+
+        if fields.get("messaging_product") != "whatsapp" or not size:
+            return self._error(400, 100, "Invalid parameter")
+
+        media_id = f"fake-media-{next(self._ids)}"
+        self.uploads[media_id] = FakeMedia(media_id, fields.get("type") or mime_type, size, digest.hexdigest())
+        self._count(200)
+        return web.json_response({"id": media_id})
+
+    def _sendable(self, payload: dict[str, object]) -> bool:
+        content = payload.get(str(payload.get("type")))
+        if payload.get("type") not in _MEDIA_KINDS or not isinstance(content, dict):
+            return True
+        media_id = cast(dict[str, object], content).get("id")
+        return media_id in self.uploads or (self.config.reusable_media and media_id in self.media)
+
+    def _error(self, status: int, code: int, message: str, headers: dict[str, str] | None = None) -> web.Response:
+        self._count(status)
+        return web.json_response(
+            {"error": {"message": message, "type": "OAuthException", "code": code}},
+            status=status,
+            headers=headers
+        )
+
+    def _count(self, status: int) -> None:
+        self._by_status[status] = self._by_status.get(status, 0) + 1
+
+
+_MEDIA_KINDS = ("image", "audio", "video", "document")
+
+
+def _media_content(media_id: str, size: int, chunk_size: int) -> Iterator[bytes]:
+    """Conteúdo determinístico de uma mídia, gerado em pedaços"""
+    block = hashlib.sha256(media_id.encode()).digest() * (chunk_size // 32 + 1)
+    for offset in range(0, size, chunk_size):
+        yield block[:min(chunk_size, size - offset)]
+
+
+def _body(payload: dict[str, object]) -> str:
+    for key in ("text", "interactive", *_MEDIA_KINDS):
+        content = payload.get(key)
+        if isinstance(content, dict):
+            return json.dumps(content, ensure_ascii=False)
+    return ""
+
+
+async def serve(config: FakeGraphAPIConfig, port: int) -> None:
+    api = FakeGraphAPI(config)
+    url = await api.start(port=port)
+    print(f"Fake Graph API listening on {url}")
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(api.stats())
+    finally:
+        await api.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--port", type=int, default=8081)
+    _ = parser.add_argument("--latency", type=float, default=0.0)
+    _ = parser.add_argument("--jitter", type=float, default=0.0)
+    _ = parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    _ = parser.add_argument("--error-rate", type=float, default=0.0)
+    _ = parser.add_argument("--retry-after", type=float, default=1.0)
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(
+            FakeGraphAPIConfig(
+                latency=args.latency,
+                jitter=args.jitter,
+                rate_limit_rate=args.rate_limit_rate,
+                error_rate=args.error_rate,
+                retry_after=args.retry_after
+            ),
+            args.port
+        ))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,124 @@
+"""
+Repasse de mídias contra o FakeGraphAPI: envia mensagens de mídia pelo WhatsAppMessageSender e compara
+o upload em streaming do MediaRelay com a versão que baixa o arquivo inteiro para a memória antes de enviar.
+
+Uso:
+    python -m benchmarks.media_relay [--media 20] [--size-mb 16] [--forwards 3] [--reusable-media]
+
+Sem --reusable-media o stub recusa os media IDs recebidos e toda mídia passa por download + upload.
+Cada mídia é encaminhada --forwards vezes; a partir da segunda o ID vem do LRU.
+Mede MB/s, pico de memória alocada (tracemalloc) e confere o sha256 de cada upload.
+"""
+import argparse
+import asyncio
+import time
+import tracemalloc
+from datetime import datetime
+
+import aiohttp
+
+from benchmarks.fake_graph_api import FakeGraphAPI, FakeGraphAPIConfig
+from src.domain.messages import MessageType, WhatsAppMessage, new_message_id
+from src.infrastructure.whatsapp.config import WhatsAppConfig
+from src.infrastructure.whatsapp.sender import WhatsAppMessageSender
+
+
+async def legacy_reupload(session: aiohttp.ClientSession, config: WhatsAppConfig, media_id: str) -> str:
+    async with session.get(config.media_url(media_id)) as response:
+        info = await response.json()
+    async with session.get(info["url"]) as download:
+        content = await download.read()
+
+    form = aiohttp.FormData()
+    form.add_field("messaging_product", "whatsapp")
+    form.add_field("type", info["mime_type"])
+    form.add_field("file", content, filename=media_id, content_type=info["mime_type"])
+    body = form()
+    async with session.post(config.media_upload_url, data=body, headers={"Content-Type": body.content_type}) as upload:
+        return (await upload.json())["id"]
+
+
+def media_message(media_id: str) -> WhatsAppMessage:
+    return WhatsAppMessage(
+        message_id=new_message_id(),
+        sender_id="5511900000000",
+        recipient_id="AGENT_1",
+        content="CLIENTE 5511900000000: vídeo",
+        message_type=MessageType.VIDEO,
+        timestamp=datetime.now(),
+        metadata={"media_id": media_id, "mime_type": "video/mp4"},
+    )
+
+
+def report(name: str, elapsed: float, total_bytes: int, peak: int) -> None:
+    print(
+        f"{name:<24} {elapsed:>8.2f} s"
+        + f" {total_bytes / elapsed / 1e6:>8.1f} MB/s"
+        + f" {peak / 1e6:>8.1f} MB peak allocated"
+    )
+
+
+async def main(media: int, size: int, forwards: int, reusable: bool, chunk_size: int) -> None:
+    api = FakeGraphAPI(FakeGraphAPIConfig(reusable_media=reusable, media_chunk_size=chunk_size))
+    url = await api.start()
+    sources = [api.add_media(f"wamid.media.{index}", "video/mp4", size) for index in range(media)]
+    config = WhatsAppConfig(
+        phone_number_id="BENCH",
+        access_token="BENCH",
+        base_url=url,
+        messages_per_second=10_000,
+        recipient_messages_per_second=10_000,
+        recipient_burst=10_000,
+        prewarm_connections=0,
+        media_chunk_size=chunk_size,
+    )
+    print(f"media={media} size={size / 1e6:.1f}MB forwards={forwards} reusable_media={reusable} chunk={chunk_size}")
+
+    async with WhatsAppMessageSender(config, max_retries=1, max_concurrency=8) as sender:
+        tracemalloc.start()
+        started = time.perf_counter()
+        results = await sender.send_messages([
+            media_message(source.media_id) for _ in range(forwards) for source in sources
+        ])
+        elapsed = time.perf_counter() - started
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        report("relay (streaming)", elapsed, media * size, peak)
+
+        failed = [result for result in results if not result.success]
+        print(f"sent={len(results) - len(failed)}/{len(results)} {sender.media.stats()}")
+
+        session = sender.session
+        if not reusable and session is not None:
+            uploads_before = len(api.uploads)
+            tracemalloc.start()
+            started = time.perf_counter()
+            semaphore = asyncio.Semaphore(8)
+
+            async def buffered(media_id: str) -> str:
+                async with semaphore:
+                    return await legacy_reupload(session, config, media_id)
+
+            _ = await asyncio.gather(*(buffered(source.media_id) for source in sources))
+            elapsed = time.perf_counter() - started
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            report("reupload (buffered)", elapsed, media * size, peak)
+            print(f"buffered uploads={len(api.uploads) - uploads_before}")
+
+    by_hash = {source.sha256 for source in sources}
+    corrupted = [upload for upload in api.uploads.values() if upload.sha256 not in by_hash]
+    print(f"uploads={len(api.uploads)} corrupted={len(corrupted)} {api.stats()}")
+    await api.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--media", type=int, default=20)
+    _ = parser.add_argument("--size-mb", type=float, default=16)
+    _ = parser.add_argument("--forwards", type=int, default=3)
+    _ = parser.add_argument("--chunk-kb", type=int, default=64)
+    _ = parser.add_argument("--reusable-media", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(main(args.media, int(args.size_mb * 1024 * 1024), args.forwards, args.reusable_media, args.chunk_kb * 1024))
@@ -0,0 +1,151 @@
+"""
+Compara a montagem e a serialização de mensagens de saída antes e depois dos templates de payload:
+dataclass sem slots + uuid4 + dict do payload + json.dumps do aiohttp, contra
+WhatsAppMessage com slots + new_message_id + PayloadTemplates (json da stdlib e orjson, quando instalado).
+
+Uso:
+    python -m benchmarks.message_encoding [--iterations 200000]
+
+Mede ns/mensagem e, com tracemalloc, bytes e blocos alocados que continuam vivos por mensagem
+(a mensagem em si e o corpo serializado).
+"""
+import argparse
+import json
+import time
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import cast
+from uuid import UUID, uuid4
+
+from src.domain.messages import MessageType, WhatsAppMessage, new_message_id
+from src.infrastructure.json_encoding import JsonEncoder, default_json_encoder, stdlib_json_encoder
+from src.infrastructure.whatsapp.payloads import PayloadTemplates
+
+BUTTONS = [{"id": "dept_support", "title": "Suporte"}, {"id": "dept_sales", "title": "Vendas"}]
+
+
+@dataclass
+class LegacyWhatsAppMessage:
+    message_id: UUID
+    sender_id: str
+    recipient_id: str
+    content: str
+    message_type: MessageType
+    timestamp: datetime
+    metadata: dict[str, object]
+
+
+def legacy_payload(message: LegacyWhatsAppMessage) -> dict[str, object]:
+    base_payload = {
+        "messaging_product": "whatsapp",
+        "recipient_type": "individual",
+        "to": message.recipient_id,
+    }
+    if message.message_type == MessageType.TEXT:
+        return {**base_payload, "type": "text", "text": {"body": message.content}}
+
+    buttons = message.metadata.get("buttons", [])
+    buttons_list = cast(list[dict[str, str]], buttons) if isinstance(buttons, list) else []
+    return {
+        **base_payload,
+        "type": "interactive",
+        "interactive": {
+            "type": "button",
+            "body": {"text": message.content},
+            "action": {
+                "buttons": [
+                    {"type": "reply", "reply": {"id": btn["id"], "title": btn["title"]}}
+                    for btn in buttons_list
+                ]
+            }
+        }
+    }
+
+
+def legacy(index: int, message_type: MessageType) -> tuple[object, bytes]:
+    message = LegacyWhatsAppMessage(
+        message_id=uuid4(),
+        sender_id="SYSTEM",
+        recipient_id=f"5511{index:08d}",
+        content="Olá! Escolha o departamento de atendimento:",
+        message_type=message_type,
+        timestamp=datetime.now(),
+        metadata={"buttons": BUTTONS} if message_type == MessageType.BUTTON_RESPONSE else {},
+    )
+    # session.post(json=...) do aiohttp serializa com json.dumps e codifica em UTF-8
+    return message, json.dumps(legacy_payload(message)).encode()
+
+
+def templated(encoder: JsonEncoder) -> Callable[[int, MessageType], tuple[object, bytes]]:
+    payloads = PayloadTemplates(encoder)
+
+    def build(index: int, message_type: MessageType) -> tuple[object, bytes]:
+        message = WhatsAppMessage(
+            message_id=new_message_id(),
+            sender_id="SYSTEM",
+            recipient_id=f"5511{index:08d}",
+            content="Olá! Escolha o departamento de atendimento:",
+            message_type=message_type,
+            timestamp=datetime.now(),
+            metadata={"buttons": BUTTONS} if message_type == MessageType.BUTTON_RESPONSE else {},
+        )
+        return message, payloads.encode(message)
+
+    return build
+
+
+def measure(
+    name: str,
+    build: Callable[[int, MessageType], tuple[object, bytes]],
+    message_type: MessageType,
+    iterations: int,
+) -> None:
+    started = time.perf_counter_ns()
+    for index in range(iterations):
+        _ = build(index, message_type)
+    elapsed = time.perf_counter_ns() - started
+
+    # Alocações que sobrevivem: mensagem + corpo, mantidos vivos numa lista pré-alocada
+    sample = min(iterations, 10_000)
+    kept: list[tuple[object, bytes] | None] = [None] * sample
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    for index in range(sample):
+        kept[index] = build(index, message_type)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in stats)
+    blocks = sum(stat.count_diff for stat in stats)
+
+    print(
+        f"{name:<34} {elapsed / iterations:>8.0f} ns/msg"
+        + f" {size / sample:>8.0f} bytes/msg"
+        + f" {blocks / sample:>6.1f} blocks/msg"
+    )
+
+
+def main(iterations: int) -> None:
+    variants: list[tuple[str, Callable[[int, MessageType], tuple[object, bytes]]]] = [
+        ("legacy (dict + json.dumps)", legacy),
+        ("templates (stdlib json)", templated(stdlib_json_encoder)),
+    ]
+    encoder = default_json_encoder()
+    if encoder is not stdlib_json_encoder:
+        variants.append(("templates (orjson)", templated(encoder)))
+
+    print(f"iterations={iterations}")
+    for message_type in (MessageType.TEXT, MessageType.BUTTON_RESPONSE):
+        print(f"\n{message_type.value}")
+        for name, build in variants:
+            measure(name, build, message_type, iterations)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--iterations", type=int, default=200_000)
+    args = parser.parse_args()
+
+    main(args.iterations)
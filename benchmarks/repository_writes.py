@@ -0,0 +1,133 @@
+"""
+Compara o caminho antigo de escrita dos repositórios (SELECT + alteração do objeto ORM + commit)
+com o caminho atual de um único statement (INSERT ... ON CONFLICT DO UPDATE / UPDATE ... RETURNING).
+
+Uso:
+    python -m benchmarks.repository_writes [--url postgresql+asyncpg://...] [--iterations 2000]
+
+Sem --url usa um arquivo SQLite temporário.
+"""
+import argparse
+import asyncio
+import tempfile
+import time
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import event, select
+
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.models import AgentModel, CustomerModel
+from src.infrastructure.repositories.sqlalchemy import SQLAlchemyAgentRepository, SQLAlchemyCustomerRepository
+
+
+class StatementCounter:
+    def __init__(self, database: Database):
+        self.count = 0
+        event.listen(database.engine.sync_engine, "before_cursor_execute", self._on_execute)
+
+    def _on_execute(self, *_args: object) -> None:
+        self.count += 1
+
+
+async def legacy_customer_update(database: Database, customer: Customer) -> None:
+    async with database.async_session() as session:
+        result = await session.execute(
+            select(CustomerModel).where(CustomerModel.customer_id == customer.customer_id)
+        )
+        db_customer = result.scalar_one_or_none()
+
+        if db_customer:
+            db_customer.department = customer.department
+            db_customer.status = customer.status
+            db_customer.current_agent_id = customer.current_agent_id
+            db_customer.waiting_since = customer.waiting_since
+            db_customer.last_interaction = customer.last_interaction
+            db_customer.conversation_expiration = customer.conversation_expiration
+            await session.commit()
+
+
+async def legacy_agent_status(database: Database, agent_id: str, is_available: bool) -> None:
+    async with database.async_session() as session:
+        result = await session.execute(
+            select(AgentModel).where(AgentModel.agent_id == agent_id)
+        )
+        db_agent = result.scalar_one_or_none()
+
+        if db_agent:
+            db_agent.is_available = is_available
+            db_agent.current_customer_id = None
+            await session.commit()
+
+
+async def agents_add(database: Database, agent: Agent) -> None:
+    async with database.async_session() as session:
+        session.add(AgentModel(agent_id=agent.agent_id, department=agent.department, is_available=agent.is_available))
+        await session.commit()
+
+
+async def measure(
+    name: str,
+    counter: StatementCounter,
+    iterations: int,
+    operation: Callable[[int], Awaitable[None]],
+) -> None:
+    statements_before = counter.count
+    started = time.perf_counter()
+    for index in range(iterations):
+        await operation(index)
+    elapsed = time.perf_counter() - started
+    statements = counter.count - statements_before
+
+    print(
+        f"{name:<32} {iterations / elapsed:>10.0f} ops/s"
+        + f" {elapsed / iterations * 1e6:>10.1f} us/op"
+        + f" {statements / iterations:>6.2f} statements/op"
+    )
+
+
+async def main(url: str, iterations: int) -> None:
+    database = Database(url)
+    await database.create_tables()
+    counter = StatementCounter(database)
+    customers = SQLAlchemyCustomerRepository(database)
+    agents = SQLAlchemyAgentRepository(database)
+
+    pool = 100
+    for index in range(pool):
+        await agents_add(database, Agent(f"AGENT_{index}", Department.SUPPORT))
+        await customers.add(Customer(f"5511{index:08d}", Department.SUPPORT, CustomerStatus.WAITING))
+
+    def customer(index: int) -> Customer:
+        return Customer(
+            customer_id=f"5511{index % pool:08d}",
+            department=Department.SUPPORT,
+            status=CustomerStatus.IN_SERVICE,
+            last_interaction=datetime.now(timezone.utc),
+        )
+
+    print(f"dialect={database.dialect} iterations={iterations}")
+    await measure("customer update (legacy)", counter, iterations, lambda i: legacy_customer_update(database, customer(i)))
+    await measure("customer update (upsert)", counter, iterations, lambda i: customers.update(customer(i)))
+    # A disponibilidade alterna a cada passada pelo pool: com i % 2 cada agente receberia sempre o mesmo
+    # valor e o caminho antigo, sem nada alterado no objeto ORM, faria só o SELECT
+    def available(index: int) -> bool:
+        return (index // pool) % 2 == 0
+
+    await measure("agent status (legacy)", counter, iterations, lambda i: legacy_agent_status(database, f"AGENT_{i % pool}", available(i)))
+    await measure("agent status (update returning)", counter, iterations, lambda i: agents.update_agent_status(f"AGENT_{i % pool}", available(i)))
+
+    await database.engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--url", default=None)
+    _ = parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url: str = args.url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        asyncio.run(main(url, args.iterations))
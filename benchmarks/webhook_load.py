@@ -0,0 +1,465 @@
+"""
+Benchmark ponta a ponta: sobe o `app` do main.py (com o lifespan completo: dispatcher, outbox relay,
+workers) apontando o WhatsAppMessageSender para o stub local da Graph API (benchmarks.fake_graph_api)
+e dispara entregas do webhook contra o app, em processo, pela interface ASGI.
+
+Cenários:
+    customer_flood  --customers clientes mandando --messages mensagens cada
+    agent_mix       --agents agentes alternando /fila, /proximo, texto e /encerrar, com clientes na fila
+    encerrar_storm  --agents agentes em atendimento mandando /encerrar + /proximo ao mesmo tempo
+    replay          entregas gravadas (--replay arquivo.jsonl, um payload do webhook por linha), na ordem do arquivo
+
+Uso:
+    python -m benchmarks.webhook_load [--scenario customer_flood] [--url postgresql+asyncpg://...] [--storage memory]
+        [--concurrency 50] [--pool-size 10] [--latency 0.02] [--rate-limit-rate 0.01] [--error-rate 0.01] [--output report.json]
+
+Sem --url usa um arquivo SQLite temporário. O relatório (latência do webhook e de entrega p50/p95/p99,
+mensagens/s, statements por mensagem, latência por etapa) vai para --output, por padrão benchmarks/results/<cenário>-<commit>.json,
+para comparar entre commits.
+
+Latência de entrega: do POST do webhook até a primeira resposta ao mesmo remetente chegar ao stub.
+Respostas para outro destinatário (ex.: mensagem encaminhada ao agente) contam como não pareadas.
+"""
+import argparse
+import asyncio
+import importlib
+import json
+import os
+import random
+import subprocess
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from collections.abc import MutableMapping
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, cast
+
+from fastapi import FastAPI
+
+from benchmarks.fake_graph_api import FakeDelivery, FakeGraphAPI, FakeGraphAPIConfig
+from benchmarks.repository_writes import StatementCounter
+from src.application.parsers.whatsapp_webhook import parse_webhook
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from src.domain.messages import WhatsAppMessage
+from src.infrastructure.database.models import AgentModel
+from src.infrastructure.metrics.registry import Metrics
+from src.infrastructure.repositories.memory import MemoryAgentRepository
+
+WEBHOOK_PATH = "/api/v1/webhook"
+SCENARIOS = ("customer_flood", "agent_mix", "encerrar_storm", "replay")
+
+Payload = dict[str, object]
+
+
+class DeliveryTracker:
+    """
+    Casa cada mensagem recebida pelo stub com a mensagem do webhook mais antiga
+    ainda sem resposta do mesmo remetente.
+    """
+
+    def __init__(self):
+        self._pending: defaultdict[str, deque[float]] = defaultdict(deque)
+        self.latencies: list[float] = []
+        self.deliveries = 0
+        self.unmatched = 0
+        self.last_delivery_at: float | None = None
+
+    @property
+    def pending(self) -> int:
+        return sum(len(sent) for sent in self._pending.values())
+
+    def sent(self, sender_id: str, at: float) -> None:
+        self._pending[sender_id].append(at)
+
+    def rejected(self, sender_id: str, at: float) -> None:
+        self._pending[sender_id].remove(at)
+
+    def delivered(self, delivery: FakeDelivery) -> None:
+        self.deliveries += 1
+        self.last_delivery_at = delivery.received_at
+        sent = self._pending.get(delivery.recipient_id)
+        if sent:
+            self.latencies.append(delivery.received_at - sent.popleft())
+        else:
+            self.unmatched += 1
+
+
+def webhook_payload(messages: list[tuple[str, str]], sequence: int) -> Payload:
+    """Uma entrega do webhook no formato da Cloud API, com um wamid único por mensagem"""
+    timestamp = str(int(time.time()))
+    return {
+        "object": "whatsapp_business_account",
+        "entry": [{
+            "id": "BENCHMARK",
+            "changes": [{
+                "field": "messages",
+                "value": {
+                    "messaging_product": "whatsapp",
+                    "metadata": {"display_phone_number": "5500000000000", "phone_number_id": "BENCHMARK"},
+                    "messages": [
+                        {
+                            "from": sender_id,
+                            "id": f"wamid.benchmark.{sequence}.{index}",
+                            "timestamp": timestamp,
+                            "type": "text",
+                            "text": {"body": content},
+                        }
+                        for index, (sender_id, content) in enumerate(messages)
+                    ],
+                },
+            }],
+        }],
+    }
+
+
+def customer_id(index: int) -> str:
+    return f"5511{index:08d}"
+
+
+def agent_id(index: int) -> str:
+    return f"AGENT_{index}"
+
+
+def customer_flood(args: argparse.Namespace) -> list[list[tuple[str, str]]]:
+    # Intercalado: a mensagem n de todos os clientes antes da n + 1 de qualquer um
+    return [
+        [(customer_id(customer), f"mensagem {message}")]
+        for message in range(args.messages)
+        for customer in range(args.customers)
+    ]
+
+
+def agent_mix(args: argparse.Namespace) -> list[list[tuple[str, str]]]:
+    commands = ["/fila", "/proximo", "Olá, em que posso ajudar?", "/encerrar"]
+    deliveries = [
+        [(agent_id(agent), command)]
+        for _ in range(args.messages)
+        for agent in range(args.agents)
+        for command in commands
+    ]
+    deliveries += [
+        [(customer_id(customer), "Ainda estou aguardando")]
+        for _ in range(args.messages)
+        for customer in range(args.customers)
+    ]
+    random.Random(args.seed).shuffle(deliveries)
+    return deliveries
+
+
+def encerrar_storm(args: argparse.Namespace) -> list[list[tuple[str, str]]]:
+    # Na mesma entrega, para que /proximo seja processado depois do /encerrar do mesmo agente
+    return [[(agent_id(agent), "/encerrar"), (agent_id(agent), "/proximo")] for agent in range(args.agents)]
+
+
+def build_payloads(args: argparse.Namespace) -> list[Payload]:
+    if args.scenario == "replay":
+        if not args.replay:
+            raise SystemExit("--replay is required for the replay scenario")
+        with open(args.replay, encoding="utf-8") as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    scenario = {"customer_flood": customer_flood, "agent_mix": agent_mix, "encerrar_storm": encerrar_storm}[args.scenario]
+    return [webhook_payload(messages, sequence) for sequence, messages in enumerate(scenario(args))]
+
+
+async def seed(service: Any, args: argparse.Namespace) -> None:  # pyright: ignore[reportExplicitAny]
+    """Agentes e clientes que os cenários de agentes esperam encontrar no banco"""
+    if args.scenario not in ("agent_mix", "encerrar_storm"):
+        return
+
+    departments = list(Department)
+    agents = [Agent(agent_id(index), departments[index % len(departments)]) for index in range(args.agents)]
+    if service.store is not None:
+        repository = MemoryAgentRepository(service.store)
+        for agent in agents:
+            await repository.add(agent)
+    else:
+        async with service.database.async_session() as session:
+            session.add_all([AgentModel(agent_id=agent.agent_id, department=agent.department, is_available=True) for agent in agents])
+            await session.commit()
+
+    now = datetime.now(timezone.utc)
+    waiting = [
+        Customer(
+            customer_id=customer_id(index),
+            department=departments[index % len(departments)],
+            status=CustomerStatus.WAITING,
+            waiting_since=now - timedelta(seconds=args.customers - index),
+            last_interaction=now
+        )
+        for index in range(args.customers)
+    ]
+    in_service: list[Customer] = []
+    if args.scenario == "encerrar_storm":
+        in_service = [
+            Customer(
+                customer_id=f"5521{index:08d}",
+                department=agent.department,
+                status=CustomerStatus.IN_SERVICE,
+                current_agent_id=agent.agent_id,
+                last_interaction=now
+            )
+            for index, agent in enumerate(agents)
+        ]
+    await service.customer_repo.update_many(waiting + in_service)
+
+    for agent, customer in zip(agents, in_service):
+        agent.is_available = False
+        agent.current_customer_id = customer.customer_id
+    await service.agent_repo.update_many(agents)
+
+
+async def post_webhook(app: FastAPI, body: bytes) -> int:
+    """POST no app pela interface ASGI, sem servidor HTTP no meio"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": WEBHOOK_PATH,
+        "raw_path": WEBHOOK_PATH.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 80),
+    }
+    request: list[dict[str, object]] = [{"type": "http.request", "body": body, "more_body": False}]
+    finished = asyncio.Event()
+    status = 0
+
+    async def receive() -> dict[str, object]:
+        if request:
+            return request.pop()
+        _ = await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message: MutableMapping[str, object]) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = cast(int, message["status"])
+        elif message["type"] == "http.response.body" and not message.get("more_body", False):
+            finished.set()
+
+    await app(scope, receive, send)
+    return status
+
+
+async def drive(app: FastAPI, payloads: list[Payload], concurrency: int, tracker: DeliveryTracker) -> tuple[list[float], Counter[int], int]:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies: list[float] = []
+    statuses: Counter[int] = Counter()
+    accepted = 0
+
+    async def post(payload: Payload) -> None:
+        nonlocal accepted
+        senders = [event.sender_id for event in parse_webhook(payload) if isinstance(event, WhatsAppMessage)]
+        body = json.dumps(payload).encode()
+        async with semaphore:
+            started = time.perf_counter()
+            for sender_id in senders:
+                tracker.sent(sender_id, started)
+            status = await post_webhook(app, body)
+            latencies.append(time.perf_counter() - started)
+        statuses[status] += 1
+        if status == 200:
+            accepted += len(senders)
+        else:
+            # Mensagens recusadas (ex.: 503 com a fila cheia) não terão resposta
+            for sender_id in senders:
+                tracker.rejected(sender_id, started)
+
+    _ = await asyncio.gather(*(post(payload) for payload in payloads))
+    return latencies, statuses, accepted
+
+
+async def settle(tracker: DeliveryTracker, idle: float, timeout: float) -> None:
+    """Espera todas as respostas pareadas, ou `idle` segundos sem entregas, ou o timeout"""
+    started = time.perf_counter()
+    deadline = started + timeout
+    while time.perf_counter() < deadline and tracker.pending:
+        last = max(tracker.last_delivery_at or started, started)
+        if time.perf_counter() - last > idle:
+            return
+        await asyncio.sleep(0.05)
+
+
+def latency_breakdown(metrics: Metrics) -> dict[str, dict[str, float]]:
+    """Histogramas do serviço (etapas, repositórios, Graph API por status), em ms"""
+    breakdown: dict[str, dict[str, float]] = {}
+    for name, histograms in sorted(metrics.histograms.items()):
+        for labels, histogram in histograms.items():
+            snapshot = histogram.snapshot()
+            # Contagens (ex.: queries por requisição) ficam na unidade original
+            scale = 1e3 if name.endswith("_seconds") else 1.0
+            key = name + "{" + ",".join(f"{label}={value}" for label, value in labels) + "}"
+            breakdown[key] = {
+                "count": snapshot.count,
+                "mean": snapshot.sum / snapshot.count * scale if snapshot.count else 0.0,
+                "p50": snapshot.p50 * scale,
+                "p99": snapshot.p99 * scale,
+                "max": snapshot.max * scale,
+            }
+    return breakdown
+
+
+def summary(values: list[float]) -> dict[str, float] | None:
+    if not values:
+        return None
+
+    ordered = sorted(values)
+
+    def percentile(p: float) -> float:
+        return ordered[min(len(ordered) - 1, round(p / 100 * (len(ordered) - 1)))] * 1e3
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1e3,
+        "p50_ms": percentile(50),
+        "p95_ms": percentile(95),
+        "p99_ms": percentile(99),
+        "max_ms": ordered[-1] * 1e3,
+    }
+
+
+def git_revision() -> dict[str, object]:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+    return {"commit": commit, "dirty": dirty}
+
+
+async def main(args: argparse.Namespace, url: str, revision: dict[str, object]) -> dict[str, object]:
+    tracker = DeliveryTracker()
+    fake_api = FakeGraphAPI(
+        FakeGraphAPIConfig(
+            latency=args.latency,
+            jitter=args.jitter,
+            rate_limit_rate=args.rate_limit_rate,
+            error_rate=args.error_rate,
+            retry_after=args.retry_after,
+            seed=args.seed
+        ),
+        on_delivery=tracker.delivered
+    )
+    base_url = await fake_api.start()
+
+    # O main.py monta o serviço ao ser importado, a partir das variáveis de ambiente e da configuração do módulo service
+    os.environ["WHATSAPP_WORKERS"] = "1"
+    os.environ["WHATSAPP_DATABASE_URL"] = url
+    os.environ["WHATSAPP_STORAGE"] = args.storage
+    # Vazio: MemoryStore só em memória, sem WAL
+    os.environ["WHATSAPP_MEMORY_STORE_PATH"] = ""
+    service_module = importlib.import_module("service")
+    service_module.config.base_url = base_url
+    service_module.config.messages_per_second = args.messages_per_second
+    service_module.database_config.pool_size = args.pool_size
+    service_module.database_config.max_overflow = args.max_overflow
+    main_module = importlib.import_module("main")
+    app = main_module.app
+    service = main_module.service
+
+    counter: StatementCounter | None = None
+    if service.database is not None:
+        await service.database.create_tables()
+        counter = StatementCounter(service.database)
+    await seed(service, args)
+    payloads = build_payloads(args)
+
+    try:
+        async with main_module.lifespan(app):
+            statements_before = counter.count if counter else 0
+            started = time.perf_counter()
+            webhook_latencies, statuses, accepted = await drive(app, payloads, args.concurrency, tracker)
+            ingested_at = time.perf_counter()
+            await settle(tracker, args.idle, args.timeout)
+            finished_at = max(tracker.last_delivery_at or ingested_at, ingested_at)
+            statements = (counter.count - statements_before) if counter else None
+            dispatcher_stats = service.dispatcher.stats()
+            relay_stats = service.outbox_relay.stats()
+            pool_stats = service.message_sender.pool_stats()
+            database_pool_stats = service.database.pool_stats() if service.database is not None else None
+            breakdown = latency_breakdown(service.metrics)
+    finally:
+        await fake_api.stop()
+
+    return {
+        "scenario": args.scenario,
+        "revision": revision,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "storage": args.storage,
+            "dialect": service.database.dialect if service.database is not None else None,
+            "payloads": len(payloads),
+            "customers": args.customers,
+            "agents": args.agents,
+            "messages": args.messages,
+            "concurrency": args.concurrency,
+            "database_pool_size": args.pool_size,
+            "database_max_overflow": args.max_overflow,
+            "messages_per_second_limit": args.messages_per_second,
+            "graph_api": asdict(fake_api.config),
+        },
+        "messages": accepted,
+        "webhook_status": {str(status): count for status, count in sorted(statuses.items())},
+        "webhook_latency": summary(webhook_latencies),
+        "delivery_latency": summary(tracker.latencies),
+        "ingest_messages_per_second": accepted / max(ingested_at - started, 1e-9),
+        "messages_per_second": accepted / max(finished_at - started, 1e-9),
+        "deliveries": tracker.deliveries,
+        "unmatched_deliveries": tracker.unmatched,
+        "unanswered_messages": tracker.pending,
+        "db_statements": statements,
+        "db_statements_per_message": statements / accepted if statements is not None and accepted else None,
+        "graph_api": asdict(fake_api.stats()),
+        "dispatcher": asdict(dispatcher_stats),
+        "outbox_relay": asdict(relay_stats),
+        "connection_pool": asdict(pool_stats),
+        "database_pool": asdict(database_pool_stats) if database_pool_stats is not None else None,
+        "latency_breakdown": breakdown,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    _ = parser.add_argument("--scenario", choices=SCENARIOS, default="customer_flood")
+    _ = parser.add_argument("--replay", default=None)
+    _ = parser.add_argument("--url", default=None)
+    _ = parser.add_argument("--storage", choices=("database", "memory"), default="database")
+    _ = parser.add_argument("--customers", type=int, default=200)
+    _ = parser.add_argument("--agents", type=int, default=20)
+    _ = parser.add_argument("--messages", type=int, default=5)
+    _ = parser.add_argument("--concurrency", type=int, default=50)
+    # Pool do banco; database_pool no relatório mostra quanto os checkouts esperaram com esse tamanho
+    _ = parser.add_argument("--pool-size", type=int, default=10)
+    _ = parser.add_argument("--max-overflow", type=int, default=10)
+    # Padrão: limite de um número com throughput ampliado; os limites por destinatário seguem o WhatsAppConfig
+    _ = parser.add_argument("--messages-per-second", type=float, default=1000.0)
+    _ = parser.add_argument("--latency", type=float, default=0.0)
+    _ = parser.add_argument("--jitter", type=float, default=0.0)
+    _ = parser.add_argument("--rate-limit-rate", type=float, default=0.0)
+    _ = parser.add_argument("--error-rate", type=float, default=0.0)
+    _ = parser.add_argument("--retry-after", type=float, default=1.0)
+    _ = parser.add_argument("--idle", type=float, default=3.0)
+    _ = parser.add_argument("--timeout", type=float, default=120.0)
+    _ = parser.add_argument("--seed", type=int, default=42)
+    _ = parser.add_argument("--output", default=None)
+    args = parser.parse_args()
+
+    revision = git_revision()
+    with tempfile.TemporaryDirectory() as tmp:
+        url: str = args.url or f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}"
+        report = asyncio.run(main(args, url, revision))
+
+    output = Path(args.output or f"benchmarks/results/{args.scenario}-{revision['commit'] or 'unknown'}.json")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    _ = output.write_text(json.dumps(report, indent=2, default=str) + "\n", encoding="utf-8")
+
+    for key in ("messages", "webhook_status", "webhook_latency", "delivery_latency", "messages_per_second", "db_statements_per_message"):
+        print(f"{key:<28} {report[key]}")
+    print(f"report written to {output}")
@@ -1,45 +1,90 @@
+import logging
+from collections.abc import Mapping
 from fastapi import HTTPException
-from datetime import datetime
-from uuid import uuid4
-from typing import cast
 
-from src.domain.messages import MessageType, WhatsAppMessage
+from src.application.parsers.whatsapp_webhook import parse_webhook
+from src.application.workers.dispatcher import DispatcherFullError, MessageDispatcher
+from src.domain.messages import DeliveryStatus, MessageStatusEvent, WhatsAppMessage
 from src.domain.services import MessageRouter
+from src.infrastructure.idempotency import MessageDeduplicator
+from src.infrastructure.metrics.registry import Metrics, MetricsConfig
+
+logger = logging.getLogger(__name__)
 
 class WebhookController:
-    def __init__(self, message_router: MessageRouter):
+    def __init__(
+        self,
+        message_router: MessageRouter | None,
+        dispatcher: MessageDispatcher | None = None,
+        deduplicator: MessageDeduplicator | None = None,
+        metrics: Metrics | None = None
+    ):
+        # Sem router (ex.: processo supervisor dos shards) todas as mensagens vão para o dispatcher
+        if message_router is None and dispatcher is None:
+            raise ValueError("WebhookController needs a message router or a dispatcher")
         self.message_router = message_router
+        self.dispatcher = dispatcher
+        self.deduplicator = deduplicator
+        self.metrics = metrics or Metrics(MetricsConfig(enabled=False))
+
+    async def handle_webhook(self, data: Mapping[str, object]) -> dict[str, str]:
+        with self.metrics.trace("webhook"):
+            return await self._handle_webhook(data)
 
-    async def handle_webhook(self, data: dict[str, str]) -> dict[str, str]:
+    async def _handle_webhook(self, data: Mapping[str, object]) -> dict[str, str]:
         try:
-            # Converte o payload do webhook para nosso formato interno
-            message = self.convert_webhook_to_message(data)
-            message = cast(WhatsAppMessage, message)
-            
-            # Processa a mensagem e envia respostas
-            await self.message_router.handle_incoming_message(message)
-            
+            # Uma entrega pode trazer várias mensagens e status, de várias entries
+            messages: list[WhatsAppMessage] = []
+            with self.metrics.span("parse"):
+                for event in parse_webhook(data):
+                    if isinstance(event, WhatsAppMessage):
+                        messages.append(event)
+                    else:
+                        self.handle_status(event)
+
+            if self.deduplicator is not None:
+                # Reentregas do Meta param aqui, antes de qualquer acesso a repositório ou envio
+                with self.metrics.span("deduplicate"):
+                    messages = await self.deduplicator.filter_new(messages)
+
+            if self.dispatcher is not None:
+                # Modo de ingestão: enfileira e responde ao Meta imediatamente. A entrega inteira entra nas
+                # filas antes de qualquer worker rodar; cada lane faz o prefetch da parte que recebeu
+                for index, message in enumerate(messages):
+                    try:
+                        self.dispatcher.submit(message)
+                    except DispatcherFullError:
+                        # O que não entrou na fila precisa ser aceito quando o Meta reenviar
+                        await self._release(messages[index:])
+                        raise
+                return {"status": "accepted"}
+
+            # Processa as mensagens em lote e envia respostas
+            assert self.message_router is not None
+            failed = await self.message_router.handle_incoming_messages(messages)
+            if failed:
+                await self._release(failed)
+                raise HTTPException(status_code=500, detail=f"{len(failed)} of {len(messages)} messages failed")
+
             return {"status": "success"}
+        except HTTPException:
+            raise
+        except DispatcherFullError as e:
+            # 503 faz o Meta reenviar o webhook mais tarde
+            raise HTTPException(status_code=503, detail=str(e))
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
-    def convert_webhook_to_message(self, data: dict[str, str]) -> WhatsAppMessage | None:
+    async def _release(self, messages: list[WhatsAppMessage]) -> None:
+        if self.deduplicator is not None:
+            await self.deduplicator.release(messages)
+
+    def handle_status(self, event: MessageStatusEvent) -> None:
         """
-        Converte o payload do webhook do WhatsApp para nosso formato interno
-        Esta é uma implementação simplificada - você precisará adaptá-la ao formato real do webhook
+        Status das mensagens enviadas. Por enquanto só as falhas de entrega são registradas.
         """
-        # Implementar conversão do formato do webhook para WhatsAppMessage
-        # Exemplo simplificado:
-        if "messages" in data:
-            message_data = data["messages"][0]
-
-            return WhatsAppMessage(
-                message_id=uuid4(),
-                sender_id=message_data["from"],  # pyright: ignore[reportArgumentType]
-                recipient_id=message_data["to"],  # pyright: ignore[reportArgumentType]
-                content=message_data["text"]["body"],  # pyright: ignore[reportArgumentType]
-                message_type=MessageType.TEXT,
-                timestamp=datetime.now()
+        if event.status == DeliveryStatus.FAILED:
+            logger.warning(
+                "Message delivery failed",
+                extra={"external_id": event.external_id, "recipient_id": event.recipient_id, "error": event.error}
             )
-
-        return None
\ No newline at end of file
@@ -0,0 +1,157 @@
+import logging
+from collections.abc import Iterator, Mapping
+from datetime import datetime, timezone
+from uuid import UUID, uuid4, uuid5
+
+from src.domain.messages import DeliveryStatus, MessageStatusEvent, MessageType, WhatsAppMessage
+
+logger = logging.getLogger(__name__)
+
+WebhookEvent = WhatsAppMessage | MessageStatusEvent
+
+# message_id determinístico a partir do wamid: reentregas do mesmo webhook geram o mesmo ID
+_WAMID_NAMESPACE = UUID("6f1c3b0e-8d4a-4f7e-9a57-2b9c1d0e4a11")
+
+_MEDIA_TYPES: dict[str, MessageType] = {
+    "image": MessageType.IMAGE,
+    "audio": MessageType.AUDIO,
+    "voice": MessageType.AUDIO,
+    "video": MessageType.VIDEO,
+    "document": MessageType.DOCUMENT,
+}
+
+
+def parse_webhook(payload: Mapping[str, object]) -> Iterator[WebhookEvent]:
+    """
+    Percorre o envelope completo do webhook da Cloud API
+    (entry[].changes[].value.messages[] e statuses[]) e gera os eventos na ordem em que aparecem.
+    Os objetos do payload são lidos no lugar, sem cópias intermediárias.
+    Itens malformados são ignorados com um aviso em vez de descartar a entrega inteira.
+    O formato simplificado antigo ({"messages": [...]} na raiz) continua aceito.
+    """
+    if "entry" not in payload:
+        yield from _parse_value(payload)
+        return
+
+    for entry in _objects(payload.get("entry")):
+        for change in _objects(entry.get("changes")):
+            value = change.get("value")
+            if isinstance(value, Mapping):
+                yield from _parse_value(value)  # pyright: ignore[reportUnknownArgumentType]
+
+
+def _parse_value(value: Mapping[str, object]) -> Iterator[WebhookEvent]:
+    metadata = value.get("metadata")
+    business_id = ""
+    if isinstance(metadata, Mapping):
+        business_id = str(metadata.get("phone_number_id") or metadata.get("display_phone_number") or "")  # pyright: ignore[reportUnknownMemberType]
+
+    for message_data in _objects(value.get("messages")):
+        message = _parse_message(message_data, business_id)
+        if message is not None:
+            yield message
+
+    for status_data in _objects(value.get("statuses")):
+        status = _parse_status(status_data)
+        if status is not None:
+            yield status
+
+
+def _parse_message(data: Mapping[str, object], business_id: str) -> WhatsAppMessage | None:
+    sender_id = data.get("from")
+    if not isinstance(sender_id, str):
+        logger.warning("Skipping webhook message without sender", extra={"payload": data})
+        return None
+
+    wamid = data.get("id")
+    external_id = wamid if isinstance(wamid, str) else None
+    kind = str(data.get("type") or "text")
+    message_type = MessageType.TEXT
+    metadata: dict[str, object] = {"type": kind}
+
+    if kind == "text":
+        content = _field(data.get("text"), "body")
+    elif kind == "interactive":
+        message_type = MessageType.BUTTON_RESPONSE
+        interactive = data.get("interactive")
+        reply = None
+        if isinstance(interactive, Mapping):
+            reply = interactive.get("button_reply") or interactive.get("list_reply")  # pyright: ignore[reportUnknownMemberType]
+        content = _field(reply, "title")
+        metadata["reply_id"] = _field(reply, "id")
+    elif kind == "button":
+        message_type = MessageType.BUTTON_RESPONSE
+        content = _field(data.get("button"), "text")
+        metadata["payload"] = _field(data.get("button"), "payload")
+    elif kind in _MEDIA_TYPES:
+        message_type = _MEDIA_TYPES[kind]
+        media = data.get(kind)
+        content = _field(media, "caption")
+        metadata["media_id"] = _field(media, "id")
+        metadata["mime_type"] = _field(media, "mime_type")
+        if kind == "document":
+            metadata["filename"] = _field(media, "filename")
+    else:
+        # Tipos sem conteúdo roteável (reaction, location, sticker...): segue vazio para o roteador
+        content = ""
+
+    return WhatsAppMessage(
+        message_id=uuid5(_WAMID_NAMESPACE, external_id) if external_id else uuid4(),
+        sender_id=sender_id,
+        recipient_id=str(data.get("to") or business_id),
+        content=content,
+        message_type=message_type,
+        timestamp=_timestamp(data.get("timestamp")),
+        metadata=metadata,
+        external_id=external_id
+    )
+
+
+def _parse_status(data: Mapping[str, object]) -> MessageStatusEvent | None:
+    external_id = data.get("id")
+    try:
+        status = DeliveryStatus(data.get("status"))
+    except ValueError:
+        logger.debug("Skipping unknown webhook status", extra={"status": data.get("status")})
+        return None
+
+    if not isinstance(external_id, str):
+        logger.warning("Skipping webhook status without message id", extra={"payload": data})
+        return None
+
+    errors = list(_objects(data.get("errors")))
+    error = None
+    if errors:
+        error = f"{errors[0].get('code')}: {errors[0].get('title') or errors[0].get('message')}"
+
+    return MessageStatusEvent(
+        external_id=external_id,
+        recipient_id=str(data.get("recipient_id") or ""),
+        status=status,
+        timestamp=_timestamp(data.get("timestamp")),
+        error=error
+    )
+
+
+def _objects(value: object) -> Iterator[Mapping[str, object]]:
+    if not isinstance(value, list):
+        return
+    for item in value:  # pyright: ignore[reportUnknownVariableType]
+        if isinstance(item, Mapping):
+            yield item
+
+
+def _field(value: object, key: str) -> str:
+    if isinstance(value, Mapping):
+        field = value.get(key)  # pyright: ignore[reportUnknownMemberType]
+        if field is not None:
+            return str(field)
+    return ""
+
+
+def _timestamp(value: object) -> datetime:
+    # A Cloud API envia segundos Unix como string
+    try:
+        return datetime.fromtimestamp(int(str(value)), tz=timezone.utc)
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc)
@@ -0,0 +1,23 @@
+from dataclasses import asdict
+from fastapi import APIRouter, HTTPException, Response
+from src.infrastructure.metrics import prometheus
+from src.infrastructure.metrics.registry import Metrics
+
+def create_metrics_router(metrics: Metrics) -> APIRouter:
+    """
+    Cria o router de observabilidade: /metrics no formato texto do Prometheus e,
+    com o profiler ligado, /metrics/slow-requests com as requisições mais lentas.
+    """
+    router = APIRouter()
+
+    @router.get("/metrics")
+    async def prometheus_metrics():
+        return Response(content=prometheus.render(metrics), media_type=prometheus.CONTENT_TYPE)
+
+    @router.get("/metrics/slow-requests")
+    async def slow_requests():
+        if metrics.profiler is None:
+            raise HTTPException(status_code=404, detail="Slow request profiler is disabled")
+        return [asdict(request) for request in metrics.profiler.requests()]
+
+    return router
@@ -0,0 +1,22 @@
+from fastapi import APIRouter, HTTPException
+from src.application.workers.sharding import ShardSupervisor
+
+def create_shard_router(supervisor: ShardSupervisor) -> APIRouter:
+    """
+    Cria o router de administração dos shards: GET /admin/shards com o estado de cada shard e
+    PUT /admin/shards/workers/{workers} para mudar o número de processos em execução (ShardSupervisor.resize).
+    """
+    router = APIRouter(prefix="/admin")
+
+    @router.get("/shards")
+    async def shard_stats():
+        return supervisor.stats()
+
+    @router.put("/shards/workers/{workers}")
+    async def resize_shards(workers: int):
+        if workers < 1:
+            raise HTTPException(status_code=422, detail="At least one shard is required")
+        await supervisor.resize(workers)
+        return supervisor.stats()
+
+    return router
@@ -1,16 +1,36 @@
 from fastapi import APIRouter
 from src.application.controllers.webhook_controller import WebhookController
+from src.application.workers.dispatcher import MessageDispatcher
 from src.domain.services import MessageRouter
+from src.infrastructure.idempotency import MessageDeduplicator
+from src.infrastructure.metrics.registry import Metrics
 
-def create_webhook_router(message_router: MessageRouter) -> APIRouter:
+def create_webhook_router(
+    message_router: MessageRouter | None,
+    dispatcher: MessageDispatcher | None = None,
+    deduplicator: MessageDeduplicator | None = None,
+    metrics: Metrics | None = None
+) -> APIRouter:
     """
     Cria e configura o router para o endpoint /webhook.
+    Se um dispatcher for informado, o webhook apenas enfileira a mensagem e responde imediatamente.
+    Com um deduplicator, reentregas da mesma mensagem (mesmo wamid) são ignoradas.
     """
     router = APIRouter(prefix="/api/v1")  # Prefixo opcional para versionamento da API
-    webhook_controller = WebhookController(message_router)
+    webhook_controller = WebhookController(message_router, dispatcher, deduplicator, metrics)
 
     @router.post("/webhook")
-    async def webhook(data: dict[str, str]):
+    async def webhook(data: dict[str, object]):
         return await webhook_controller.handle_webhook(data)
 
+    if dispatcher is not None:
+        @router.get("/webhook/stats")
+        async def webhook_stats():
+            return dispatcher.stats()
+
+    if deduplicator is not None:
+        @router.get("/webhook/deduplication")
+        async def webhook_deduplication_stats():
+            return deduplicator.stats()
+
     return router
\ No newline at end of file
@@ -0,0 +1,36 @@
+from abc import ABC, abstractmethod
+
+from src.domain.messages import WhatsAppMessage
+
+
+class DispatcherFullError(Exception):
+    pass
+
+
+class MessageDispatcher(ABC):
+    """
+    Processa mensagens recebidas em segundo plano, fora do ciclo de request do webhook.
+    """
+
+    @abstractmethod
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def stop(self) -> None:
+        """
+        Para de aceitar mensagens e drena o que já foi enfileirado.
+        """
+        pass
+
+    @abstractmethod
+    def submit(self, message: WhatsAppMessage) -> None:
+        """
+        Enfileira a mensagem sem bloquear.
+        Levanta DispatcherFullError se não houver espaço.
+        """
+        pass
+
+    @abstractmethod
+    def stats(self) -> object:
+        pass
@@ -0,0 +1,217 @@
+import asyncio
+import heapq
+import logging
+import time
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, nullcontext
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from src.domain.entities import Customer, CustomerStatus
+from src.domain.interfaces.messaging import MessageSender
+from src.domain.messages import WhatsAppMessage
+from src.domain.repositories import AgentRepository, CustomerRepository
+from src.domain.unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ExpiryConfig:
+    interval: float = 5.0
+    max_batch: int = 1000
+
+
+@dataclass
+class ExpiryStats:
+    tracked: int
+    heap_size: int
+    sweeps: int
+    expired_last_sweep: int
+    expired_total: int
+    stale_skipped: int
+    released_agents: int
+    last_sweep_seconds: float
+    max_sweep_seconds: float
+
+
+class ConversationExpirySweeper:
+    """
+    Encerra em segundo plano as conversas sem interação dentro de conversation_expiration.
+    Os prazos ficam em um min-heap alimentado por touch() a cada cliente gravado; um prazo
+    substituído por uma interação mais nova só é descartado quando chega ao topo (lazy deletion).
+    Cada varredura retira os prazos vencidos e os encerra com um único UPDATE em lote,
+    liberando a vaga na fila e o agente que atendia o cliente.
+    """
+
+    customer_repo: CustomerRepository
+    agent_repo: AgentRepository
+    message_sender: MessageSender
+    unit_of_work: Callable[[], UnitOfWork] | None
+    config: ExpiryConfig
+    owns: Callable[[str], bool] | None
+
+    def __init__(
+        self,
+        customer_repo: CustomerRepository,
+        agent_repo: AgentRepository,
+        message_sender: MessageSender,
+        unit_of_work: Callable[[], UnitOfWork] | None = None,
+        config: ExpiryConfig | None = None,
+        owns: Callable[[str], bool] | None = None
+    ):
+        self.customer_repo = customer_repo
+        self.agent_repo = agent_repo
+        self.message_sender = message_sender
+        self.unit_of_work = unit_of_work
+        self.config = config or ExpiryConfig()
+        # Em modo multi-processo, cada shard só varre os clientes que são dele
+        self.owns = owns
+        self._heap: list[tuple[float, str]] = []
+        self._deadlines: dict[str, float] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._sweeps = 0
+        self._expired_last = 0
+        self._expired_total = 0
+        self._stale_skipped = 0
+        self._released_agents = 0
+        self._last_sweep = 0.0
+        self._max_sweep = 0.0
+
+    async def rebuild(self) -> None:
+        self._heap.clear()
+        self._deadlines.clear()
+        for customer in await self.customer_repo.list_active_customers():
+            self.touch(customer)
+
+    def touch(self, customer: Customer) -> None:
+        """
+        Listener de ObservedCustomerRepository: registra o novo prazo do cliente.
+        """
+        expires_at = customer.expires_at()
+        owned = self.owns is None or self.owns(customer.customer_id)
+        if customer.status == CustomerStatus.FINISHED or expires_at is None or not owned:
+            _ = self._deadlines.pop(customer.customer_id, None)
+            return
+
+        deadline = expires_at.timestamp()
+        if self._deadlines.get(customer.customer_id) == deadline:
+            return
+
+        self._deadlines[customer.customer_id] = deadline
+        heapq.heappush(self._heap, (deadline, customer.customer_id))
+        self._compact()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="conversation-expiry-sweeper")
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            _ = await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def sweep(self) -> int:
+        """
+        Encerra as conversas vencidas (até max_batch por chamada) e avisa os agentes liberados.
+        Retorna quantas conversas foram encerradas.
+        """
+        started = time.perf_counter()
+        now = datetime.now(timezone.utc)
+        due = self._pop_due(now.timestamp())
+        expired: list[Customer] = []
+        released: list[str] = []
+
+        if due:
+            try:
+                async with self._transaction():
+                    # Quem não expirar aqui interagiu por outro caminho; volta ao heap no próximo touch()
+                    expired = await self.customer_repo.expire_conversations(due, now)
+                    released = await self.agent_repo.release_agents([customer.customer_id for customer in expired])
+            except Exception:
+                # Devolve os prazos ao heap para a próxima varredura
+                for customer_id in due:
+                    if customer_id not in self._deadlines:
+                        self._deadlines[customer_id] = now.timestamp()
+                        heapq.heappush(self._heap, (now.timestamp(), customer_id))
+                raise
+
+        if released:
+            results = await self.message_sender.send_messages([
+                WhatsAppMessage.create_system_message(
+                    agent_id,
+                    "Atendimento encerrado por inatividade do cliente. Use /proximo para atender o próximo."
+                )
+                for agent_id in released
+            ])
+            for result in results:
+                if not result.success:
+                    logger.warning(
+                        "Failed to notify agent about expired conversation",
+                        extra={"agent_id": result.message.recipient_id, "error": result.error}
+                    )
+
+        elapsed = time.perf_counter() - started
+        self._sweeps += 1
+        self._expired_last = len(expired)
+        self._expired_total += len(expired)
+        self._released_agents += len(released)
+        self._last_sweep = elapsed
+        self._max_sweep = max(self._max_sweep, elapsed)
+        if expired:
+            logger.info(
+                "Expired inactive conversations",
+                extra={"expired": len(expired), "released_agents": len(released), "seconds": elapsed}
+            )
+        return len(expired)
+
+    def stats(self) -> ExpiryStats:
+        return ExpiryStats(
+            tracked=len(self._deadlines),
+            heap_size=len(self._heap),
+            sweeps=self._sweeps,
+            expired_last_sweep=self._expired_last,
+            expired_total=self._expired_total,
+            stale_skipped=self._stale_skipped,
+            released_agents=self._released_agents,
+            last_sweep_seconds=self._last_sweep,
+            max_sweep_seconds=self._max_sweep,
+        )
+
+    def _pop_due(self, now: float) -> list[str]:
+        due: list[str] = []
+        while self._heap and self._heap[0][0] <= now and len(due) < self.config.max_batch:
+            deadline, customer_id = heapq.heappop(self._heap)
+            if self._deadlines.get(customer_id) != deadline:
+                # Prazo substituído por uma interação mais nova (ou cliente já encerrado)
+                self._stale_skipped += 1
+                continue
+
+            del self._deadlines[customer_id]
+            due.append(customer_id)
+        return due
+
+    def _compact(self) -> None:
+        # Clientes muito ativos empilham um prazo por interação; descarta os antigos de uma vez
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._deadlines):
+            self._heap = [(deadline, customer_id) for customer_id, deadline in self._deadlines.items()]
+            heapq.heapify(self._heap)
+
+    def _transaction(self) -> AbstractAsyncContextManager[object]:
+        if self.unit_of_work is None:
+            return nullcontext()
+        return self.unit_of_work()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                _ = await self.sweep()
+            except Exception:
+                logger.exception("Conversation expiry sweep failed")
+                await asyncio.sleep(self.config.interval)
+                continue
+
+            # Lote cheio: ainda há prazos vencidos, varre de novo sem esperar
+            if not (self._heap and self._heap[0][0] <= time.time()):
+                await asyncio.sleep(self.config.interval)
@@ -0,0 +1,60 @@
+import bisect
+import hashlib
+from collections.abc import Iterable
+
+
+def _point(value: str) -> int:
+    # md5 só como função de espalhamento: estável entre processos e bem distribuída
+    return int.from_bytes(hashlib.md5(value.encode()).digest()[:8], "big")
+
+
+class ConsistentHashRing:
+    """
+    Anel de hash consistente com nós virtuais.
+    Cada nó ocupa `replicas` pontos do anel; uma chave pertence ao primeiro ponto no sentido horário.
+    Adicionar ou remover um nó move só as chaves dos arcos afetados (~1/N do total).
+    """
+
+    replicas: int
+
+    def __init__(self, nodes: Iterable[int] = (), replicas: int = 128):
+        self.replicas = replicas
+        self._points: list[int] = []
+        self._owners: list[int] = []
+        self._nodes: set[int] = set()
+        for node in nodes:
+            self.add_node(node)
+
+    @property
+    def nodes(self) -> list[int]:
+        return sorted(self._nodes)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    def add_node(self, node: int) -> None:
+        if node in self._nodes:
+            return
+
+        self._nodes.add(node)
+        for replica in range(self.replicas):
+            point = _point(f"{node}:{replica}")
+            index = bisect.bisect(self._points, point)
+            self._points.insert(index, point)
+            self._owners.insert(index, node)
+
+    def remove_node(self, node: int) -> None:
+        if node not in self._nodes:
+            return
+
+        self._nodes.remove(node)
+        kept = [(point, owner) for point, owner in zip(self._points, self._owners) if owner != node]
+        self._points = [point for point, _ in kept]
+        self._owners = [owner for _, owner in kept]
+
+    def node_for(self, key: str) -> int:
+        if not self._points:
+            raise LookupError("Hash ring has no nodes")
+
+        index = bisect.bisect(self._points, _point(key)) % len(self._points)
+        return self._owners[index]
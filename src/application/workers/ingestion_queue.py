@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import override
+
+from src.domain.messages import WhatsAppMessage
+from .dispatcher import DispatcherFullError, MessageDispatcher
+
+logger = logging.getLogger(__name__)
+
+MessageHandler = Callable[[WhatsAppMessage], Awaitable[None]]
+
+
+class IngestionQueueFullError(DispatcherFullError):
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        super().__init__(f"Ingestion queue is full ({max_size} messages)")
+
+
+@dataclass
+class IngestionConfig:
+    workers: int = 4
+    max_queue_size: int = 1000
+    shutdown_timeout: float = 30.0
+
+
+@dataclass
+class IngestionStats:
+    queue_depth: int
+    max_queue_size: int
+    workers: int
+    busy_workers: int
+    enqueued: int
+    processed: int
+    failed: int
+    rejected: int
+    last_lag: float
+    max_lag: float
+    avg_lag: float
+
+
+class WebhookIngestionQueue(MessageDispatcher):
+    """
+    Fila assíncrona limitada entre o webhook e o MessageRouter.
+    O endpoint apenas enfileira a mensagem e responde imediatamente; um pool de
+    workers consome a fila em segundo plano.
+    """
+
+    config: IngestionConfig
+    handler: MessageHandler
+
+    def __init__(self, handler: MessageHandler, config: IngestionConfig | None = None):
+        self.handler = handler
+        self.config = config or IngestionConfig()
+        self._queue: asyncio.Queue[tuple[float, WhatsAppMessage]] = asyncio.Queue(maxsize=self.config.max_queue_size)
+        self._workers: list[asyncio.Task[None]] = []
+        self._accepting = False
+        self._busy = 0
+        self._enqueued = 0
+        self._processed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+        self._total_lag = 0.0
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    @override
+    async def start(self) -> None:
+        if self._workers:
+            return
+
+        self._accepting = True
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"webhook-ingestion-{index}")
+            for index in range(self.config.workers)
+        ]
+
+    @override
+    async def stop(self) -> None:
+        """
+        Para de aceitar novas mensagens e aguarda a fila esvaziar (até shutdown_timeout)
+        antes de cancelar os workers.
+        """
+        self._accepting = False
+
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=self.config.shutdown_timeout)
+        except TimeoutError:
+            logger.warning(
+                "Ingestion queue drain timed out",
+                extra={"pending": self._queue.qsize()}
+            )
+
+        for worker in self._workers:
+            _ = worker.cancel()
+        _ = await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    @override
+    def submit(self, message: WhatsAppMessage) -> None:
+        """
+        Enfileira a mensagem sem bloquear.
+        Levanta IngestionQueueFullError se a fila estiver cheia ou em desligamento.
+        """
+        if not self._accepting:
+            self._rejected += 1
+            raise IngestionQueueFullError(self.config.max_queue_size)
+
+        try:
+            self._queue.put_nowait((time.monotonic(), message))
+        except asyncio.QueueFull:
+            self._rejected += 1
+            raise IngestionQueueFullError(self.config.max_queue_size)
+
+        self._enqueued += 1
+
+    @override
+    def stats(self) -> IngestionStats:
+        return IngestionStats(
+            queue_depth=self._queue.qsize(),
+            max_queue_size=self.config.max_queue_size,
+            workers=len(self._workers),
+            busy_workers=self._busy,
+            enqueued=self._enqueued,
+            processed=self._processed,
+            failed=self._failed,
+            rejected=self._rejected,
+            last_lag=self._last_lag,
+            max_lag=self._max_lag,
+            avg_lag=self._total_lag / self._processed if self._processed else 0.0,
+        )
+
+    async def _worker(self) -> None:
+        while True:
+            enqueued_at, message = await self._queue.get()
+            lag = time.monotonic() - enqueued_at
+            self._busy += 1
+
+            try:
+                await self.handler(message)
+            except Exception:
+                self._failed += 1
+                logger.exception(
+                    "Failed to process queued message",
+                    extra={"message_id": str(message.message_id), "sender": message.sender_id}
+                )
+            finally:
+                self._busy -= 1
+                self._processed += 1
+                self._last_lag = lag
+                self._max_lag = max(self._max_lag, lag)
+                self._total_lag += lag
+                self._queue.task_done()
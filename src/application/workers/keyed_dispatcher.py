@@ -0,0 +1,232 @@
+import asyncio
+import logging
+import time
+import zlib
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import override
+
+from src.domain.messages import WhatsAppMessage
+from .dispatcher import DispatcherFullError, MessageDispatcher
+from .ingestion_queue import MessageHandler
+
+logger = logging.getLogger(__name__)
+
+KeyFunction = Callable[[WhatsAppMessage], str]
+BatchPrefetch = Callable[[list[WhatsAppMessage]], Awaitable[None]]
+
+
+class LaneFullError(DispatcherFullError):
+    def __init__(self, lane: int, max_size: int):
+        self.lane = lane
+        self.max_size = max_size
+        super().__init__(f"Dispatcher lane {lane} is full ({max_size} messages)")
+
+
+def conversation_key(message: WhatsAppMessage) -> str:
+    """
+    Chave da conversa: o número do cliente ou o ID do agente que enviou a mensagem.
+    """
+    return message.sender_id
+
+
+@dataclass
+class KeyedDispatcherConfig:
+    lanes: int = 8
+    max_lane_size: int = 200
+    # Mensagens já enfileiradas que uma lane retira de uma vez para o prefetch
+    max_batch_size: int = 50
+    shutdown_timeout: float = 30.0
+
+
+@dataclass
+class LaneStats:
+    lane: int
+    queue_depth: int
+    max_queue_size: int
+    busy: bool
+    processed: int
+    failed: int
+    rejected: int
+    batches: int
+    busy_seconds: float
+    utilisation: float
+    max_lag: float
+
+
+@dataclass
+class KeyedDispatcherStats:
+    lanes: list[LaneStats]
+    queue_depth: int
+    processed: int
+    failed: int
+    rejected: int
+    batches: int
+    utilisation: float
+
+
+class _Lane:
+    def __init__(self, index: int, max_size: int):
+        self.index = index
+        self.queue: asyncio.Queue[tuple[float, WhatsAppMessage]] = asyncio.Queue(maxsize=max_size)
+        self.task: asyncio.Task[None] | None = None
+        self.busy_since: float | None = None
+        self.busy_seconds = 0.0
+        self.processed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.batches = 0
+        self.max_lag = 0.0
+
+
+class KeyedDispatcher(MessageDispatcher):
+    """
+    Distribui as mensagens em N lanes pela chave da conversa.
+    Cada lane tem um único worker, então mensagens da mesma conversa são processadas
+    em ordem FIFO, enquanto conversas diferentes rodam em paralelo em lanes diferentes.
+
+    Com prefetch, o worker retira de uma vez o que já está na fila da lane (até max_batch_size,
+    tipicamente a parte de uma entrega do webhook que caiu nela) e chama prefetch com o lote
+    antes de processar as mensagens, uma a uma e na mesma ordem.
+    """
+
+    config: KeyedDispatcherConfig
+    handler: MessageHandler
+    key: KeyFunction
+    prefetch: BatchPrefetch | None
+
+    def __init__(
+        self,
+        handler: MessageHandler,
+        config: KeyedDispatcherConfig | None = None,
+        key: KeyFunction = conversation_key,
+        prefetch: BatchPrefetch | None = None
+    ):
+        self.handler = handler
+        self.config = config or KeyedDispatcherConfig()
+        self.key = key
+        self.prefetch = prefetch
+        self._lanes = [_Lane(index, self.config.max_lane_size) for index in range(self.config.lanes)]
+        self._accepting = False
+        self._started_at = time.monotonic()
+
+    def lane_for(self, key: str) -> int:
+        # crc32 é estável entre processos, ao contrário de hash()
+        return zlib.crc32(key.encode()) % len(self._lanes)
+
+    @override
+    async def start(self) -> None:
+        if self._accepting:
+            return
+
+        self._accepting = True
+        self._started_at = time.monotonic()
+        for lane in self._lanes:
+            lane.task = asyncio.create_task(self._worker(lane), name=f"dispatcher-lane-{lane.index}")
+
+    @override
+    async def stop(self) -> None:
+        self._accepting = False
+
+        try:
+            _ = await asyncio.wait_for(
+                asyncio.gather(*(lane.queue.join() for lane in self._lanes)),
+                timeout=self.config.shutdown_timeout
+            )
+        except TimeoutError:
+            logger.warning(
+                "Dispatcher drain timed out",
+                extra={"pending": sum(lane.queue.qsize() for lane in self._lanes)}
+            )
+
+        tasks = [lane.task for lane in self._lanes if lane.task is not None]
+        for task in tasks:
+            _ = task.cancel()
+        _ = await asyncio.gather(*tasks, return_exceptions=True)
+        for lane in self._lanes:
+            lane.task = None
+
+    @override
+    def submit(self, message: WhatsAppMessage) -> None:
+        lane = self._lanes[self.lane_for(self.key(message))]
+
+        if not self._accepting:
+            lane.rejected += 1
+            raise LaneFullError(lane.index, self.config.max_lane_size)
+
+        try:
+            lane.queue.put_nowait((time.monotonic(), message))
+        except asyncio.QueueFull:
+            lane.rejected += 1
+            raise LaneFullError(lane.index, self.config.max_lane_size)
+
+    @override
+    def stats(self) -> KeyedDispatcherStats:
+        now = time.monotonic()
+        uptime = max(now - self._started_at, 1e-9)
+        lanes: list[LaneStats] = []
+
+        for lane in self._lanes:
+            busy_seconds = lane.busy_seconds
+            if lane.busy_since is not None:
+                busy_seconds += now - lane.busy_since
+
+            lanes.append(LaneStats(
+                lane=lane.index,
+                queue_depth=lane.queue.qsize(),
+                max_queue_size=self.config.max_lane_size,
+                busy=lane.busy_since is not None,
+                processed=lane.processed,
+                failed=lane.failed,
+                rejected=lane.rejected,
+                batches=lane.batches,
+                busy_seconds=busy_seconds,
+                utilisation=min(busy_seconds / uptime, 1.0),
+                max_lag=lane.max_lag,
+            ))
+
+        return KeyedDispatcherStats(
+            lanes=lanes,
+            queue_depth=sum(lane.queue_depth for lane in lanes),
+            processed=sum(lane.processed for lane in lanes),
+            failed=sum(lane.failed for lane in lanes),
+            rejected=sum(lane.rejected for lane in lanes),
+            batches=sum(lane.batches for lane in lanes),
+            utilisation=sum(lane.utilisation for lane in lanes) / len(lanes) if lanes else 0.0,
+        )
+
+    async def _worker(self, lane: _Lane) -> None:
+        while True:
+            batch = [await lane.queue.get()]
+            while len(batch) < self.config.max_batch_size and not lane.queue.empty():
+                batch.append(lane.queue.get_nowait())
+
+            lane.busy_since = time.monotonic()
+            lane.batches += 1
+            # O primeiro do lote é o que esperou mais
+            lane.max_lag = max(lane.max_lag, lane.busy_since - batch[0][0])
+
+            try:
+                # Uma mensagem sozinha não ganha nada com a busca antecipada
+                if self.prefetch is not None and len(batch) > 1:
+                    try:
+                        await self.prefetch([message for _, message in batch])
+                    except Exception:
+                        # Sem prefetch cada mensagem busca o que precisa
+                        logger.exception("Failed to prefetch dispatched messages", extra={"lane": lane.index, "messages": len(batch)})
+
+                for _, message in batch:
+                    try:
+                        await self.handler(message)
+                    except Exception:
+                        lane.failed += 1
+                        logger.exception(
+                            "Failed to process dispatched message",
+                            extra={"message_id": str(message.message_id), "sender": message.sender_id, "lane": lane.index}
+                        )
+                    finally:
+                        lane.processed += 1
+                        lane.queue.task_done()
+            finally:
+                lane.busy_seconds += time.monotonic() - lane.busy_since
+                lane.busy_since = None
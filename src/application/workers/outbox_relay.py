@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from src.domain.interfaces.messaging import MessageSender
+from src.domain.repositories import OutboxRepository
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class OutboxRelayConfig:
+    batch_size: int = 100
+    poll_interval: float = 0.2
+    lease_seconds: float = 60.0
+    max_attempts: int = 10
+    retry_backoff: float = 2.0
+    max_retry_backoff: float = 300.0
+    # Mensagens enviadas ficam no outbox por este tempo (s), o mesmo da deduplicação de reentregas
+    # do webhook (MessageDeduplicator.retention), e são removidas a cada prune_interval
+    retention: float = 7 * 86_400.0
+    prune_interval: float = 3600.0
+
+
+@dataclass
+class OutboxRelayStats:
+    batches: int
+    sent: int
+    retried: int
+    throttled: int
+    dead: int
+    last_batch_size: int
+    pruned: int
+
+
+class OutboxRelay:
+    """
+    Drena o outbox em lotes pelo MessageSender.
+    A entrega é at-least-once: a mensagem só é marcada como enviada depois do envio,
+    e uma reserva (lease) não confirmada volta para a fila quando expira.
+    """
+
+    outbox: OutboxRepository
+    message_sender: MessageSender
+    config: OutboxRelayConfig
+
+    def __init__(self, outbox: OutboxRepository, message_sender: MessageSender, config: OutboxRelayConfig | None = None):
+        self.outbox = outbox
+        self.message_sender = message_sender
+        self.config = config or OutboxRelayConfig()
+        self._task: asyncio.Task[None] | None = None
+        self._stopping = False
+        self._batches = 0
+        self._sent = 0
+        self._retried = 0
+        self._throttled = 0
+        self._dead = 0
+        self._last_batch_size = 0
+        self._pruned = 0
+        self._last_prune = time.monotonic()
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="outbox-relay")
+
+    async def stop(self) -> None:
+        """
+        Termina o lote em andamento e para o relay.
+        """
+        self._stopping = True
+        if self._task is not None:
+            _ = await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def relay_once(self) -> int:
+        """
+        Reserva e envia um lote. Retorna o tamanho do lote.
+        """
+        batch = await self.outbox.claim_batch(self.config.batch_size, self.config.lease_seconds)
+        self._batches += 1
+        self._last_batch_size = len(batch)
+        if not batch:
+            return 0
+
+        results = await self.message_sender.send_messages([outbox_message.message for outbox_message in batch])
+
+        sent_ids: list[int] = []
+        for outbox_message, result in zip(batch, results):
+            if outbox_message.outbox_id is None:
+                continue
+
+            if result.success:
+                sent_ids.append(outbox_message.outbox_id)
+                continue
+
+            if result.retry_after is not None:
+                # Adiada pelo limite de envio do destinatário: volta quando o limite liberar, sem gastar tentativa
+                self._throttled += 1
+                await self.outbox.defer(
+                    outbox_message.outbox_id,
+                    datetime.now(timezone.utc) + timedelta(seconds=result.retry_after)
+                )
+                continue
+
+            error = result.error or "send failed"
+            if outbox_message.attempts >= self.config.max_attempts:
+                self._dead += 1
+                logger.error(
+                    "Outbox message exhausted its attempts",
+                    extra={"dedup_key": outbox_message.dedup_key, "error": error}
+                )
+                await self.outbox.mark_failed(outbox_message.outbox_id, error, None)
+            else:
+                self._retried += 1
+                delay = min(self.config.retry_backoff ** outbox_message.attempts, self.config.max_retry_backoff)
+                await self.outbox.mark_failed(
+                    outbox_message.outbox_id,
+                    error,
+                    datetime.now(timezone.utc) + timedelta(seconds=delay)
+                )
+
+        await self.outbox.mark_sent(sent_ids)
+        self._sent += len(sent_ids)
+        return len(batch)
+
+    def stats(self) -> OutboxRelayStats:
+        return OutboxRelayStats(
+            batches=self._batches,
+            sent=self._sent,
+            retried=self._retried,
+            throttled=self._throttled,
+            dead=self._dead,
+            last_batch_size=self._last_batch_size,
+            pruned=self._pruned,
+        )
+
+    async def prune(self) -> int:
+        """
+        Remove do outbox as mensagens enviadas há mais de config.retention segundos.
+        """
+        self._last_prune = time.monotonic()
+        removed = await self.outbox.prune(datetime.now(timezone.utc) - timedelta(seconds=self.config.retention))
+        self._pruned += removed
+        if removed:
+            logger.info("Pruned sent outbox messages", extra={"removed": removed})
+        return removed
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                relayed = await self.relay_once()
+            except Exception:
+                logger.exception("Outbox relay batch failed")
+                relayed = 0
+
+            if time.monotonic() - self._last_prune >= self.config.prune_interval:
+                try:
+                    _ = await self.prune()
+                except Exception:
+                    logger.exception("Failed to prune sent outbox messages")
+
+            # Lote cheio indica que ainda há mensagens pendentes: continua sem esperar
+            if relayed < self.config.batch_size:
+                await asyncio.sleep(self.config.poll_interval)
@@ -0,0 +1,174 @@
+import asyncio
+import logging
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from src.domain.agent_registry import AgentAvailabilityRegistry
+from src.domain.entities import Department
+from src.domain.interfaces.messaging import MessageSender
+from src.domain.messages import WhatsAppMessage
+from src.domain.queues import DepartmentQueueService
+from .timer_wheel import TimerWheel
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class NotificationConfig:
+    interval: float = 60.0
+    tick: float = 1.0
+    wheel_slots: int = 512
+
+
+@dataclass
+class NotifierStats:
+    scheduled: int
+    ticks: int
+    due: int
+    sent: int
+    suppressed: int
+    failed: int
+    last_tick_seconds: float
+    max_tick_seconds: float
+
+
+class BusyAgentNotifier:
+    """
+    Notifica periodicamente os agentes ocupados sobre quantos clientes aguardam na fila
+    do departamento. Cada agente ocupado fica agendado em um TimerWheel; a cada tick todos
+    os agentes vencidos são processados em lote, lendo o tamanho da fila em memória.
+    Se a contagem não mudou desde o último aviso ao agente, nada é enviado.
+    """
+
+    registry: AgentAvailabilityRegistry
+    queues: DepartmentQueueService
+    message_sender: MessageSender
+    config: NotificationConfig
+    owns: Callable[[str], bool] | None
+
+    def __init__(
+        self,
+        registry: AgentAvailabilityRegistry,
+        queues: DepartmentQueueService,
+        message_sender: MessageSender,
+        config: NotificationConfig | None = None,
+        owns: Callable[[str], bool] | None = None
+    ):
+        self.registry = registry
+        self.queues = queues
+        self.message_sender = message_sender
+        self.config = config or NotificationConfig()
+        # Em modo multi-processo, cada shard só avisa os agentes que são dele
+        self.owns = owns
+        self.wheel: TimerWheel[str] = TimerWheel(self.config.tick, self.config.wheel_slots)
+        self._last_counts: dict[str, int] = {}
+        self._task: asyncio.Task[None] | None = None
+        self._ticks = 0
+        self._due = 0
+        self._sent = 0
+        self._suppressed = 0
+        self._failed = 0
+        self._last_tick = 0.0
+        self._max_tick = 0.0
+        self.registry.add_listener(self._on_availability_change)
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        self.reschedule()
+        self._task = asyncio.create_task(self._run(), name="busy-agent-notifier")
+
+    def reschedule(self) -> None:
+        """
+        Reagenda todos os agentes ocupados (na inicialização ou quando muda o conjunto de agentes do shard).
+        """
+        for agent_id in list(self._last_counts):
+            if not self._owned(agent_id):
+                _ = self._last_counts.pop(agent_id)
+        for agent_id in self.registry.busy_agents():
+            if self._owned(agent_id) and agent_id not in self.wheel:
+                self.wheel.schedule(agent_id, self.config.interval)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            _ = self._task.cancel()
+            _ = await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def tick(self) -> None:
+        """
+        Avança um tick e envia, em um único lote, os avisos dos agentes vencidos.
+        """
+        started = time.perf_counter()
+        due = self.wheel.advance()
+        notifications: list[WhatsAppMessage] = []
+
+        for agent_id in due:
+            department = self.registry.department_of(agent_id)
+            if department is None or self.registry.is_available(agent_id) or not self._owned(agent_id):
+                continue
+
+            # Continua avisando enquanto o agente estiver ocupado
+            self.wheel.schedule(agent_id, self.config.interval)
+
+            waiting = self.queues.size(department)
+            if waiting == self._last_counts.get(agent_id, 0):
+                self._suppressed += 1
+                continue
+
+            self._last_counts[agent_id] = waiting
+            notifications.append(self._notification(agent_id, department, waiting))
+
+        if notifications:
+            results = await self.message_sender.send_messages(notifications)
+            sent = sum(1 for result in results if result.success)
+            self._sent += sent
+            self._failed += len(results) - sent
+
+        elapsed = time.perf_counter() - started
+        self._ticks += 1
+        self._due += len(due)
+        self._last_tick = elapsed
+        self._max_tick = max(self._max_tick, elapsed)
+
+    def stats(self) -> NotifierStats:
+        return NotifierStats(
+            scheduled=len(self.wheel),
+            ticks=self._ticks,
+            due=self._due,
+            sent=self._sent,
+            suppressed=self._suppressed,
+            failed=self._failed,
+            last_tick_seconds=self._last_tick,
+            max_tick_seconds=self._max_tick,
+        )
+
+    def _notification(self, agent_id: str, department: Department, waiting: int) -> WhatsAppMessage:
+        return WhatsAppMessage.create_system_message(
+            agent_id,
+            f"Clientes aguardando na fila ({department.value}): {waiting}"
+        )
+
+    def _owned(self, agent_id: str) -> bool:
+        return self.owns is None or self.owns(agent_id)
+
+    def _on_availability_change(self, agent_id: str, _department: Department, is_available: bool) -> None:
+        if is_available or not self._owned(agent_id):
+            _ = self.wheel.cancel(agent_id)
+            _ = self._last_counts.pop(agent_id, None)
+        else:
+            self.wheel.schedule(agent_id, self.config.interval)
+
+    async def _run(self) -> None:
+        next_tick = time.monotonic() + self.config.tick
+        while True:
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0))
+            # Se o loop atrasou, processa os ticks perdidos para não desalinhar o wheel
+            while next_tick <= time.monotonic():
+                try:
+                    await self.tick()
+                except Exception:
+                    logger.exception("Busy agent notification tick failed")
+                next_tick += self.config.tick
@@ -0,0 +1,521 @@
+import asyncio
+import logging
+import multiprocessing
+import queue
+from abc import ABC, abstractmethod
+from collections import deque
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from multiprocessing.context import SpawnProcess
+from multiprocessing.queues import Queue
+from typing import override
+
+from src.domain.entities import Customer, Department
+from src.domain.messages import WhatsAppMessage
+from .dispatcher import DispatcherFullError, MessageDispatcher
+from .hash_ring import ConsistentHashRing
+from .keyed_dispatcher import KeyFunction, conversation_key
+
+logger = logging.getLogger(__name__)
+
+# spawn: cada shard começa com um interpretador limpo, sem herdar o event loop nem conexões do pai
+_context = multiprocessing.get_context("spawn")
+
+
+# Mensagens trocadas pelas filas de IPC (serializadas com pickle)
+
+@dataclass
+class IncomingMessage:
+    message: WhatsAppMessage
+
+
+@dataclass
+class CustomerChanged:
+    origin: int
+    customer: Customer
+
+
+@dataclass
+class AgentAvailabilityChanged:
+    origin: int
+    agent_id: str
+    is_available: bool
+
+
+@dataclass
+class RingChanged:
+    nodes: list[int]
+
+
+@dataclass
+class Drain:
+    epoch: int
+
+
+@dataclass
+class ShardReady:
+    shard_id: int
+
+
+@dataclass
+class ShardAck:
+    shard_id: int
+    received: int
+
+
+@dataclass
+class Drained:
+    shard_id: int
+    epoch: int
+
+
+ShardEvent = CustomerChanged | AgentAvailabilityChanged
+
+
+class ShardFullError(DispatcherFullError):
+    def __init__(self, shard_id: int, max_pending: int):
+        self.shard_id = shard_id
+        self.max_pending = max_pending
+        super().__init__(f"Shard {shard_id} is full ({max_pending} pending messages)")
+
+
+class ShardContext:
+    """
+    O que um shard sabe sobre o cluster: quais chaves são suas e como avisar os outros shards
+    sobre mudanças de estado que eles mantêm em memória (caches, filas, registro de agentes).
+    """
+
+    shard_id: int
+    ring: ConsistentHashRing
+
+    def __init__(self, shard_id: int, ring: ConsistentHashRing, events: "Queue[object]"):
+        self.shard_id = shard_id
+        self.ring = ring
+        self._events = events
+        self._applying_remote = False
+
+    def owns(self, key: str) -> bool:
+        return self.ring.node_for(key) == self.shard_id
+
+    def publish_customer(self, customer: Customer) -> None:
+        """Listener de ObservedCustomerRepository"""
+        if not self._applying_remote:
+            self._events.put_nowait(CustomerChanged(self.shard_id, customer))
+
+    def publish_agent_availability(self, agent_id: str, _department: Department, is_available: bool) -> None:
+        """Listener de AgentAvailabilityRegistry"""
+        if not self._applying_remote:
+            self._events.put_nowait(AgentAvailabilityChanged(self.shard_id, agent_id, is_available))
+
+    @contextmanager
+    def applying_remote(self) -> Generator[None, None, None]:
+        # Mudanças vindas de outro shard não são republicadas
+        self._applying_remote = True
+        try:
+            yield
+        finally:
+            self._applying_remote = False
+
+
+class ShardRuntime(ABC):
+    """
+    Os componentes de um processo shard, montados pela ShardFactory dentro do processo filho.
+    """
+
+    dispatcher: MessageDispatcher
+
+    @abstractmethod
+    async def start(self) -> None:
+        pass
+
+    @abstractmethod
+    async def stop(self) -> None:
+        pass
+
+    @abstractmethod
+    def apply(self, event: ShardEvent) -> None:
+        """Aplica ao estado em memória uma mudança feita por outro shard"""
+        pass
+
+    @abstractmethod
+    async def rebalance(self) -> None:
+        """Chamado depois que o anel mudou: descarta/recarrega o estado das chaves que mudaram de dono"""
+        pass
+
+
+# Precisa ser serializável com pickle (função ou classe definida no nível do módulo)
+ShardFactory = Callable[[ShardContext], ShardRuntime]
+
+
+def run_shard(
+    shard_id: int,
+    nodes: list[int],
+    replicas: int,
+    inbox: "Queue[object]",
+    events: "Queue[object]",
+    factory: ShardFactory
+) -> None:
+    """Ponto de entrada do processo shard"""
+    asyncio.run(_serve_shard(shard_id, ConsistentHashRing(nodes, replicas), inbox, events, factory))
+
+
+async def _serve_shard(
+    shard_id: int,
+    ring: ConsistentHashRing,
+    inbox: "Queue[object]",
+    events: "Queue[object]",
+    factory: ShardFactory
+) -> None:
+    context = ShardContext(shard_id, ring, events)
+    runtime = factory(context)
+    await runtime.start()
+    events.put_nowait(ShardReady(shard_id))
+
+    loop = asyncio.get_running_loop()
+    received = 0
+    while True:
+        try:
+            item = inbox.get_nowait()
+        except queue.Empty:
+            # Inbox vazia: confirma o que já foi recebido antes de bloquear esperando a próxima
+            if received:
+                events.put_nowait(ShardAck(shard_id, received))
+                received = 0
+            item = await loop.run_in_executor(None, inbox.get)
+
+        if item is None:
+            break
+
+        if isinstance(item, IncomingMessage):
+            await _submit_with_backpressure(runtime.dispatcher, item.message)
+            received += 1
+            if received >= 64:
+                events.put_nowait(ShardAck(shard_id, received))
+                received = 0
+        elif isinstance(item, CustomerChanged | AgentAvailabilityChanged):
+            with context.applying_remote():
+                runtime.apply(item)
+        elif isinstance(item, Drain):
+            # Processa tudo o que já foi recebido antes de as chaves mudarem de dono
+            await runtime.dispatcher.stop()
+            await runtime.dispatcher.start()
+            events.put_nowait(Drained(shard_id, item.epoch))
+        elif isinstance(item, RingChanged):
+            context.ring = ConsistentHashRing(item.nodes, ring.replicas)
+            await runtime.rebalance()
+
+    if received:
+        events.put_nowait(ShardAck(shard_id, received))
+    await runtime.stop()
+
+
+async def _submit_with_backpressure(dispatcher: MessageDispatcher, message: WhatsAppMessage) -> None:
+    # O supervisor já respondeu ao Meta; em vez de descartar, espera vaga na lane local.
+    # Enquanto isso a inbox não é lida, e o limite de pendentes do supervisor passa a recusar (503)
+    while True:
+        try:
+            dispatcher.submit(message)
+            return
+        except DispatcherFullError:
+            await asyncio.sleep(0.01)
+
+
+@dataclass
+class ShardingConfig:
+    workers: int = 4
+    max_pending_per_shard: int = 1000
+    replicas: int = 128
+    start_timeout: float = 60.0
+    drain_timeout: float = 60.0
+    monitor_interval: float = 1.0
+
+
+@dataclass
+class ShardStats:
+    shard_id: int
+    pid: int | None
+    alive: bool
+    pending: int
+    submitted: int
+    rejected: int
+    restarts: int
+    dropped: int
+
+
+@dataclass
+class ShardSupervisorStats:
+    workers: int
+    pending: int
+    buffered: int
+    submitted: int
+    rejected: int
+    forwarded_events: int
+    rebalances: int
+    shards: list[ShardStats] = field(default_factory=list)
+
+
+class _Shard:
+    def __init__(self, shard_id: int):
+        self.shard_id = shard_id
+        self.inbox: Queue[object] = _context.Queue()
+        self.process: SpawnProcess | None = None
+        self.ready = asyncio.Event()
+        self.drained = asyncio.Event()
+        self.pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.restarts = 0
+        # Mensagens perdidas com processos que morreram: já lidas da inbox e sem ack (limite inferior)
+        self.dropped = 0
+        self.stopping = False
+
+
+class ShardSupervisor(MessageDispatcher):
+    """
+    Modo multi-processo: N processos shard, cada um com seu próprio MessageRouter, caches, filas
+    e dispatcher, dono de uma fatia do anel de hash consistente de customer_id/agent_id.
+    O supervisor roda no processo do webhook e só encaminha cada mensagem ao shard dono da conversa.
+    Mudanças de estado em memória (cliente gravado, disponibilidade de agente) são repassadas
+    pelo supervisor aos demais shards, então um agente do shard A pode atender um cliente do shard B.
+    Shards que morrem são reiniciados; resize() muda o número de shards drenando antes as mensagens
+    em andamento, para que a ordem por conversa se mantenha quando uma chave muda de dono.
+    """
+
+    factory: ShardFactory
+    config: ShardingConfig
+    key: KeyFunction
+
+    def __init__(self, factory: ShardFactory, config: ShardingConfig | None = None, key: KeyFunction = conversation_key):
+        self.factory = factory
+        self.config = config or ShardingConfig()
+        self.key = key
+        self.ring = ConsistentHashRing(replicas=self.config.replicas)
+        self._shards: dict[int, _Shard] = {}
+        self._events: Queue[object] = _context.Queue()
+        self._buffer: deque[WhatsAppMessage] = deque()
+        self._paused = False
+        self._accepting = False
+        self._epoch = 0
+        self._forwarded = 0
+        self._rebalances = 0
+        self._pump: asyncio.Task[None] | None = None
+        self._monitor: asyncio.Task[None] | None = None
+
+    @override
+    async def start(self) -> None:
+        if self._accepting:
+            return
+
+        self._pump = asyncio.create_task(self._pump_events(), name="shard-event-pump")
+        for shard_id in range(self.config.workers):
+            self.ring.add_node(shard_id)
+        for shard_id in range(self.config.workers):
+            self._spawn(_Shard(shard_id))
+        await self._wait_ready(list(self._shards.values()))
+
+        self._accepting = True
+        self._monitor = asyncio.create_task(self._monitor_shards(), name="shard-monitor")
+
+    @override
+    async def stop(self) -> None:
+        self._accepting = False
+        if self._monitor is not None:
+            _ = self._monitor.cancel()
+            _ = await asyncio.gather(self._monitor, return_exceptions=True)
+            self._monitor = None
+
+        await self._stop_shards(list(self._shards.values()))
+        self._shards.clear()
+
+        if self._pump is not None:
+            self._events.put_nowait(None)
+            _ = await asyncio.gather(self._pump, return_exceptions=True)
+            self._pump = None
+
+    @override
+    def submit(self, message: WhatsAppMessage) -> None:
+        if not self._accepting:
+            raise DispatcherFullError("Shard supervisor is not accepting messages")
+
+        if self._paused:
+            # Rebalanceando: segura as mensagens até o novo anel valer
+            if len(self._buffer) >= self.config.max_pending_per_shard * max(len(self._shards), 1):
+                raise DispatcherFullError("Shard supervisor is rebalancing")
+            self._buffer.append(message)
+            return
+
+        shard = self._shards[self.ring.node_for(self.key(message))]
+        if shard.pending >= self.config.max_pending_per_shard:
+            shard.rejected += 1
+            raise ShardFullError(shard.shard_id, self.config.max_pending_per_shard)
+
+        shard.inbox.put_nowait(IncomingMessage(message))
+        shard.pending += 1
+        shard.submitted += 1
+
+    async def resize(self, workers: int) -> None:
+        """
+        Muda o número de shards. Com hash consistente só ~1/N das conversas trocam de shard;
+        antes disso todos os shards drenam o que já receberam.
+        """
+        if workers < 1:
+            raise ValueError("At least one shard is required")
+        if workers == len(self._shards):
+            return
+
+        self._paused = True
+        try:
+            await self._drain_all()
+
+            current = sorted(self._shards)
+            added = [_Shard(shard_id) for shard_id in range(len(current), workers)]
+            removed = [self._shards[shard_id] for shard_id in current[workers:]]
+
+            for shard in removed:
+                self.ring.remove_node(shard.shard_id)
+                del self._shards[shard.shard_id]
+            for shard in added:
+                self.ring.add_node(shard.shard_id)
+
+            await self._stop_shards(removed)
+            for shard in self._shards.values():
+                shard.inbox.put_nowait(RingChanged(self.ring.nodes))
+            for shard in added:
+                self._spawn(shard)
+            await self._wait_ready(added)
+
+            self.config.workers = workers
+            self._rebalances += 1
+            logger.info("Shards rebalanced", extra={"workers": workers})
+        finally:
+            self._paused = False
+            buffered, self._buffer = self._buffer, deque()
+            for message in buffered:
+                try:
+                    self.submit(message)
+                except DispatcherFullError:
+                    logger.error("Dropping message buffered during rebalance", extra={"sender": message.sender_id})
+
+    @override
+    def stats(self) -> ShardSupervisorStats:
+        shards = [
+            ShardStats(
+                shard_id=shard.shard_id,
+                pid=shard.process.pid if shard.process else None,
+                alive=shard.process is not None and shard.process.is_alive(),
+                pending=shard.pending,
+                submitted=shard.submitted,
+                rejected=shard.rejected,
+                restarts=shard.restarts,
+                dropped=shard.dropped,
+            )
+            for shard in sorted(self._shards.values(), key=lambda shard: shard.shard_id)
+        ]
+        return ShardSupervisorStats(
+            workers=len(shards),
+            pending=sum(shard.pending for shard in shards),
+            buffered=len(self._buffer),
+            submitted=sum(shard.submitted for shard in shards),
+            rejected=sum(shard.rejected for shard in shards),
+            forwarded_events=self._forwarded,
+            rebalances=self._rebalances,
+            shards=shards,
+        )
+
+    def _spawn(self, shard: _Shard) -> None:
+        shard.ready.clear()
+        shard.process = _context.Process(
+            target=run_shard,
+            args=(shard.shard_id, self.ring.nodes, self.config.replicas, shard.inbox, self._events, self.factory),
+            name=f"shard-{shard.shard_id}",
+            daemon=True
+        )
+        shard.process.start()
+        self._shards[shard.shard_id] = shard
+
+    async def _wait_ready(self, shards: list[_Shard]) -> None:
+        _ = await asyncio.wait_for(
+            asyncio.gather(*(shard.ready.wait() for shard in shards)),
+            timeout=self.config.start_timeout
+        )
+
+    async def _drain_all(self) -> None:
+        self._epoch += 1
+        shards = list(self._shards.values())
+        for shard in shards:
+            shard.drained.clear()
+            shard.inbox.put_nowait(Drain(self._epoch))
+        _ = await asyncio.wait_for(
+            asyncio.gather(*(shard.drained.wait() for shard in shards)),
+            timeout=self.config.drain_timeout
+        )
+
+    async def _stop_shards(self, shards: list[_Shard]) -> None:
+        loop = asyncio.get_running_loop()
+        for shard in shards:
+            shard.stopping = True
+            shard.inbox.put_nowait(None)
+
+        for shard in shards:
+            process = shard.process
+            if process is None:
+                continue
+            await loop.run_in_executor(None, process.join, self.config.drain_timeout)
+            if process.is_alive():
+                logger.warning("Shard did not stop in time, terminating", extra={"shard": shard.shard_id})
+                process.terminate()
+
+    async def _pump_events(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            event = await loop.run_in_executor(None, self._events.get)
+            if event is None:
+                return
+
+            if isinstance(event, ShardAck):
+                shard = self._shards.get(event.shard_id)
+                if shard is not None:
+                    shard.pending = max(shard.pending - event.received, 0)
+            elif isinstance(event, CustomerChanged | AgentAvailabilityChanged):
+                for shard in self._shards.values():
+                    if shard.shard_id != event.origin and not shard.stopping:
+                        shard.inbox.put_nowait(event)
+                        self._forwarded += 1
+            elif isinstance(event, ShardReady):
+                shard = self._shards.get(event.shard_id)
+                if shard is not None:
+                    shard.ready.set()
+            elif isinstance(event, Drained):
+                shard = self._shards.get(event.shard_id)
+                if shard is not None and event.epoch == self._epoch:
+                    shard.drained.set()
+
+    async def _monitor_shards(self) -> None:
+        while True:
+            await asyncio.sleep(self.config.monitor_interval)
+            for shard in list(self._shards.values()):
+                if shard.stopping or shard.process is None or shard.process.is_alive():
+                    continue
+
+                # A inbox continua no supervisor: o novo processo retoma as mensagens ainda não lidas.
+                # As que já estavam no dispatcher do processo morto se perdem. A inbox também leva
+                # eventos de estado, então o que sobra nela limita as pendentes, mas não as conta exatamente
+                try:
+                    unread = min(shard.pending, shard.inbox.qsize())
+                except NotImplementedError:
+                    # macOS não implementa qsize(): mantém a contagem, no máximo recusa cedo demais
+                    unread = shard.pending
+                lost = shard.pending - unread
+                logger.error(
+                    "Shard died, restarting",
+                    extra={"shard": shard.shard_id, "exitcode": shard.process.exitcode, "unread": unread, "dropped": lost}
+                )
+                shard.restarts += 1
+                shard.dropped += lost
+                shard.pending = unread
+                self._spawn(shard)
+                try:
+                    await self._wait_ready([shard])
+                except TimeoutError:
+                    logger.error("Restarted shard did not become ready", extra={"shard": shard.shard_id})
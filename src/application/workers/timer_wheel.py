@@ -0,0 +1,66 @@
+import math
+from collections.abc import Hashable
+from typing import Generic, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+
+
+class TimerWheel(Generic[K]):
+    """
+    Timer wheel com hash: `slots` posições de `tick` segundos cada.
+    Agendar e cancelar são O(1); cada advance() visita uma única posição e devolve
+    de uma vez todas as chaves vencidas nela. Atrasos maiores que uma volta completa
+    guardam quantas voltas ainda faltam.
+    """
+
+    tick: float
+    slots: int
+
+    def __init__(self, tick: float, slots: int = 512):
+        self.tick = tick
+        self.slots = slots
+        self._wheel: list[dict[K, int]] = [{} for _ in range(slots)]
+        self._positions: dict[K, int] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._positions
+
+    def schedule(self, key: K, delay: float) -> None:
+        """
+        Agenda `key` para daqui a `delay` segundos (arredondado para cima em ticks).
+        Reagendar uma chave substitui o agendamento anterior.
+        """
+        _ = self.cancel(key)
+        ticks = max(1, math.ceil(delay / self.tick))
+        slot = (self._cursor + ticks) % self.slots
+        self._wheel[slot][key] = (ticks - 1) // self.slots
+        self._positions[key] = slot
+
+    def cancel(self, key: K) -> bool:
+        slot = self._positions.pop(key, None)
+        if slot is None:
+            return False
+        del self._wheel[slot][key]
+        return True
+
+    def advance(self) -> list[K]:
+        """
+        Avança um tick e retorna as chaves que venceram.
+        """
+        self._cursor = (self._cursor + 1) % self.slots
+        bucket = self._wheel[self._cursor]
+        due: list[K] = []
+
+        for key, rounds in list(bucket.items()):
+            if rounds == 0:
+                del bucket[key]
+                del self._positions[key]
+                due.append(key)
+            else:
+                bucket[key] = rounds - 1
+
+        return due
@@ -0,0 +1,77 @@
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from .entities import Agent, Department
+from .repositories import AgentRepository
+
+AvailabilityListener = Callable[[str, Department, bool], None]
+
+
+@dataclass
+class AgentRegistryStats:
+    ready: dict[str, int]
+    busy: int
+
+
+class AgentAvailabilityRegistry:
+    """
+    Agentes disponíveis por departamento, mantidos em memória.
+    O atendimento começa pelo próprio agente (/proximo), então o registro não escolhe agentes:
+    ele responde em O(1) quem está livre ou ocupado (BusyAgentNotifier, sincronização entre shards).
+    """
+
+    def __init__(self):
+        self._ready: dict[Department, set[str]] = {department: set() for department in Department}
+        self._departments: dict[str, Department] = {}
+        self._listeners: list[AvailabilityListener] = []
+
+    def add_listener(self, listener: AvailabilityListener) -> None:
+        """
+        Recebe (agent_id, department, is_available) a cada mudança de disponibilidade.
+        """
+        self._listeners.append(listener)
+
+    async def rebuild(self, agent_repo: AgentRepository) -> None:
+        for ready in self._ready.values():
+            ready.clear()
+        self._departments.clear()
+
+        for agent in await agent_repo.list_agents():
+            self.register(agent)
+
+    def register(self, agent: Agent) -> None:
+        self._departments[agent.agent_id] = agent.department
+        self.set_available(agent.agent_id, agent.is_available and agent.current_customer_id is None)
+
+    def knows(self, agent_id: str) -> bool:
+        return agent_id in self._departments
+
+    def set_available(self, agent_id: str, is_available: bool) -> None:
+        department = self._departments.get(agent_id)
+        if department is None:
+            return
+
+        ready = self._ready[department]
+        was_available = agent_id in ready
+        if is_available:
+            ready.add(agent_id)
+        else:
+            ready.discard(agent_id)
+
+        if was_available != is_available:
+            for listener in self._listeners:
+                listener(agent_id, department, is_available)
+
+    def is_available(self, agent_id: str) -> bool:
+        department = self._departments.get(agent_id)
+        return department is not None and agent_id in self._ready[department]
+
+    def department_of(self, agent_id: str) -> Department | None:
+        return self._departments.get(agent_id)
+
+    def busy_agents(self) -> list[str]:
+        return [agent_id for agent_id, department in self._departments.items() if agent_id not in self._ready[department]]
+
+    def stats(self) -> AgentRegistryStats:
+        ready = {department.value: len(agents) for department, agents in self._ready.items()}
+        return AgentRegistryStats(ready=ready, busy=len(self._departments) - sum(ready.values()))
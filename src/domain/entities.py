@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 
 
@@ -25,6 +25,14 @@ class Customer:
     last_interaction: datetime | None = None
     conversation_expiration: int = 3600
 
+    def expires_at(self) -> datetime | None:
+        """
+        Momento em que a conversa expira por inatividade (None se o cliente nunca interagiu).
+        """
+        if self.last_interaction is None:
+            return None
+        return self.last_interaction + timedelta(seconds=self.conversation_expiration)
+
 
 @dataclass
 class Agent:
@@ -1,12 +1,65 @@
+import asyncio
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
 
 from src.domain.messages import WhatsAppMessage
 
+
+class SendThrottledError(Exception):
+    """
+    O envio não foi tentado para não segurar quem chamou esperando o limite de envio:
+    pode ser repetido depois de `retry_after` segundos.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        self.retry_after = retry_after
+        super().__init__(message)
+
+
+@dataclass
+class SendResult:
+    message: WhatsAppMessage
+    success: bool
+    error: str | None = None
+    # Preenchido quando o envio foi adiado pelo limite de envio (SendThrottledError)
+    retry_after: float | None = None
+
+
 class MessageSender(ABC):
+    max_concurrency: int = 8
+
     @abstractmethod
     async def send_message(self, message: WhatsAppMessage) -> bool:
         """
         Envia uma mensagem via WhatsApp.
         Retorna True se enviado com sucesso, False caso contrário.
         """
-        pass
\ No newline at end of file
+        pass
+
+    async def send_messages(self, messages: list[WhatsAppMessage]) -> list[SendResult]:
+        """
+        Envia um lote de mensagens em paralelo, limitado a max_concurrency envios simultâneos.
+        Mensagens para o mesmo destinatário são enviadas em ordem, uma após a outra.
+        Retorna um resultado por mensagem, na mesma ordem do lote.
+        """
+        results: list[SendResult | None] = [None] * len(messages)
+        by_recipient: dict[str, list[int]] = {}
+        for index, message in enumerate(messages):
+            by_recipient.setdefault(message.recipient_id, []).append(index)
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def send_in_order(indexes: list[int]) -> None:
+            for index in indexes:
+                message = messages[index]
+                async with semaphore:
+                    try:
+                        results[index] = SendResult(message, await self.send_message(message))
+                    except SendThrottledError as e:
+                        results[index] = SendResult(message, False, str(e), e.retry_after)
+                    except Exception as e:
+                        results[index] = SendResult(message, False, str(e))
+
+        _ = await asyncio.gather(*(send_in_order(indexes) for indexes in by_recipient.values()))
+
+        return [result for result in results if result is not None]
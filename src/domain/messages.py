@@ -1,7 +1,8 @@
-from dataclasses import dataclass
+import random
+from dataclasses import dataclass, field
 from datetime import datetime
 from enum import Enum
-from uuid import UUID, uuid4
+from uuid import UUID
 
 class MessageType(Enum):
     TEXT = "text"
@@ -12,7 +13,15 @@ class MessageType(Enum):
     BUTTON_RESPONSE = "button_response"
 
 
-@dataclass
+def new_message_id() -> UUID:
+    """
+    UUID v4 gerado pelo módulo random, sem a leitura de os.urandom do uuid4().
+    Os ids só precisam ser únicos, não imprevisíveis, e o random é semeado de novo em cada fork.
+    """
+    return UUID(int=random.getrandbits(128), version=4)
+
+
+@dataclass(slots=True)
 class WhatsAppMessage:
     message_id: UUID
     sender_id: str
@@ -20,16 +29,54 @@ class WhatsAppMessage:
     content: str
     message_type: MessageType
     timestamp: datetime
-    metadata: dict[str, object] = {}
+    metadata: dict[str, object] = field(default_factory=dict)
+    # wamid da mensagem na Cloud API, quando ela veio de um webhook
+    external_id: str | None = None
     
     @staticmethod
     def create_system_message(recipient_id: str, content: str) -> 'WhatsAppMessage':
         return WhatsAppMessage(
-            message_id=uuid4(),
+            message_id=new_message_id(),
             sender_id="SYSTEM",
             recipient_id=recipient_id,
             content=content,
             message_type=MessageType.TEXT,
             timestamp=datetime.now()
         )
-    
\ No newline at end of file
+
+
+class DeliveryStatus(Enum):
+    SENT = "sent"
+    DELIVERED = "delivered"
+    READ = "read"
+    FAILED = "failed"
+
+
+@dataclass
+class MessageStatusEvent:
+    """
+    Atualização de status de uma mensagem enviada por nós, recebida pelo webhook.
+    """
+    external_id: str
+    recipient_id: str
+    status: DeliveryStatus
+    timestamp: datetime
+    error: str | None = None
+
+
+class OutboxStatus(Enum):
+    PENDING = "pending"
+    SENT = "sent"
+    FAILED = "failed"
+
+
+@dataclass
+class OutboxMessage:
+    """
+    Mensagem de saída persistida no outbox até ser entregue pelo relay.
+    A dedup_key impede que a mesma resposta seja gravada duas vezes.
+    """
+    dedup_key: str
+    message: WhatsAppMessage
+    outbox_id: int | None = None
+    attempts: int = 0
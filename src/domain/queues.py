@@ -0,0 +1,164 @@
+import heapq
+import itertools
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from .entities import Customer, CustomerStatus, Department
+from .repositories import CustomerRepository
+
+
+class _QueueEntry:
+    __slots__ = ("waiting_since", "sequence", "customer_id", "active")
+
+    def __init__(self, waiting_since: float, sequence: int, customer_id: str):
+        self.waiting_since = waiting_since
+        self.sequence = sequence
+        self.customer_id = customer_id
+        self.active = True
+
+    def __lt__(self, other: "_QueueEntry") -> bool:
+        return (self.waiting_since, self.sequence) < (other.waiting_since, other.sequence)
+
+
+class DepartmentQueue:
+    """
+    Fila de espera de um departamento ordenada por waiting_since.
+    Heap para enfileirar/retirar em O(log n) e índice por cliente para remoção em O(1):
+    a entrada removida só é marcada como inativa e descartada quando chega ao topo do heap.
+    """
+
+    def __init__(self):
+        self._heap: list[_QueueEntry] = []
+        self._index: dict[str, _QueueEntry] = {}
+        self._sequence = itertools.count()
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, customer_id: str) -> bool:
+        return customer_id in self._index
+
+    def push(self, customer_id: str, waiting_since: datetime) -> None:
+        """
+        Enfileira o cliente. Se ele já estiver na fila, apenas atualiza o horário de entrada.
+        """
+        current = self._index.get(customer_id)
+        timestamp = waiting_since.timestamp()
+        if current is not None:
+            if current.waiting_since == timestamp:
+                return
+            current.active = False
+
+        entry = _QueueEntry(timestamp, next(self._sequence), customer_id)
+        self._index[customer_id] = entry
+        heapq.heappush(self._heap, entry)
+
+    def remove(self, customer_id: str) -> bool:
+        entry = self._index.pop(customer_id, None)
+        if entry is None:
+            return False
+
+        entry.active = False
+        self._compact()
+        return True
+
+    def peek(self) -> str | None:
+        self._discard_inactive()
+        return self._heap[0].customer_id if self._heap else None
+
+    def ordered(self) -> list[str]:
+        """
+        Clientes da fila, do que espera há mais tempo para o mais novo. O(n log n).
+        """
+        return [entry.customer_id for entry in sorted(self._index.values())]
+
+    def pop(self) -> str | None:
+        self._discard_inactive()
+        if not self._heap:
+            return None
+
+        entry = heapq.heappop(self._heap)
+        del self._index[entry.customer_id]
+        return entry.customer_id
+
+    def _discard_inactive(self) -> None:
+        while self._heap and not self._heap[0].active:
+            _ = heapq.heappop(self._heap)
+
+    def _compact(self) -> None:
+        # Evita que entradas removidas acumulem no heap quando saem do meio da fila
+        if len(self._heap) > 64 and len(self._heap) > 2 * len(self._index):
+            self._heap = [entry for entry in self._heap if entry.active]
+            heapq.heapify(self._heap)
+
+
+@dataclass
+class QueueStats:
+    sizes: dict[str, int]
+    total: int
+
+
+class DepartmentQueueService:
+    """
+    Filas de espera em memória por departamento.
+    É reconstruída a partir do banco na inicialização e acompanha as escritas de clientes
+    via observe(), o que permite responder /fila e notificações de fila em O(1).
+    """
+
+    def __init__(self):
+        self._queues: dict[Department, DepartmentQueue] = {department: DepartmentQueue() for department in Department}
+        self._departments: dict[str, Department] = {}
+
+    async def rebuild(self, customer_repo: CustomerRepository) -> None:
+        for department in Department:
+            queue = DepartmentQueue()
+            for customer in await customer_repo.get_waiting_customers(department):
+                queue.push(customer.customer_id, customer.waiting_since or datetime.now(timezone.utc))
+                self._departments[customer.customer_id] = department
+            self._queues[department] = queue
+
+    def observe(self, customer: Customer) -> None:
+        """
+        Atualiza as filas com o novo estado do cliente.
+        Só ficam na fila clientes WAITING que já escolheram um departamento.
+        """
+        if customer.status == CustomerStatus.WAITING and customer.department is not None:
+            previous = self._departments.get(customer.customer_id)
+            if previous is not None and previous != customer.department:
+                _ = self._queues[previous].remove(customer.customer_id)
+
+            self._queues[customer.department].push(
+                customer.customer_id,
+                customer.waiting_since or datetime.now(timezone.utc)
+            )
+            self._departments[customer.customer_id] = customer.department
+        else:
+            _ = self.remove(customer.customer_id)
+
+    def remove(self, customer_id: str) -> bool:
+        department = self._departments.pop(customer_id, None)
+        if department is None:
+            return False
+        return self._queues[department].remove(customer_id)
+
+    def claim(self, department: Department) -> str | None:
+        customer_id = self._queues[department].pop()
+        if customer_id is not None:
+            del self._departments[customer_id]
+        return customer_id
+
+    def peek(self, department: Department) -> str | None:
+        return self._queues[department].peek()
+
+    def waiting(self, department: Department) -> list[str]:
+        return self._queues[department].ordered()
+
+    def size(self, department: Department) -> int:
+        return len(self._queues[department])
+
+    def department_of(self, customer_id: str) -> Department | None:
+        return self._departments.get(customer_id)
+
+    def stats(self) -> QueueStats:
+        sizes = {department.value: len(queue) for department, queue in self._queues.items()}
+        return QueueStats(sizes=sizes, total=sum(sizes.values()))
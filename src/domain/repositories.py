@@ -1,6 +1,8 @@
 from abc import ABC, abstractmethod
+from datetime import datetime
 
 from .entities import Agent, Customer, Department
+from .messages import OutboxMessage
 
 
 class CustomerRepository(ABC):
@@ -11,11 +13,65 @@ class CustomerRepository(ABC):
     @abstractmethod
     async def get(self, customer_id: str) -> Customer | None:
         pass
+
+    @abstractmethod
+    async def get_many(self, customer_ids: list[str]) -> dict[str, Customer]:
+        """
+        Busca vários clientes de uma vez. IDs inexistentes ficam fora do resultado.
+        """
+        pass
     
     @abstractmethod
     async def update(self, customer: Customer) -> None:
         pass
 
+    @abstractmethod
+    async def update_many(self, customers: list[Customer]) -> None:
+        """
+        Grava vários clientes de uma vez (insere os que ainda não existem).
+        """
+        pass
+
+    @abstractmethod
+    async def touch_last_interaction(self, customer_id: str, now: datetime) -> Customer | None:
+        """
+        Grava só last_interaction, sem regravar status e agente a partir de uma cópia possivelmente
+        desatualizada (ex.: o cache de um shard, enquanto outro shard faz o claim ou encerra o atendimento).
+        Retorna o cliente como ficou gravado, ou None se ele não existir.
+        """
+        pass
+
+    @abstractmethod
+    async def get_waiting_customers(self, department: Department) -> list[Customer]:
+        """
+        Clientes aguardando no departamento, do mais antigo para o mais novo.
+        """
+        pass
+
+    @abstractmethod
+    async def claim_next_waiting(self, department: Department, agent_id: str) -> Customer | None:
+        """
+        Retira atomicamente da fila o cliente que espera há mais tempo no departamento
+        e o coloca em atendimento com o agente. Agentes concorrentes nunca recebem o mesmo cliente.
+        """
+        pass
+
+    @abstractmethod
+    async def list_active_customers(self) -> list[Customer]:
+        """
+        Clientes com conversa em andamento (qualquer status diferente de FINISHED).
+        """
+        pass
+
+    @abstractmethod
+    async def expire_conversations(self, customer_ids: list[str], now: datetime) -> list[Customer]:
+        """
+        Encerra em lote as conversas dos clientes informados cujo prazo de expiração já passou em `now`.
+        Clientes que voltaram a interagir ou já foram encerrados são ignorados.
+        Retorna os clientes efetivamente encerrados.
+        """
+        pass
+
 class AgentRepository(ABC):
     @abstractmethod
     async def get_available_agent(self, department: Department) -> Agent | None:
@@ -24,7 +80,109 @@ class AgentRepository(ABC):
     @abstractmethod
     async def update_agent_status(self, agent_id: str, is_available: bool, current_customer_id: str | None = None) -> None:
         pass
+
+    @abstractmethod
+    async def update_agents_status(self, agent_ids: list[str], is_available: bool) -> list[str]:
+        """
+        Muda a disponibilidade de vários agentes de uma vez (ex.: início ou fim de turno),
+        sem cliente em atendimento. Retorna os IDs dos agentes atualizados.
+        """
+        pass
+
+    @abstractmethod
+    async def update_many(self, agents: list[Agent]) -> None:
+        """
+        Grava disponibilidade e cliente atual de vários agentes de uma vez.
+        """
+        pass
     
     @abstractmethod
     async def get_by_id(self, agent_id: str) -> Agent | None:
-        pass
\ No newline at end of file
+        pass
+
+    @abstractmethod
+    async def get_many(self, agent_ids: list[str]) -> dict[str, Agent]:
+        """
+        Busca vários agentes de uma vez. IDs inexistentes ficam fora do resultado.
+        """
+        pass
+
+    @abstractmethod
+    async def list_agents(self) -> list[Agent]:
+        pass
+
+    @abstractmethod
+    async def release_agents(self, customer_ids: list[str]) -> list[str]:
+        """
+        Libera, em lote, os agentes que atendem algum dos clientes informados.
+        Retorna os IDs dos agentes liberados.
+        """
+        pass
+
+class OutboxRepository(ABC):
+    @abstractmethod
+    async def add_many(self, messages: list[OutboxMessage]) -> int:
+        """
+        Grava as mensagens no outbox, ignorando dedup_keys já existentes.
+        Retorna quantas mensagens foram realmente gravadas.
+        """
+        pass
+
+    @abstractmethod
+    async def claim_batch(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        """
+        Reserva até `limit` mensagens pendentes por `lease_seconds`.
+        Se o relay cair antes de confirmar o envio, elas voltam a ficar disponíveis depois do lease.
+        """
+        pass
+
+    @abstractmethod
+    async def mark_sent(self, outbox_ids: list[int]) -> None:
+        pass
+
+    @abstractmethod
+    async def mark_failed(self, outbox_id: int, error: str, retry_at: datetime | None) -> None:
+        """
+        Registra a falha. Com retry_at a mensagem volta para a fila nesse horário;
+        sem retry_at ela é descartada definitivamente.
+        """
+        pass
+
+    @abstractmethod
+    async def defer(self, outbox_id: int, retry_at: datetime) -> None:
+        """
+        Devolve uma mensagem reservada que não chegou a ser enviada (limite de envio)
+        para a fila em retry_at, sem contar a tentativa.
+        """
+        pass
+
+    @abstractmethod
+    async def prune(self, older_than: datetime) -> int:
+        """
+        Remove as mensagens enviadas antes de `older_than`. Pendentes e descartadas ficam.
+        Retorna quantas foram removidas.
+        """
+        pass
+
+class ProcessedMessageRepository(ABC):
+    @abstractmethod
+    async def claim(self, external_ids: list[str]) -> set[str]:
+        """
+        Registra atomicamente os IDs de mensagens recebidas.
+        Retorna apenas os que ainda não tinham sido registrados (por este ou outro worker).
+        """
+        pass
+
+    @abstractmethod
+    async def release(self, external_ids: list[str]) -> None:
+        """
+        Desfaz o registro, para que uma reentrega da mensagem volte a ser processada.
+        """
+        pass
+
+    @abstractmethod
+    async def prune(self, older_than: datetime) -> int:
+        """
+        Remove os registros anteriores a `older_than`. Retorna quantos foram removidos.
+        """
+        pass
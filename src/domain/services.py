@@ -1,27 +1,56 @@
-from datetime import datetime, timedelta
-from uuid import uuid4
+import logging
+from collections.abc import Callable
+from contextlib import AbstractAsyncContextManager, AbstractContextManager, nullcontext
+from datetime import datetime, timezone
 
 from .interfaces.messaging import MessageSender
 from .entities import Customer, CustomerStatus
-from .messages import WhatsAppMessage
-from .repositories import CustomerRepository, AgentRepository
+from .messages import OutboxMessage, WhatsAppMessage, new_message_id
+from .queues import DepartmentQueueService
+from .repositories import CustomerRepository, AgentRepository, OutboxRepository
+from .unit_of_work import UnitOfWork
+
+logger = logging.getLogger(__name__)
+
+
+def is_agent(sender_id: str) -> bool:
+    return sender_id.startswith("AGENT_")
+
 
 class MessageRouter:
     customer_repo: CustomerRepository
     agent_repo: AgentRepository
     message_sender: MessageSender
+    outbox: OutboxRepository | None
+    unit_of_work: Callable[[], UnitOfWork] | None
+    queues: DepartmentQueueService | None
+    span: Callable[[str], AbstractContextManager[None]] | None
 
-    def __init__(self, customer_repo: CustomerRepository, agent_repo: AgentRepository, message_sender: MessageSender):
+    def __init__(
+        self,
+        customer_repo: CustomerRepository,
+        agent_repo: AgentRepository,
+        message_sender: MessageSender,
+        outbox: OutboxRepository | None = None,
+        unit_of_work: Callable[[], UnitOfWork] | None = None,
+        queues: DepartmentQueueService | None = None,
+        span: Callable[[str], AbstractContextManager[None]] | None = None
+    ):
         self.customer_repo = customer_repo
         self.agent_repo = agent_repo
         self.message_sender = message_sender
+        self.outbox = outbox
+        self.unit_of_work = unit_of_work
+        self.queues = queues
+        # Mede uma etapa do processamento pelo nome (ex.: Metrics.span); sem ele nada é medido
+        self.span = span
     
     async def route_message(self, message: WhatsAppMessage) -> list[WhatsAppMessage]:
         """
         Rota as mensagens entre cliente, sistema e agente.
         Retorna uma lista de mensagens que precisam ser enviadas como resposta.
         """
-        if message.sender_id.startswith("AGENT_"):
+        if is_agent(message.sender_id):
             return await self._handle_agent_message(message)
         else:
             return await self._handle_customer_message(message)
@@ -32,16 +61,21 @@ class MessageRouter:
         
         if not customer:
             # Novo cliente
-            return self._send_welcome_menu(message.sender_id)
+            return await self._send_welcome_menu(message.sender_id)
         
-        # Verifica se a conversa expirou
-        if customer.last_interaction and (datetime.now() - customer.last_interaction) > timedelta(seconds=customer.conversation_expiration):
+        # Verifica se a conversa expirou (o ConversationExpirySweeper encerra as abandonadas
+        # em segundo plano; aqui fica só a checagem para quem volta antes da varredura)
+        now = datetime.now(timezone.utc)
+        expires_at = customer.expires_at()
+        if expires_at and now > expires_at:
             # Reinicia a conversa enviando o menu novamente
-            return self._send_welcome_menu(message.sender_id)
+            return await self._send_welcome_menu(message.sender_id)
         
-        # Atualiza a última interação
-        customer.last_interaction = datetime.now()
-        await self.customer_repo.update(customer)
+        # Atualiza só a última interação: status e agente podem ter sido alterados por outro shard
+        # (/proximo, /encerrar) depois da leitura, e a linha gravada é a que decide o roteamento
+        customer = await self.customer_repo.touch_last_interaction(message.sender_id, now)
+        if not customer:
+            return []
         
         if customer.status == CustomerStatus.WAITING:
             return [WhatsAppMessage.create_system_message(
@@ -52,12 +86,14 @@ class MessageRouter:
         if customer.status == CustomerStatus.IN_SERVICE:
             # Encaminha mensagem para o agente atual
             return [WhatsAppMessage(
-                message_id=uuid4(),
+                message_id=new_message_id(),
                 sender_id=message.sender_id,
                 recipient_id=customer.current_agent_id if customer.current_agent_id is not None else "",
                 content=f"CLIENTE {message.sender_id}: {message.content}",
                 message_type=message.message_type,
-                timestamp=datetime.now()
+                timestamp=datetime.now(),
+                # Mídias seguem pelo media_id/mime_type recebidos
+                metadata=dict(message.metadata)
             )]
 
         return []
@@ -80,16 +116,17 @@ class MessageRouter:
             )]
             
         return [WhatsAppMessage(
-            message_id=uuid4(),
+            message_id=new_message_id(),
             sender_id=agent_id,
             recipient_id=agent.current_customer_id,
             content=message.content,
             message_type=message.message_type,
-            timestamp=datetime.now()
+            timestamp=datetime.now(),
+            metadata=dict(message.metadata)
         )]
     
 
-    def _send_welcome_menu(self, customer_id: str) -> list[WhatsAppMessage]:
+    async def _send_welcome_menu(self, customer_id: str) -> list[WhatsAppMessage]:
         menu_content = """
         Bem-vindo ao nosso atendimento! 
         Por favor, escolha um departamento:
@@ -103,10 +140,10 @@ class MessageRouter:
             customer_id=customer_id,
             department=None,
             status=CustomerStatus.WAITING,
-            last_interaction=datetime.now()
+            last_interaction=datetime.now(timezone.utc)
         )
 
-        _ = self.customer_repo.update(customer)
+        await self.customer_repo.update(customer)
         
         return [WhatsAppMessage.create_system_message(customer_id, menu_content)]
     
@@ -121,20 +158,19 @@ class MessageRouter:
         """
         command = command.lower()
         if command == "/fila":
-            # Implementar lógica para mostrar fila
-            pass
+            return await self._queue_status(agent_id)
         elif command == "/proximo":
-            # Implementar lógica para pegar próximo cliente
-            pass
+            return await self._claim_next_customer(agent_id)
         elif command == "/encerrar":
             # Encerra o atendimento atual
             agent = await self.agent_repo.get_by_id(agent_id)
             if agent and agent.current_customer_id:
-                customer = await self.customer_repo.get(agent.current_customer_id)
+                customer_id = agent.current_customer_id
+                customer = await self.customer_repo.get(customer_id)
                 if customer:
                     customer.status = CustomerStatus.FINISHED
                     customer.current_agent_id = None
-                    customer.last_interaction = datetime.now()
+                    customer.last_interaction = datetime.now(timezone.utc)
                     await self.customer_repo.update(customer)
                 
                 agent.current_customer_id = None
@@ -146,7 +182,7 @@ class MessageRouter:
                         "Atendimento encerrado com sucesso."
                     ),
                     WhatsAppMessage.create_system_message(
-                        agent.current_customer_id if agent.current_customer_id else "",
+                        customer_id,
                         "Atendimento encerrado. Obrigado por entrar em contato!"
                     )
                 ]
@@ -157,21 +193,135 @@ class MessageRouter:
         )]
     
 
+    async def _queue_status(self, agent_id: str) -> list[WhatsAppMessage]:
+        agent = await self.agent_repo.get_by_id(agent_id)
+        if not agent:
+            return [WhatsAppMessage.create_system_message(
+                agent_id,
+                "Agente não cadastrado."
+            )]
+
+        if self.queues is not None:
+            waiting = self.queues.size(agent.department)
+        else:
+            waiting = len(await self.customer_repo.get_waiting_customers(agent.department))
+
+        return [WhatsAppMessage.create_system_message(
+            agent_id,
+            f"Clientes na fila ({agent.department.value}): {waiting}"
+        )]
+
+    async def _claim_next_customer(self, agent_id: str) -> list[WhatsAppMessage]:
+        agent = await self.agent_repo.get_by_id(agent_id)
+        if not agent:
+            return [WhatsAppMessage.create_system_message(
+                agent_id,
+                "Agente não cadastrado."
+            )]
+
+        if agent.current_customer_id:
+            return [WhatsAppMessage.create_system_message(
+                agent_id,
+                f"Você já está atendendo o cliente {agent.current_customer_id}. Use /encerrar antes de pegar o próximo."
+            )]
+
+        customer = await self.customer_repo.claim_next_waiting(agent.department, agent_id)
+        if not customer:
+            return [WhatsAppMessage.create_system_message(
+                agent_id,
+                "Não há clientes na fila no momento."
+            )]
+
+        # Na mesma unit of work do claim: cliente e agente são atualizados juntos
+        await self.agent_repo.update_agent_status(agent_id, False, customer.customer_id)
+
+        return [
+            WhatsAppMessage.create_system_message(
+                agent_id,
+                f"Novo atendimento: cliente {customer.customer_id}. As próximas mensagens serão encaminhadas a ele."
+            ),
+            WhatsAppMessage.create_system_message(
+                customer.customer_id,
+                "Um agente vai atendê-lo agora."
+            )
+        ]
+    
+
     async def handle_incoming_message(self, message: WhatsAppMessage) -> None:
         """
-        Processa uma mensagem recebida e envia as respostas apropriadas
+        Processa uma mensagem recebida e envia as respostas apropriadas.
+        Com unit_of_work, todas as leituras/escritas da mensagem (inclusive o outbox)
+        acontecem em uma única transação.
         """
-        response_messages = await self.route_message(message)
-        
-        # Envia cada mensagem de resposta
-        for response in response_messages:
-            success = await self.message_sender.send_message(response)
-            if not success:
-                # Aqui você pode implementar retry logic ou logging
-                print(f"Falha ao enviar mensagem para {response.recipient_id}")
-        
-        # Atualiza a última interação do cliente
-        customer = await self.customer_repo.get(message.sender_id)
-        if customer:
-            customer.last_interaction = datetime.now()
-            await self.customer_repo.update(customer)
\ No newline at end of file
+        async with self._transaction():
+            with self._span("route"):
+                response_messages = await self.route_message(message)
+
+            if self.outbox is not None:
+                # Grava as respostas no outbox; o relay faz o envio com retry.
+                # A chave derivada da mensagem recebida evita respostas duplicadas em reentregas
+                _ = await self.outbox.add_many([
+                    OutboxMessage(dedup_key=f"{message.message_id}:{index}", message=response)
+                    for index, response in enumerate(response_messages)
+                ])
+
+        if self.outbox is None:
+            # Envia as respostas em paralelo, mantendo a ordem por destinatário
+            with self._span("send_responses"):
+                results = await self.message_sender.send_messages(response_messages)
+            for result in results:
+                if not result.success:
+                    logger.warning(
+                        "Failed to send response",
+                        extra={"recipient": result.message.recipient_id, "error": result.error}
+                    )
+
+    async def handle_incoming_messages(self, messages: list[WhatsAppMessage]) -> list[WhatsAppMessage]:
+        """
+        Processa um lote de mensagens (ex.: uma entrega do webhook com várias entradas), na ordem recebida.
+        Antes, busca todos os clientes e agentes envolvidos com uma consulta por tabela; com os
+        repositórios em cache, o processamento de cada mensagem já os encontra em memória.
+        Uma mensagem com erro não interrompe as demais. Retorna as mensagens que falharam.
+        """
+        await self.prefetch(messages)
+
+        failed: list[WhatsAppMessage] = []
+        for message in messages:
+            try:
+                await self.handle_incoming_message(message)
+            except Exception:
+                logger.exception("Failed to process incoming message", extra={"sender_id": message.sender_id})
+                failed.append(message)
+        return failed
+
+    async def prefetch(self, messages: list[WhatsAppMessage]) -> None:
+        """
+        Carrega com uma consulta por tabela os clientes e agentes que as mensagens vão usar,
+        para que os repositórios em cache já os tenham quando cada mensagem for processada.
+        """
+        with self._span("prefetch"):
+            await self._prefetch(messages)
+
+    async def _prefetch(self, messages: list[WhatsAppMessage]) -> None:
+        agent_ids = list(dict.fromkeys(message.sender_id for message in messages if is_agent(message.sender_id)))
+        customer_ids = dict.fromkeys(message.sender_id for message in messages if not is_agent(message.sender_id))
+
+        if agent_ids:
+            agents = await self.agent_repo.get_many(agent_ids)
+            # Os comandos dos agentes também leem o cliente em atendimento
+            customer_ids.update(dict.fromkeys(
+                agent.current_customer_id for agent in agents.values() if agent.current_customer_id
+            ))
+
+        if customer_ids:
+            _ = await self.customer_repo.get_many(list(customer_ids))
+
+    def _span(self, stage: str) -> AbstractContextManager[None]:
+        if self.span is None:
+            return nullcontext()
+        return self.span(stage)
+
+    def _transaction(self) -> AbstractAsyncContextManager[object]:
+        if self.unit_of_work is None:
+            return nullcontext()
+        return self.unit_of_work()
\ No newline at end of file
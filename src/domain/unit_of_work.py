@@ -0,0 +1,98 @@
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from contextvars import ContextVar, Token
+from types import TracebackType
+from typing import Self
+
+Hook = Callable[[], None]
+
+_current_unit_of_work: ContextVar["UnitOfWork | None"] = ContextVar("current_unit_of_work", default=None)
+
+
+def current_unit_of_work() -> "UnitOfWork | None":
+    """
+    Unit of work ativa na tarefa atual, se houver.
+    """
+    return _current_unit_of_work.get()
+
+
+class UnitOfWork(ABC):
+    """
+    Uma transação por mensagem processada.
+    Enquanto o bloco `async with` está ativo, todos os repositórios usam a mesma sessão;
+    ao sair, a transação é confirmada (ou desfeita se houve exceção).
+    Uma unit of work aberta dentro de outra participa da transação externa.
+    """
+
+    def __init__(self):
+        self._outer: UnitOfWork | None = None
+        self._token: Token[UnitOfWork | None] | None = None
+        self._on_commit: list[Hook] = []
+        self._on_rollback: list[Hook] = []
+
+    async def __aenter__(self) -> Self:
+        self._outer = current_unit_of_work()
+        if self._outer is None:
+            await self._begin()
+        self._token = _current_unit_of_work.set(self)
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None
+    ) -> None:
+        if self._token is not None:
+            _current_unit_of_work.reset(self._token)
+            self._token = None
+
+        if self._outer is not None:
+            return
+
+        on_commit, on_rollback = self._on_commit, self._on_rollback
+        self._on_commit, self._on_rollback = [], []
+
+        if exc_type is not None:
+            await self._rollback()
+            self._run_hooks(on_rollback)
+            return
+
+        try:
+            await self._commit()
+        except BaseException:
+            # Inclui o cancelamento no meio do commit: quem esperava o fim da transação é liberado
+            self._run_hooks(on_rollback)
+            raise
+
+        self._run_hooks(on_commit)
+
+    def on_commit(self, hook: Hook) -> None:
+        """Executa `hook` depois que a transação for confirmada"""
+        if self._outer is not None:
+            self._outer.on_commit(hook)
+        else:
+            self._on_commit.append(hook)
+
+    def on_rollback(self, hook: Hook) -> None:
+        """Executa `hook` se a transação for desfeita"""
+        if self._outer is not None:
+            self._outer.on_rollback(hook)
+        else:
+            self._on_rollback.append(hook)
+
+    def _run_hooks(self, hooks: list[Hook]) -> None:
+        for hook in hooks:
+            hook()
+
+    @abstractmethod
+    async def _begin(self) -> None:
+        pass
+
+    @abstractmethod
+    async def _commit(self) -> None:
+        pass
+
+    @abstractmethod
+    async def _rollback(self) -> None:
+        pass
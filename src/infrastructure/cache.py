@@ -0,0 +1,195 @@
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Generic, TypeVar
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    size: int
+    max_size: int
+    hits: int
+    misses: int
+    evictions: int
+    expirations: int
+    coalesced: int
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LRUCache(Generic[K, V]):
+    """
+    Cache LRU limitado com TTL por entrada.
+    get_or_load junta buscas concorrentes pela mesma chave em uma única chamada ao loader.
+
+    Cada set/invalidate recebe uma versão. Um valor carregado do backend só entra no cache (fill)
+    se a chave não foi escrita desde o início da carga, e hold/release mantêm a chave fora do cache
+    enquanto uma escrita não é confirmada.
+    """
+
+    max_size: int
+    ttl: float
+
+    def __init__(self, max_size: int = 10_000, ttl: float = 60.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._loading: dict[K, asyncio.Future[V | None]] = {}
+        # Versão da última escrita de cada chave; as mais antigas são esquecidas e passam a valer _forgotten
+        self._version = 0
+        self._written: OrderedDict[K, int] = OrderedDict()
+        self._forgotten = 0
+        self._holds: Counter[K] = Counter()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._coalesced = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: K) -> bool:
+        return self._lookup(key) is not None
+
+    def get(self, key: K) -> V | None:
+        entry = self._lookup(key)
+        if entry is None:
+            self._misses += 1
+            return None
+
+        self._hits += 1
+        return entry
+
+    def peek(self, key: K) -> V | None:
+        """Como get, mas sem contar hit/miss"""
+        return self._lookup(key)
+
+    @property
+    def version(self) -> int:
+        """Versão atual, a ser passada para fill() por quem começa uma carga"""
+        return self._version
+
+    def set(self, key: K, value: V) -> None:
+        self._written_now(key)
+        self._store(key, value)
+
+    def fill(self, key: K, value: V, version: int) -> None:
+        """
+        Guarda um valor carregado do backend por uma leitura que começou em `version`.
+        Se a chave foi escrita depois disso, ou tem uma escrita pendente, o valor pode estar
+        desatualizado e é descartado.
+        """
+        if key in self._holds or self._written.get(key, self._forgotten) > version:
+            return
+        self._store(key, value)
+
+    def invalidate(self, key: K) -> None:
+        self._written_now(key)
+        _ = self._entries.pop(key, None)
+
+    def hold(self, key: K) -> None:
+        """Tira a chave do cache até o release() correspondente (escrita ainda não confirmada)"""
+        self._holds[key] += 1
+        self.invalidate(key)
+
+    def release(self, key: K, value: V | None) -> None:
+        """Fim da escrita: grava `value` (a versão confirmada) ou, com None, só libera a chave"""
+        self._holds[key] -= 1
+        if self._holds[key] <= 0:
+            del self._holds[key]
+        if value is not None and key not in self._holds:
+            self.set(key, value)
+        else:
+            self.invalidate(key)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._written.clear()
+        self._version += 1
+        self._forgotten = self._version
+
+    async def get_or_load(self, key: K, loader: Callable[[], Awaitable[V | None]]) -> V | None:
+        """
+        Retorna o valor em cache ou carrega com `loader`.
+        Se já houver uma carga em andamento para a chave, aguarda o mesmo resultado.
+        Valores None não são guardados.
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+
+        pending = self._loading.get(key)
+        if pending is not None:
+            self._coalesced += 1
+            return await asyncio.shield(pending)
+
+        future: asyncio.Future[V | None] = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        version = self._version
+        try:
+            value = await loader()
+        except asyncio.CancelledError:
+            _ = future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Evita o aviso de exceção nunca recuperada quando ninguém mais aguardava
+            _ = future.exception()
+            raise
+        else:
+            if value is not None:
+                self.fill(key, value, version)
+            future.set_result(value)
+            return value
+        finally:
+            del self._loading[key]
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            size=len(self._entries),
+            max_size=self.max_size,
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            expirations=self._expirations,
+            coalesced=self._coalesced,
+        )
+
+    def _store(self, key: K, value: V) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            _ = self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def _written_now(self, key: K) -> None:
+        self._version += 1
+        self._written[key] = self._version
+        self._written.move_to_end(key)
+
+        while len(self._written) > self.max_size:
+            _, self._forgotten = self._written.popitem(last=False)
+
+    def _lookup(self, key: K) -> V | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self._expirations += 1
+            return None
+
+        self._entries.move_to_end(key)
+        return value
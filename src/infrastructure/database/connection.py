@@ -1,17 +1,204 @@
+import time
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import cast, override
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.engine.default import DefaultDialect
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
 
 from .models import Base
 
 
+@dataclass
+class DatabaseConfig:
+    # Pool de conexões: pool_size fixas + até max_overflow extras sob pico.
+    # Dimensione para as lanes do dispatcher + outbox relay + sweeper + deduplicação do webhook.
+    pool_size: int = 10
+    max_overflow: int = 10
+    # Espera máxima por uma conexão livre antes de TimeoutError
+    pool_timeout: float = 30.0
+    # Conexões mais velhas que isso (s) são reabertas no próximo checkout; -1 desliga
+    pool_recycle: int = 1800
+    # SELECT 1 a cada checkout: detecta conexões mortas ao custo de um round trip por sessão
+    pool_pre_ping: bool = False
+    # LIFO reutiliza as conexões mais recentes e deixa as sobrando ficarem ociosas até o recycle
+    pool_use_lifo: bool = True
+    # Prepared statements por conexão no asyncpg; 0 desliga (necessário atrás do PgBouncer em modo transaction)
+    prepared_statement_cache_size: int = 500
+    # SQL compilado pelo SQLAlchemy, compartilhado por todas as conexões do engine
+    compiled_cache_size: int = 1000
+
+
+@dataclass
+class DatabasePoolStats:
+    pool_size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    connects: int
+    checkouts: int
+    invalidations: int
+    timeouts: int
+    # Tempo gasto em checkout: espera por uma conexão livre ou abertura de uma nova
+    checkout_seconds_total: float
+    checkout_seconds_max: float
+
+    @property
+    def checkout_seconds_mean(self) -> float:
+        return self.checkout_seconds_total / self.checkouts if self.checkouts else 0.0
+
+
+class _PoolMetrics:
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.invalidations = 0
+        self.timeouts = 0
+        self.checkout_seconds_total = 0.0
+        self.checkout_seconds_max = 0.0
+
+    def record_checkout(self, elapsed: float) -> None:
+        self.checkouts += 1
+        self.checkout_seconds_total += elapsed
+        self.checkout_seconds_max = max(self.checkout_seconds_max, elapsed)
+
+
+class _InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """
+    AsyncAdaptedQueuePool que mede o tempo de cada checkout.
+    Os eventos do pool só avisam depois que a conexão foi obtida, sem o tempo de espera.
+    """
+
+    _metrics: _PoolMetrics | None = None
+
+    @property
+    def metrics(self) -> _PoolMetrics:
+        if self._metrics is None:
+            self._metrics = _PoolMetrics()
+        return self._metrics
+
+    @override
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.timeouts += 1
+            raise
+        self.metrics.record_checkout(time.perf_counter() - started)
+        return connection
+
+    @override
+    def recreate(self) -> "_InstrumentedQueuePool":
+        # engine.dispose() troca o pool; os contadores continuam acumulando no novo
+        pool = super().recreate()
+        assert isinstance(pool, _InstrumentedQueuePool)
+        pool._metrics = self.metrics
+        return pool
+
+
 class Database:
-    def __init__(self, connection_string: str):
-        self.engine = create_async_engine(connection_string)
+    config: DatabaseConfig
+
+    def __init__(self, connection_string: str, config: DatabaseConfig | None = None):
+        self.config = config or DatabaseConfig()
+        url = make_url(connection_string)
+        options: dict[str, object] = {"query_cache_size": self.config.compiled_cache_size}
+
+        # SQLite em memória usa StaticPool (uma conexão só); dimensionamento vale para os demais
+        dialect = cast(DefaultDialect, url.get_dialect())
+        if issubclass(dialect.get_pool_class(url), AsyncAdaptedQueuePool):
+            options.update(
+                poolclass=_InstrumentedQueuePool,
+                pool_size=self.config.pool_size,
+                max_overflow=self.config.max_overflow,
+                pool_timeout=self.config.pool_timeout,
+                pool_recycle=self.config.pool_recycle,
+                pool_pre_ping=self.config.pool_pre_ping,
+                pool_use_lifo=self.config.pool_use_lifo,
+            )
+        if url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"prepared_statement_cache_size": self.config.prepared_statement_cache_size}
+
+        self.engine = create_async_engine(url, **options)
         self.async_session = async_sessionmaker(
-            self.engine, 
+            self.engine,
             class_=AsyncSession,
             expire_on_commit=False
         )
-    
+        # Sessão compartilhada pela unit of work em andamento (ver SQLAlchemyUnitOfWork)
+        self.current_session: ContextVar[AsyncSession | None] = ContextVar(f"database_session_{id(self)}", default=None)
+
+        pool = self.engine.sync_engine.pool
+        self._metrics = pool.metrics if isinstance(pool, _InstrumentedQueuePool) else _PoolMetrics()
+        event.listen(self.engine.sync_engine, "connect", self._on_connect)
+        event.listen(self.engine.sync_engine, "invalidate", self._on_invalidate)
+
+    @asynccontextmanager
+    async def session(self) -> AsyncGenerator[AsyncSession, None]:
+        """
+        Sessão da unit of work em andamento ou, fora dela, uma sessão própria
+        confirmada ao final do bloco.
+        """
+        current = self.current_session.get()
+        if current is not None:
+            yield current
+            return
+
+        async with self.async_session() as session:
+            yield session
+            await session.commit()
+
+    @property
+    def dialect(self) -> str:
+        return self.engine.dialect.name
+
+    def pool_stats(self) -> DatabasePoolStats:
+        """
+        Ocupação atual e contadores acumulados do pool. Com StaticPool (SQLite em memória)
+        só connects e invalidations são contados.
+        """
+        pool = self.engine.sync_engine.pool
+        metrics = self._metrics
+        if isinstance(pool, _InstrumentedQueuePool):
+            # overflow() começa em -pool_size e só fica positivo com conexões além do pool_size
+            sizing = (self.config.pool_size, self.config.max_overflow)
+            usage = (pool.checkedout(), pool.checkedin(), max(pool.overflow(), 0))
+        else:
+            sizing = (1, 0)
+            usage = (0, 0, 0)
+        return DatabasePoolStats(
+            pool_size=sizing[0],
+            max_overflow=sizing[1],
+            checked_out=usage[0],
+            idle=usage[1],
+            overflow=usage[2],
+            connects=metrics.connects,
+            checkouts=metrics.checkouts,
+            invalidations=metrics.invalidations,
+            timeouts=metrics.timeouts,
+            checkout_seconds_total=metrics.checkout_seconds_total,
+            checkout_seconds_max=metrics.checkout_seconds_max,
+        )
+
+    def add_statement_listener(self, listener: Callable[[], None]) -> None:
+        """
+        Chamado a cada statement enviado ao banco, na task que o executou (ex.: queries por requisição).
+        """
+        event.listen(self.engine.sync_engine, "before_cursor_execute", lambda *_args: listener())
+
     async def create_tables(self):
         async with self.engine.begin() as conn:
-            await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+            await conn.run_sync(Base.metadata.create_all)
+
+    def _on_connect(self, *_args: object) -> None:
+        self._metrics.connects += 1
+
+    def _on_invalidate(self, *_args: object) -> None:
+        self._metrics.invalidations += 1
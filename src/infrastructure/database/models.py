@@ -1,13 +1,18 @@
 from datetime import datetime, timezone
-from sqlalchemy import Enum, Integer, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import JSON, Enum, Index, Integer, String, Boolean, DateTime, ForeignKey, Text
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from src.domain.entities import Department, CustomerStatus
+from src.domain.messages import MessageType, OutboxStatus
 
 class Base(DeclarativeBase):
     pass
 
 class CustomerModel(Base):
     __tablename__: str = "customers"
+    __table_args__: tuple[Index, ...] = (
+        # Suporta a busca do próximo cliente da fila (claim_next_waiting)
+        Index("ix_customers_queue", "department", "status", "waiting_since"),
+    )
     
     customer_id: Mapped[str] = mapped_column(String, primary_key=True)
     department: Mapped[Department | None] = mapped_column(Enum(Department))
@@ -23,6 +28,10 @@ class CustomerModel(Base):
 
 class AgentModel(Base):
     __tablename__: str = "agents"
+    __table_args__: tuple[Index, ...] = (
+        # Suporta a busca de agente disponível por departamento (get_available_agent)
+        Index("ix_agents_availability", "department", "is_available"),
+    )
     
     agent_id: Mapped[str] = mapped_column(String, primary_key=True)
     department: Mapped[Department] = mapped_column(Enum(Department))
@@ -31,4 +40,48 @@ class AgentModel(Base):
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
         default=lambda: datetime.now(timezone.utc)
-    )
\ No newline at end of file
+    )
+
+class OutboxMessageModel(Base):
+    __tablename__: str = "outbox"
+    __table_args__: tuple[Index, ...] = (
+        Index("ix_outbox_pending", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    dedup_key: Mapped[str] = mapped_column(String, unique=True)
+    message_id: Mapped[str] = mapped_column(String)
+    sender_id: Mapped[str] = mapped_column(String)
+    recipient_id: Mapped[str] = mapped_column(String)
+    content: Mapped[str] = mapped_column(Text)
+    message_type: Mapped[MessageType] = mapped_column(Enum(MessageType))
+    # "metadata" é reservado pelo DeclarativeBase
+    message_metadata: Mapped[dict[str, object]] = mapped_column("metadata", JSON, default=dict)
+    status: Mapped[OutboxStatus] = mapped_column(Enum(OutboxStatus), default=OutboxStatus.PENDING)
+    attempts: Mapped[int] = mapped_column(Integer, default=0)
+    last_error: Mapped[str | None] = mapped_column(Text)
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc)
+    )
+    sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), 
+        default=lambda: datetime.now(timezone.utc)
+    )
+
+class ProcessedMessageModel(Base):
+    """
+    wamids de mensagens recebidas já aceitas, compartilhados entre workers para descartar reentregas.
+    """
+    __tablename__: str = "processed_messages"
+    __table_args__: tuple[Index, ...] = (
+        # Suporta a limpeza periódica das entradas antigas
+        Index("ix_processed_messages_received_at", "received_at"),
+    )
+
+    external_id: Mapped[str] = mapped_column(String, primary_key=True)
+    received_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc)
+    )
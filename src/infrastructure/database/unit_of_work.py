@@ -0,0 +1,50 @@
+from contextvars import Token
+from typing import override
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.unit_of_work import UnitOfWork
+from .connection import Database
+
+
+class SQLAlchemyUnitOfWork(UnitOfWork):
+    """
+    Abre uma única sessão/transação e a publica em Database.current_session,
+    de onde todos os repositórios SQLAlchemy a pegam enquanto a unit of work estiver ativa.
+    """
+
+    db: Database
+
+    def __init__(self, database: Database):
+        super().__init__()
+        self.db = database
+        self._session: AsyncSession | None = None
+        self._session_token: Token[AsyncSession | None] | None = None
+
+    @override
+    async def _begin(self) -> None:
+        self._session = self.db.async_session()
+        self._session_token = self.db.current_session.set(self._session)
+
+    @override
+    async def _commit(self) -> None:
+        try:
+            if self._session is not None:
+                await self._session.commit()
+        finally:
+            await self._close()
+
+    @override
+    async def _rollback(self) -> None:
+        try:
+            if self._session is not None:
+                await self._session.rollback()
+        finally:
+            await self._close()
+
+    async def _close(self) -> None:
+        if self._session_token is not None:
+            self.db.current_session.reset(self._session_token)
+            self._session_token = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
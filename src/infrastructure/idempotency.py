@@ -0,0 +1,124 @@
+import logging
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+
+from src.domain.messages import WhatsAppMessage
+from src.domain.repositories import ProcessedMessageRepository
+from .cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeduplicationStats:
+    tracked: int
+    checked: int
+    accepted: int
+    duplicates: int
+    memory_hits: int
+    store_hits: int
+    released: int
+
+
+class MessageDeduplicator:
+    """
+    Descarta reentregas do webhook pelo wamid (WhatsAppMessage.external_id) antes de qualquer
+    leitura de repositório ou envio. Os IDs aceitos ficam em um conjunto LRU/TTL em memória;
+    com `store`, também são registrados no banco, o que cobre vários workers atrás do mesmo webhook.
+    Mensagens sem wamid sempre passam.
+    """
+
+    store: ProcessedMessageRepository | None
+    retention: float
+    prune_interval: float
+
+    def __init__(
+        self,
+        store: ProcessedMessageRepository | None = None,
+        max_size: int = 100_000,
+        ttl: float = 86_400.0,
+        retention: float = 7 * 86_400.0,
+        prune_interval: float = 3600.0
+    ):
+        self.store = store
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self._seen: LRUCache[str, bool] = LRUCache(max_size, ttl)
+        self._last_prune = time.monotonic()
+        self._checked = 0
+        self._accepted = 0
+        self._memory_hits = 0
+        self._store_hits = 0
+        self._released = 0
+
+    async def filter_new(self, messages: list[WhatsAppMessage]) -> list[WhatsAppMessage]:
+        """
+        Retorna só as mensagens ainda não vistas, já marcando-as como processadas.
+        Duplicatas dentro do mesmo lote também são descartadas.
+        """
+        candidates: dict[str, WhatsAppMessage] = {}
+        for message in messages:
+            if message.external_id is None:
+                continue
+
+            self._checked += 1
+            if message.external_id in candidates or message.external_id in self._seen:
+                self._memory_hits += 1
+                continue
+            candidates[message.external_id] = message
+
+        accepted_ids = set(candidates)
+        if self.store is not None and candidates:
+            await self._prune_if_due()
+            accepted_ids = await self.store.claim(list(candidates))
+            self._store_hits += len(candidates) - len(accepted_ids)
+
+        for external_id in candidates:
+            # Duplicatas encontradas no banco também entram no conjunto local
+            self._seen.set(external_id, True)
+        self._accepted += len(accepted_ids)
+
+        # Preserva a ordem original do lote
+        return [
+            message
+            for message in messages
+            if message.external_id is None
+            or (message.external_id in accepted_ids and candidates[message.external_id] is message)
+        ]
+
+    async def release(self, messages: list[WhatsAppMessage]) -> None:
+        """
+        Esquece mensagens aceitas que não puderam ser processadas, para que a reentrega do Meta seja aceita.
+        """
+        external_ids = [message.external_id for message in messages if message.external_id is not None]
+        for external_id in external_ids:
+            self._seen.invalidate(external_id)
+        if self.store is not None:
+            await self.store.release(external_ids)
+        self._released += len(external_ids)
+
+    def stats(self) -> DeduplicationStats:
+        return DeduplicationStats(
+            tracked=len(self._seen),
+            checked=self._checked,
+            accepted=self._accepted,
+            duplicates=self._memory_hits + self._store_hits,
+            memory_hits=self._memory_hits,
+            store_hits=self._store_hits,
+            released=self._released,
+        )
+
+    async def _prune_if_due(self) -> None:
+        if self.store is None or time.monotonic() - self._last_prune < self.prune_interval:
+            return
+
+        self._last_prune = time.monotonic()
+        try:
+            removed = await self.store.prune(datetime.now(timezone.utc) - timedelta(seconds=self.retention))
+        except Exception:
+            logger.exception("Failed to prune processed message ids")
+            return
+
+        if removed:
+            logger.info("Pruned processed message ids", extra={"removed": removed})
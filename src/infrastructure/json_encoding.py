@@ -0,0 +1,24 @@
+import json
+from collections.abc import Callable
+from json.encoder import encode_basestring
+
+# Serializa um valor JSON direto para bytes em UTF-8, sem espaços
+JsonEncoder = Callable[[object], bytes]
+
+try:
+    import orjson
+    _orjson_dumps: JsonEncoder | None = orjson.dumps
+except ImportError:  # orjson é opcional
+    _orjson_dumps = None
+
+
+def stdlib_json_encoder(value: object) -> bytes:
+    # Strings (destinatário, conteúdo) são a maioria das chamadas: escape direto em C, sem o JSONEncoder
+    if type(value) is str:
+        return encode_basestring(value).encode()
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def default_json_encoder() -> JsonEncoder:
+    """orjson quando instalado; senão o json da stdlib, com a mesma saída compacta em UTF-8"""
+    return _orjson_dumps or stdlib_json_encoder
@@ -0,0 +1,543 @@
+import asyncio
+import json
+import logging
+import os
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Generic, TextIO, TypeVar
+from uuid import UUID
+
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from src.domain.messages import MessageType, OutboxStatus, WhatsAppMessage
+from src.domain.queues import DepartmentQueueService
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+# Linha do snapshot/WAL, já decodificada do JSON
+_Row = dict[str, Any]  # pyright: ignore[reportExplicitAny]
+
+SNAPSHOT_VERSION = 1
+
+
+@dataclass
+class OutboxRecord:
+    """
+    Linha do outbox em memória. Depois de enviada a mensagem é descartada;
+    fica só a dedup_key, que continua barrando respostas duplicadas.
+    """
+    outbox_id: int
+    dedup_key: str
+    message: WhatsAppMessage | None
+    status: OutboxStatus
+    attempts: int
+    available_at: datetime
+    last_error: str | None = None
+    sent_at: datetime | None = None
+
+
+@dataclass
+class MemoryStoreConfig:
+    # Sem path o estado vive só enquanto o processo estiver de pé
+    path: str | None = None
+    # Transações gravadas no WAL antes de um novo snapshot (que trunca o WAL)
+    snapshot_interval: int = 10_000
+    # fsync a cada commit: sobrevive à queda da máquina, não só do processo, ao custo de latência
+    fsync: bool = False
+
+
+@dataclass
+class MemoryStoreStats:
+    customers: int
+    agents: int
+    outbox_pending: int
+    processed_messages: int
+    commits: int
+    rollbacks: int
+    wal_records: int
+    snapshots: int
+
+
+def _datetime(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _isoformat(value: datetime | None) -> str | None:
+    return value.isoformat() if value is not None else None
+
+
+def _encode_customer(customer: Customer) -> _Row:
+    return {
+        "customer_id": customer.customer_id,
+        "department": customer.department.value if customer.department else None,
+        "status": customer.status.value,
+        "current_agent_id": customer.current_agent_id,
+        "waiting_since": _isoformat(customer.waiting_since),
+        "last_interaction": _isoformat(customer.last_interaction),
+        "conversation_expiration": customer.conversation_expiration,
+    }
+
+
+def _decode_customer(row: _Row) -> Customer:
+    return Customer(
+        customer_id=row["customer_id"],
+        department=Department(row["department"]) if row["department"] else None,
+        status=CustomerStatus(row["status"]),
+        current_agent_id=row["current_agent_id"],
+        waiting_since=_datetime(row["waiting_since"]),
+        last_interaction=_datetime(row["last_interaction"]),
+        conversation_expiration=row["conversation_expiration"]
+    )
+
+
+def _encode_agent(agent: Agent) -> _Row:
+    return {
+        "agent_id": agent.agent_id,
+        "department": agent.department.value,
+        "is_available": agent.is_available,
+        "current_customer_id": agent.current_customer_id,
+    }
+
+
+def _decode_agent(row: _Row) -> Agent:
+    return Agent(
+        agent_id=row["agent_id"],
+        department=Department(row["department"]),
+        is_available=row["is_available"],
+        current_customer_id=row["current_customer_id"]
+    )
+
+
+def _encode_outbox(record: OutboxRecord) -> _Row:
+    message = record.message
+    return {
+        "outbox_id": record.outbox_id,
+        "dedup_key": record.dedup_key,
+        "message": {
+            "message_id": str(message.message_id),
+            "sender_id": message.sender_id,
+            "recipient_id": message.recipient_id,
+            "content": message.content,
+            "message_type": message.message_type.value,
+            "timestamp": message.timestamp.isoformat(),
+            "metadata": message.metadata,
+        } if message is not None else None,
+        "status": record.status.value,
+        "attempts": record.attempts,
+        "available_at": record.available_at.isoformat(),
+        "last_error": record.last_error,
+        "sent_at": _isoformat(record.sent_at),
+    }
+
+
+def _decode_outbox(row: _Row) -> OutboxRecord:
+    message: _Row | None = row["message"]
+    return OutboxRecord(
+        outbox_id=row["outbox_id"],
+        dedup_key=row["dedup_key"],
+        message=WhatsAppMessage(
+            message_id=UUID(message["message_id"]),
+            sender_id=message["sender_id"],
+            recipient_id=message["recipient_id"],
+            content=message["content"],
+            message_type=MessageType(message["message_type"]),
+            timestamp=datetime.fromisoformat(message["timestamp"]),
+            metadata=message["metadata"]
+        ) if message is not None else None,
+        status=OutboxStatus(row["status"]),
+        attempts=row["attempts"],
+        available_at=datetime.fromisoformat(row["available_at"]),
+        last_error=row["last_error"],
+        sent_at=_datetime(row["sent_at"])
+    )
+
+
+class _Table(Generic[K, V]):
+    """
+    Linhas indexadas pela chave primária. on_change(key, antes, depois) mantém os índices
+    secundários do store; encode/decode convertem a linha para o snapshot e o WAL.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        key: Callable[[V], K],
+        encode: Callable[[V], _Row],
+        decode: Callable[[_Row], V],
+        on_change: Callable[[K, V | None, V | None], None] | None = None
+    ):
+        self.name = name
+        self.key = key
+        self.encode = encode
+        self.decode = decode
+        self.rows: dict[K, V] = {}
+        self._on_change = on_change
+
+    def set(self, key: K, value: V | None) -> V | None:
+        """Grava (ou, com None, remove) a linha e devolve a versão anterior"""
+        before = self.rows.get(key)
+        if value is None:
+            _ = self.rows.pop(key, None)
+        else:
+            self.rows[key] = value
+        if self._on_change is not None:
+            self._on_change(key, before, value)
+        return before
+
+    def load(self, rows: list[_Row]) -> None:
+        for row in rows:
+            value = self.decode(row)
+            _ = self.set(self.key(value), value)
+
+    def dump(self) -> list[_Row]:
+        return [self.encode(value) for value in self.rows.values()]
+
+
+class MemoryTransaction:
+    """
+    Escritas de uma transação. Cada escrita vale imediatamente no store; a transação guarda
+    a versão anterior de cada linha, para desfazer no rollback, e o registro que vai para o WAL no commit.
+    """
+
+    def __init__(self, store: "MemoryStore"):
+        self._store = store
+        self._undo: list[Callable[[], object]] = []
+        self.records: list[list[object]] = []
+
+    def put_customer(self, customer: Customer) -> None:
+        self._write(self._store.customer_table, customer.customer_id, customer)
+
+    def put_agent(self, agent: Agent) -> None:
+        self._write(self._store.agent_table, agent.agent_id, agent)
+
+    def put_outbox(self, record: OutboxRecord) -> None:
+        self._write(self._store.outbox_table, record.outbox_id, record)
+
+    def delete_outbox(self, outbox_id: int) -> None:
+        self._write(self._store.outbox_table, outbox_id, None)
+
+    def put_processed(self, external_id: str, received_at: datetime) -> None:
+        self._write(self._store.processed_table, external_id, (external_id, received_at))
+
+    def delete_processed(self, external_id: str) -> None:
+        self._write(self._store.processed_table, external_id, None)
+
+    def _write(self, table: _Table[K, V], key: K, value: V | None) -> None:
+        before = table.set(key, value)
+        self._undo.append(lambda: table.set(key, before))
+        if self._store.persistent:
+            self.records.append([table.name, key, table.encode(value) if value is not None else None])
+
+    def undo(self) -> None:
+        for undo in reversed(self._undo):
+            _ = undo()
+        self._undo.clear()
+        self.records.clear()
+
+
+class MemoryStore:
+    """
+    Backend em memória para um único processo: clientes e agentes em dicts, com os índices que
+    as consultas dos repositórios precisam (filas por departamento, agentes disponíveis,
+    agente por cliente, outbox pendente), mantidos a cada escrita.
+
+    Escritas acontecem dentro de transações serializadas por um lock; a unit of work segura
+    o lock do início ao fim, então as transações não se intercalam. Leituras fora de uma
+    transação (read()) também esperam o lock: ninguém enxerga escritas ainda não confirmadas.
+
+    Com config.path, cada commit vira uma linha no WAL (`<path>`) e, a cada snapshot_interval
+    commits, o estado inteiro é gravado em `<path>.snapshot` e o WAL é truncado.
+    load() recupera o estado lendo o snapshot e reaplicando o WAL.
+    """
+
+    config: MemoryStoreConfig
+
+    def __init__(self, config: MemoryStoreConfig | None = None):
+        self.config = config or MemoryStoreConfig()
+
+        # Índices derivados das tabelas
+        self.queues = DepartmentQueueService()
+        self.available_agents: dict[Department, dict[str, None]] = {department: {} for department in Department}
+        self.agent_by_customer: dict[str, str] = {}
+        self.outbox_by_key: dict[str, int] = {}
+        self.pending_outbox: set[int] = set()
+
+        self.customer_table: _Table[str, Customer] = _Table(
+            "customers", lambda customer: customer.customer_id, _encode_customer, _decode_customer, self._index_customer
+        )
+        self.agent_table: _Table[str, Agent] = _Table(
+            "agents", lambda agent: agent.agent_id, _encode_agent, _decode_agent, self._index_agent
+        )
+        self.outbox_table: _Table[int, OutboxRecord] = _Table(
+            "outbox", lambda record: record.outbox_id, _encode_outbox, _decode_outbox, self._index_outbox
+        )
+        self.processed_table: _Table[str, tuple[str, datetime]] = _Table(
+            "processed_messages",
+            lambda entry: entry[0],
+            lambda entry: {"external_id": entry[0], "received_at": entry[1].isoformat()},
+            lambda row: (row["external_id"], datetime.fromisoformat(row["received_at"]))
+        )
+        self._tables: dict[str, _Table[Any, Any]] = {  # pyright: ignore[reportExplicitAny]
+            table.name: table
+            for table in (self.customer_table, self.agent_table, self.outbox_table, self.processed_table)
+        }
+
+        # Transação da unit of work em andamento (ver MemoryUnitOfWork)
+        self.current_transaction: ContextVar[MemoryTransaction | None] = ContextVar(
+            f"memory_transaction_{id(self)}", default=None
+        )
+        self._lock = asyncio.Lock()
+        self._next_outbox_id = 1
+        self._wal: TextIO | None = None
+        self._wal_records = 0
+        self._commits = 0
+        self._rollbacks = 0
+        self._snapshots = 0
+
+    @property
+    def persistent(self) -> bool:
+        return self.config.path is not None
+
+    @property
+    def customers(self) -> dict[str, Customer]:
+        return self.customer_table.rows
+
+    @property
+    def agents(self) -> dict[str, Agent]:
+        return self.agent_table.rows
+
+    @property
+    def outbox(self) -> dict[int, OutboxRecord]:
+        return self.outbox_table.rows
+
+    @property
+    def processed(self) -> dict[str, tuple[str, datetime]]:
+        return self.processed_table.rows
+
+    def next_outbox_id(self) -> int:
+        outbox_id = self._next_outbox_id
+        self._next_outbox_id += 1
+        return outbox_id
+
+    @asynccontextmanager
+    async def transaction(self) -> AsyncGenerator[MemoryTransaction, None]:
+        """
+        Transação da unit of work em andamento ou, fora dela, uma transação própria
+        confirmada ao final do bloco.
+        """
+        current = self.current_transaction.get()
+        if current is not None:
+            yield current
+            return
+
+        transaction = await self.begin()
+        token = self.current_transaction.set(transaction)
+        try:
+            yield transaction
+        except BaseException:
+            self.current_transaction.reset(token)
+            self.rollback(transaction)
+            raise
+        self.current_transaction.reset(token)
+        await self.commit(transaction)
+
+    @asynccontextmanager
+    async def read(self) -> AsyncGenerator[None, None]:
+        """
+        Leitura consistente: fora de uma transação espera a unit of work em andamento terminar,
+        para não devolver linhas que ainda podem ser desfeitas. Dentro dela lê as próprias escritas.
+        """
+        if self.current_transaction.get() is not None:
+            yield
+            return
+
+        async with self._lock:
+            yield
+
+    async def begin(self) -> MemoryTransaction:
+        _ = await self._lock.acquire()
+        return MemoryTransaction(self)
+
+    async def commit(self, transaction: MemoryTransaction) -> None:
+        """
+        Grava a transação no WAL e solta o lock. A escrita (e o snapshot, quando é a vez dele)
+        roda numa thread com o lock ainda preso: o event loop continua atendendo as outras lanes.
+        """
+        try:
+            try:
+                if transaction.records:
+                    await self._in_thread(self._append_wal, transaction.records)
+            except Exception:
+                # Não chegou ao WAL: o estado em memória volta a ser o que está em disco
+                transaction.undo()
+                self._rollbacks += 1
+                raise
+
+            self._commits += 1
+            if self.persistent and self._wal_records >= self.config.snapshot_interval:
+                try:
+                    await self._in_thread(self.snapshot)
+                except Exception:
+                    # A transação já está no WAL; o próximo commit tenta o snapshot de novo
+                    logger.exception("Memory store snapshot failed", extra={"wal_records": self._wal_records})
+        finally:
+            self._lock.release()
+
+    def rollback(self, transaction: MemoryTransaction) -> None:
+        try:
+            transaction.undo()
+            self._rollbacks += 1
+        finally:
+            self._lock.release()
+
+    def load(self) -> None:
+        """
+        Recupera o estado do snapshot e do WAL e abre o WAL para novas escritas.
+        Uma última linha incompleta no WAL (queda no meio da gravação) é descartada.
+        """
+        path = self.config.path
+        if path is None:
+            return
+
+        if os.path.exists(self._snapshot_path):
+            with open(self._snapshot_path, encoding="utf-8") as file:
+                snapshot: _Row = json.load(file)
+            if snapshot.get("version") != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported memory store snapshot version: {snapshot.get('version')}")
+            for name, table in self._tables.items():
+                table.load(snapshot["tables"].get(name, []))
+
+        replayed = 0
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                for number, line in enumerate(file, start=1):
+                    try:
+                        records: list[list[Any]] = json.loads(line)  # pyright: ignore[reportExplicitAny]
+                    except json.JSONDecodeError:
+                        logger.warning("Discarding truncated memory store WAL record", extra={"line": number})
+                        break
+                    for name, key, row in records:
+                        table = self._tables[name]
+                        _ = table.set(key, table.decode(row) if row is not None else None)
+                    replayed += 1
+
+        self._next_outbox_id = max(self.outbox, default=0) + 1
+        logger.info(
+            "Memory store loaded",
+            extra={"customers": len(self.customers), "agents": len(self.agents), "wal_records": replayed}
+        )
+
+        # Recomeça com um snapshot limpo e um WAL vazio (sem a eventual linha incompleta)
+        self.snapshot()
+
+    def snapshot(self) -> None:
+        path = self.config.path
+        if path is None:
+            return
+
+        temporary = f"{self._snapshot_path}.tmp"
+        with open(temporary, "w", encoding="utf-8") as file:
+            json.dump(
+                {
+                    "version": SNAPSHOT_VERSION,
+                    "tables": {name: table.dump() for name, table in self._tables.items()},
+                },
+                file,
+                separators=(",", ":")
+            )
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self._snapshot_path)
+
+        # Se cair antes de truncar, o WAL é reaplicado sobre o snapshot: os registros
+        # guardam a linha inteira, então reaplicá-los leva ao mesmo estado
+        if self._wal is not None:
+            self._wal.close()
+        self._wal = open(path, "w", encoding="utf-8")
+        self._wal_records = 0
+        self._snapshots += 1
+
+    def close(self) -> None:
+        if self._wal is None:
+            return
+
+        if self._wal_records:
+            self.snapshot()
+        self._wal.close()
+        self._wal = None
+
+    def stats(self) -> MemoryStoreStats:
+        return MemoryStoreStats(
+            customers=len(self.customers),
+            agents=len(self.agents),
+            outbox_pending=len(self.pending_outbox),
+            processed_messages=len(self.processed),
+            commits=self._commits,
+            rollbacks=self._rollbacks,
+            wal_records=self._wal_records,
+            snapshots=self._snapshots,
+        )
+
+    async def _in_thread(self, function: Callable[..., None], *args: object) -> None:
+        """
+        Executa a escrita em disco numa thread. Um cancelamento no meio espera a escrita terminar
+        antes de seguir: o lock não é solto com o WAL pela metade.
+        """
+        write = asyncio.ensure_future(asyncio.to_thread(function, *args))
+        cancelled = False
+        while not write.done():
+            try:
+                _ = await asyncio.wait({write})
+            except asyncio.CancelledError:
+                cancelled = True
+        write.result()
+        if cancelled:
+            raise asyncio.CancelledError()
+
+    @property
+    def _snapshot_path(self) -> str:
+        return f"{self.config.path}.snapshot"
+
+    def _append_wal(self, records: list[list[object]]) -> None:
+        if self._wal is None:
+            raise RuntimeError("Memory store WAL is not open; call load() first")
+
+        # Uma linha por transação: no replay ela é aplicada inteira ou descartada
+        _ = self._wal.write(json.dumps(records, separators=(",", ":")) + "\n")
+        self._wal.flush()
+        if self.config.fsync:
+            os.fsync(self._wal.fileno())
+        self._wal_records += 1
+
+    def _index_customer(self, customer_id: str, _before: Customer | None, after: Customer | None) -> None:
+        if after is None:
+            _ = self.queues.remove(customer_id)
+        else:
+            self.queues.observe(after)
+
+    def _index_agent(self, agent_id: str, before: Agent | None, after: Agent | None) -> None:
+        if before is not None:
+            _ = self.available_agents[before.department].pop(agent_id, None)
+            if before.current_customer_id is not None and self.agent_by_customer.get(before.current_customer_id) == agent_id:
+                del self.agent_by_customer[before.current_customer_id]
+
+        if after is not None:
+            if after.is_available:
+                self.available_agents[after.department][agent_id] = None
+            if after.current_customer_id is not None:
+                self.agent_by_customer[after.current_customer_id] = agent_id
+
+    def _index_outbox(self, outbox_id: int, before: OutboxRecord | None, after: OutboxRecord | None) -> None:
+        if before is not None:
+            self.pending_outbox.discard(outbox_id)
+            _ = self.outbox_by_key.pop(before.dedup_key, None)
+
+        if after is not None:
+            self.outbox_by_key[after.dedup_key] = outbox_id
+            if after.status == OutboxStatus.PENDING:
+                self.pending_outbox.add(outbox_id)
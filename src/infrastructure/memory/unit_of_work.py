@@ -0,0 +1,47 @@
+from contextvars import Token
+from typing import override
+
+from src.domain.unit_of_work import UnitOfWork
+from .store import MemoryStore, MemoryTransaction
+
+
+class MemoryUnitOfWork(UnitOfWork):
+    """
+    Abre uma transação do MemoryStore e a publica em MemoryStore.current_transaction,
+    de onde todos os repositórios em memória a pegam enquanto a unit of work estiver ativa.
+    """
+
+    store: MemoryStore
+
+    def __init__(self, store: MemoryStore):
+        super().__init__()
+        self.store = store
+        self._transaction: MemoryTransaction | None = None
+        self._transaction_token: Token[MemoryTransaction | None] | None = None
+
+    @override
+    async def _begin(self) -> None:
+        self._transaction = await self.store.begin()
+        self._transaction_token = self.store.current_transaction.set(self._transaction)
+
+    @override
+    async def _commit(self) -> None:
+        try:
+            if self._transaction is not None:
+                await self.store.commit(self._transaction)
+        finally:
+            self._close()
+
+    @override
+    async def _rollback(self) -> None:
+        try:
+            if self._transaction is not None:
+                self.store.rollback(self._transaction)
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        if self._transaction_token is not None:
+            self.store.current_transaction.reset(self._transaction_token)
+            self._transaction_token = None
+        self._transaction = None
@@ -0,0 +1,81 @@
+import math
+from dataclasses import dataclass
+
+# Sub-buckets lineares por potência de 2: erro relativo de até 1/128 (< 1%) em qualquer escala
+SUB_BUCKETS = 64
+
+
+@dataclass
+class HistogramSnapshot:
+    count: int
+    sum: float
+    min: float
+    max: float
+    p50: float
+    p90: float
+    p99: float
+    p999: float
+
+
+class LatencyHistogram:
+    """
+    Histograma log-linear no estilo HDR: cada potência de 2 é dividida em SUB_BUCKETS faixas
+    lineares, então os percentis têm a mesma precisão relativa de microssegundos a minutos,
+    com memória proporcional só às faixas efetivamente usadas.
+    Aceita qualquer valor não negativo (segundos, contagens de queries etc.).
+    """
+
+    def __init__(self):
+        self._buckets: dict[int, int] = {}
+        self._zeros = 0
+        self.count = 0
+        self.sum = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def record(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+        if value <= 0:
+            self._zeros += 1
+            return
+
+        # value = mantissa * 2**exponent, com mantissa em [0.5, 1)
+        mantissa, exponent = math.frexp(value)
+        index = exponent * SUB_BUCKETS + int((mantissa - 0.5) * 2 * SUB_BUCKETS)
+        self._buckets[index] = self._buckets.get(index, 0) + 1
+
+    def percentile(self, quantile: float) -> float:
+        if self.count == 0:
+            return 0.0
+
+        rank = max(math.ceil(quantile * self.count), 1)
+        seen = self._zeros
+        if seen >= rank:
+            return 0.0
+
+        for index in sorted(self._buckets):
+            seen += self._buckets[index]
+            if seen >= rank:
+                # Ponto médio da faixa, limitado ao menor/maior valor observado
+                exponent, sub_bucket = divmod(index, SUB_BUCKETS)
+                value = math.ldexp(0.5 + (sub_bucket + 0.5) / (2 * SUB_BUCKETS), exponent)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def snapshot(self) -> HistogramSnapshot:
+        return HistogramSnapshot(
+            count=self.count,
+            sum=self.sum,
+            min=self.min if self.count else 0.0,
+            max=self.max,
+            p50=self.percentile(0.5),
+            p90=self.percentile(0.9),
+            p99=self.percentile(0.99),
+            p999=self.percentile(0.999),
+        )
@@ -0,0 +1,65 @@
+import heapq
+import itertools
+import json
+import random
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+
+
+@dataclass
+class SpanRecord:
+    stage: str
+    # Início relativo ao começo da requisição e duração, em segundos
+    offset: float
+    duration: float
+
+
+@dataclass
+class SlowRequest:
+    kind: str
+    started_at: datetime
+    duration: float
+    db_queries: int
+    retries: int
+    spans: list[SpanRecord] = field(default_factory=list)
+
+
+class SlowRequestProfiler:
+    """
+    Guarda as `slowest` requisições mais lentas entre as amostradas, com a linha do tempo
+    de cada etapa. Só as requisições amostradas (sample_rate) pagam o custo de registrar spans.
+    """
+
+    slowest: int
+    sample_rate: float
+
+    def __init__(self, slowest: int = 20, sample_rate: float = 1.0, seed: int | None = None):
+        self.slowest = slowest
+        self.sample_rate = sample_rate
+        self._random = random.Random(seed)
+        # Heap de mínimo pela duração: a raiz é a mais rápida das guardadas, a próxima a sair
+        self._heap: list[tuple[float, int, SlowRequest]] = []
+        self._ids = itertools.count()
+        self.sampled = 0
+
+    def sample(self) -> bool:
+        return self.sample_rate >= 1.0 or self._random.random() < self.sample_rate
+
+    def record(self, request: SlowRequest) -> None:
+        self.sampled += 1
+        entry = (request.duration, next(self._ids), request)
+        if len(self._heap) < self.slowest:
+            heapq.heappush(self._heap, entry)
+        elif request.duration > self._heap[0][0]:
+            _ = heapq.heapreplace(self._heap, entry)
+
+    def requests(self) -> list[SlowRequest]:
+        """Mais lentas primeiro"""
+        return [request for _, _, request in sorted(self._heap, reverse=True)]
+
+    def dump(self, path: str | Path) -> None:
+        _ = Path(path).write_text(
+            json.dumps([asdict(request) for request in self.requests()], indent=2, default=str) + "\n",
+            encoding="utf-8"
+        )
@@ -0,0 +1,85 @@
+import math
+from collections.abc import Iterator
+from dataclasses import fields, is_dataclass
+from enum import Enum
+from typing import cast
+
+from .registry import Labels, Metrics
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+QUANTILES = ("0.5", "0.9", "0.99", "0.999")
+
+
+def render(metrics: Metrics) -> str:
+    """
+    Formato texto do Prometheus: contadores, histogramas como summary (quantis calculados
+    no processo) e os stats() registrados como gauges.
+    """
+    lines: list[str] = []
+
+    for name, counters in sorted(metrics.counters.items()):
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in counters.items():
+            lines.append(f"{name}{_labels(labels)} {_number(value)}")
+
+    for name, histograms in sorted(metrics.histograms.items()):
+        lines.append(f"# TYPE {name} summary")
+        for labels, histogram in histograms.items():
+            for quantile in QUANTILES:
+                lines.append(
+                    f"{name}{_labels(labels + (('quantile', quantile),))} {_number(histogram.percentile(float(quantile)))}"
+                )
+            lines.append(f"{name}_sum{_labels(labels)} {_number(histogram.sum)}")
+            lines.append(f"{name}_count{_labels(labels)} {histogram.count}")
+
+    # Amostras de uma mesma métrica precisam sair juntas, sob um único TYPE
+    gauges: dict[str, list[str]] = {}
+    for prefix, collect in metrics.collectors.items():
+        for name, labels, value in _flatten(f"whatsapp_{prefix}", collect(), ()):
+            gauges.setdefault(name, []).append(f"{name}{_labels(labels)} {_number(value)}")
+    for name, samples in gauges.items():
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples)
+
+    return "\n".join(lines) + "\n"
+
+
+def _flatten(name: str, value: object, labels: Labels) -> Iterator[tuple[str, Labels, float]]:
+    """
+    Campos numéricos de dataclasses viram gauges; dicts e listas viram labels key/index,
+    enums uma série com value=<valor> igual a 1. Textos e datas são ignorados.
+    """
+    if isinstance(value, bool):
+        yield name, labels, float(value)
+    elif isinstance(value, int | float):
+        yield name, labels, float(value)
+    elif isinstance(value, Enum):
+        yield name, labels + (("value", str(value.value)),), 1.0
+    elif is_dataclass(value) and not isinstance(value, type):
+        for field in fields(value):
+            yield from _flatten(f"{name}_{field.name}", getattr(value, field.name), labels)
+    elif isinstance(value, dict):
+        for key, item in cast(dict[object, object], value).items():
+            yield from _flatten(name, item, labels + (("key", str(key)),))
+    elif isinstance(value, list):
+        for index, item in enumerate(cast(list[object], value)):
+            yield from _flatten(name, item, labels + (("index", str(index)),))
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _number(value: float) -> str:
+    if math.isnan(value):
+        return "NaN"
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
@@ -0,0 +1,189 @@
+import time
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+from .histogram import LatencyHistogram
+from .profiler import SlowRequest, SlowRequestProfiler, SpanRecord
+
+# Histogramas (exportados como summary) e contadores publicados pelo serviço
+STAGE_SECONDS = "whatsapp_stage_seconds"
+REPOSITORY_SECONDS = "whatsapp_repository_seconds"
+GRAPH_API_SECONDS = "whatsapp_graph_api_request_seconds"
+REQUEST_SECONDS = "whatsapp_request_seconds"
+REQUEST_DB_QUERIES = "whatsapp_request_db_queries"
+DB_QUERIES = "whatsapp_db_queries_total"
+SEND_RETRIES = "whatsapp_send_retries_total"
+
+Labels = tuple[tuple[str, str], ...]
+
+_NO_SPAN = nullcontext()
+
+
+@dataclass
+class MetricsConfig:
+    enabled: bool = True
+    # > 0 liga o SlowRequestProfiler, que guarda as N requisições mais lentas com suas etapas
+    slow_requests: int = 0
+    # Fração das requisições acompanhadas pelo profiler
+    sample_rate: float = 1.0
+    # JSON com as requisições mais lentas, gravado quando o serviço para
+    dump_path: str | None = None
+
+
+class _Trace:
+    __slots__ = ("kind", "started", "started_at", "db_queries", "retries", "spans")
+
+    def __init__(self, kind: str, record_spans: bool):
+        self.kind = kind
+        self.started = time.perf_counter()
+        self.started_at = datetime.now(timezone.utc)
+        self.db_queries = 0
+        self.retries = 0
+        # Só as requisições amostradas pelo profiler guardam a linha do tempo
+        self.spans: list[SpanRecord] | None = [] if record_spans else None
+
+
+class _Span:
+    __slots__ = ("_metrics", "_stage", "_histogram", "_started")
+
+    def __init__(self, metrics: "Metrics", stage: str, histogram: LatencyHistogram):
+        self._metrics = metrics
+        self._stage = stage
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> None:
+        self._started = time.perf_counter()
+
+    def __exit__(self, *_exc_info: object) -> None:
+        self._metrics.finish_span(self._stage, self._histogram, self._started)
+
+
+class Metrics:
+    """
+    Histogramas de latência, contadores e coletores de stats() de um processo.
+    trace() marca uma requisição (uma entrega do webhook, uma mensagem processada);
+    span() mede uma etapa e a associa à requisição em andamento, se houver.
+    Desligado, span()/trace() devolvem um nullcontext compartilhado e nada é registrado.
+    """
+
+    config: MetricsConfig
+    enabled: bool
+    profiler: SlowRequestProfiler | None
+
+    def __init__(self, config: MetricsConfig | None = None):
+        self.config = config or MetricsConfig()
+        self.enabled = self.config.enabled
+        self.profiler = (
+            SlowRequestProfiler(self.config.slow_requests, self.config.sample_rate)
+            if self.enabled and self.config.slow_requests > 0
+            else None
+        )
+        self.histograms: dict[str, dict[Labels, LatencyHistogram]] = {}
+        self.counters: dict[str, dict[Labels, float]] = {}
+        # Funções stats() dos componentes, publicadas como gauges com o nome como prefixo
+        self.collectors: dict[str, Callable[[], object]] = {}
+        self._current_trace: ContextVar[_Trace | None] = ContextVar(f"metrics_trace_{id(self)}", default=None)
+
+    def register(self, name: str, stats: Callable[[], object]) -> None:
+        self.collectors[name] = stats
+
+    def histogram(self, metric: str, **labels: str) -> LatencyHistogram:
+        family = self.histograms.setdefault(metric, {})
+        key = tuple(labels.items())
+        histogram = family.get(key)
+        if histogram is None:
+            histogram = family[key] = LatencyHistogram()
+        return histogram
+
+    def observe(self, metric: str, value: float, **labels: str) -> None:
+        if self.enabled:
+            self.histogram(metric, **labels).record(value)
+
+    def increment(self, metric: str, value: float = 1.0, **labels: str) -> None:
+        if not self.enabled:
+            return
+        family = self.counters.setdefault(metric, {})
+        key = tuple(labels.items())
+        family[key] = family.get(key, 0.0) + value
+
+    def span(self, stage: str, metric: str = STAGE_SECONDS, **labels: str) -> AbstractContextManager[None]:
+        """
+        Mede o bloco em `metric`, com as labels informadas ou, sem elas, stage=<stage>.
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        return _Span(self, stage, self.histogram(metric, **(labels or {"stage": stage})))
+
+    def record_span(self, stage: str, started: float, metric: str = STAGE_SECONDS, **labels: str) -> None:
+        """
+        Como span(), para etapas cujas labels só são conhecidas no fim (ex.: o status HTTP).
+        `started` é um time.perf_counter() tomado no início da etapa.
+        """
+        if self.enabled:
+            self.finish_span(stage, self.histogram(metric, **(labels or {"stage": stage})), started)
+
+    def trace(self, kind: str) -> AbstractContextManager[None]:
+        """
+        Requisição de ponta a ponta. Dentro de outra requisição vira só uma etapa dela.
+        """
+        if not self.enabled:
+            return _NO_SPAN
+        if self._current_trace.get() is not None:
+            return self.span(kind)
+        return self._trace(kind)
+
+    def count_query(self) -> None:
+        if not self.enabled:
+            return
+        self.increment(DB_QUERIES)
+        trace = self._current_trace.get()
+        if trace is not None:
+            trace.db_queries += 1
+
+    def count_retry(self, reason: str) -> None:
+        if not self.enabled:
+            return
+        self.increment(SEND_RETRIES, reason=reason)
+        trace = self._current_trace.get()
+        if trace is not None:
+            trace.retries += 1
+
+    def dump_slow_requests(self) -> None:
+        if self.profiler is not None and self.config.dump_path:
+            self.profiler.dump(self.config.dump_path)
+
+    @contextmanager
+    def _trace(self, kind: str) -> Generator[None, None, None]:
+        trace = _Trace(kind, self.profiler is not None and self.profiler.sample())
+        token = self._current_trace.set(trace)
+        try:
+            yield
+        finally:
+            self._current_trace.reset(token)
+            duration = time.perf_counter() - trace.started
+            self.histogram(REQUEST_SECONDS, kind=kind).record(duration)
+            self.histogram(REQUEST_DB_QUERIES, kind=kind).record(trace.db_queries)
+            if self.profiler is not None and trace.spans is not None:
+                self.profiler.record(SlowRequest(
+                    kind=kind,
+                    started_at=trace.started_at,
+                    duration=duration,
+                    db_queries=trace.db_queries,
+                    retries=trace.retries,
+                    # Etapas internas terminam (e são registradas) antes das externas
+                    spans=sorted(trace.spans, key=lambda span: span.offset)
+                ))
+
+    def finish_span(self, stage: str, histogram: LatencyHistogram, started: float) -> None:
+        """
+        Registra em `histogram` uma etapa iniciada em `started` (time.perf_counter()) e a anexa à requisição em andamento.
+        """
+        finished = time.perf_counter()
+        histogram.record(finished - started)
+        trace = self._current_trace.get()
+        if trace is not None and trace.spans is not None:
+            trace.spans.append(SpanRecord(stage, started - trace.started, finished - started))
@@ -0,0 +1,96 @@
+from collections.abc import Callable
+from dataclasses import replace
+from typing import override
+
+from src.domain.agent_registry import AgentAvailabilityRegistry
+from src.domain.entities import Agent, Department
+from src.domain.repositories import AgentRepository
+from src.domain.unit_of_work import current_unit_of_work
+
+
+def _after_commit(apply: Callable[[], None]) -> None:
+    unit_of_work = current_unit_of_work()
+    if unit_of_work is not None:
+        unit_of_work.on_commit(apply)
+    else:
+        apply()
+
+
+class RegistryAgentRepository(AgentRepository):
+    """
+    Decorator que mantém o AgentAvailabilityRegistry em memória em dia com as mudanças de status
+    dos agentes, depois do commit da unit of work.
+    """
+
+    inner: AgentRepository
+    registry: AgentAvailabilityRegistry
+
+    def __init__(self, inner: AgentRepository, registry: AgentAvailabilityRegistry):
+        self.inner = inner
+        self.registry = registry
+
+    @override
+    async def get_available_agent(self, department: Department) -> Agent | None:
+        return await self.inner.get_available_agent(department)
+
+    @override
+    async def update_agent_status(self, agent_id: str, is_available: bool, current_customer_id: str | None = None) -> None:
+        await self.inner.update_agent_status(agent_id, is_available, current_customer_id)
+
+        if not self.registry.knows(agent_id):
+            agent = await self.inner.get_by_id(agent_id)
+            if agent is None:
+                return
+            # Agente criado depois da inicialização do registro
+            self.registry.register(agent)
+
+        _after_commit(lambda: self.registry.set_available(agent_id, is_available and current_customer_id is None))
+
+    @override
+    async def update_agents_status(self, agent_ids: list[str], is_available: bool) -> list[str]:
+        updated = await self.inner.update_agents_status(agent_ids, is_available)
+        unknown = [agent_id for agent_id in updated if not self.registry.knows(agent_id)]
+        agents = await self.inner.get_many(unknown) if unknown else {}
+
+        def apply() -> None:
+            for agent in agents.values():
+                self.registry.register(agent)
+            for agent_id in updated:
+                self.registry.set_available(agent_id, is_available)
+
+        _after_commit(apply)
+        return updated
+
+    @override
+    async def update_many(self, agents: list[Agent]) -> None:
+        await self.inner.update_many(agents)
+        agents = [replace(agent) for agent in agents]
+
+        def apply() -> None:
+            for agent in agents:
+                self.registry.register(agent)
+
+        _after_commit(apply)
+
+    @override
+    async def get_by_id(self, agent_id: str) -> Agent | None:
+        return await self.inner.get_by_id(agent_id)
+
+    @override
+    async def get_many(self, agent_ids: list[str]) -> dict[str, Agent]:
+        return await self.inner.get_many(agent_ids)
+
+    @override
+    async def list_agents(self) -> list[Agent]:
+        return await self.inner.list_agents()
+
+    @override
+    async def release_agents(self, customer_ids: list[str]) -> list[str]:
+        released = await self.inner.release_agents(customer_ids)
+
+        def apply() -> None:
+            for agent_id in released:
+                self.registry.set_available(agent_id, True)
+
+        _after_commit(apply)
+        return released
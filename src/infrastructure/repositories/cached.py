@@ -0,0 +1,263 @@
+from collections.abc import Awaitable, Callable
+from datetime import datetime
+from dataclasses import replace
+from typing import TypeVar, override
+
+from src.domain.entities import Agent, Customer, Department
+from src.domain.repositories import AgentRepository, CustomerRepository
+from src.domain.unit_of_work import current_unit_of_work
+from ..cache import CacheStats, LRUCache
+
+E = TypeVar("E", Customer, Agent)
+
+
+def _written(cache: LRUCache[str, E], key: str, entity: E | None) -> None:
+    """
+    Atualiza o cache depois de uma escrita no repositório interno (None: só invalida).
+    Dentro de uma unit of work a chave fica fora do cache até a transação terminar e só recebe
+    a entidade se ela for confirmada: as outras tarefas leem a versão confirmada do repositório interno.
+    """
+    unit_of_work = current_unit_of_work()
+    if unit_of_work is None:
+        if entity is None:
+            cache.invalidate(key)
+        else:
+            cache.set(key, entity)
+        return
+
+    cache.hold(key)
+    unit_of_work.on_commit(lambda: cache.release(key, entity))
+    unit_of_work.on_rollback(lambda: cache.release(key, None))
+
+
+def _loaded(cache: LRUCache[str, E], key: str, entity: E, version: int) -> None:
+    """
+    Guarda uma leitura do repositório interno. Dentro de uma unit of work ela pode incluir
+    escritas ainda não confirmadas, então só entra no cache depois do commit.
+    """
+    unit_of_work = current_unit_of_work()
+    if unit_of_work is None:
+        cache.fill(key, entity, version)
+    else:
+        unit_of_work.on_commit(lambda: cache.fill(key, entity, version))
+
+
+async def _get_cached(cache: LRUCache[str, E], key: str, load: Callable[[], Awaitable[E | None]]) -> E | None:
+    if current_unit_of_work() is None:
+        return await cache.get_or_load(key, load)
+
+    # Não se junta às cargas das outras tarefas: elas não enxergam as escritas desta unit of work
+    entity = cache.get(key)
+    if entity is None:
+        version = cache.version
+        entity = await load()
+        if entity is not None:
+            _loaded(cache, key, replace(entity), version)
+    return entity
+
+
+async def _get_many_cached(
+    cache: LRUCache[str, E],
+    keys: list[str],
+    load_many: Callable[[list[str]], Awaitable[dict[str, E]]]
+) -> dict[str, E]:
+    # Só os IDs fora do cache vão para o repositório interno, em uma única consulta
+    found: dict[str, E] = {}
+    missing: list[str] = []
+    for key in dict.fromkeys(keys):
+        entity = cache.get(key)
+        if entity is None:
+            missing.append(key)
+        else:
+            found[key] = replace(entity)
+
+    if missing:
+        version = cache.version
+        for key, entity in (await load_many(missing)).items():
+            _loaded(cache, key, replace(entity), version)
+            found[key] = entity
+    return found
+
+
+class CachedCustomerRepository(CustomerRepository):
+    """
+    Decorator com cache read-through para qualquer CustomerRepository.
+    Escritas vão primeiro para o repositório interno e depois atualizam o cache (write-through);
+    dentro de uma unit of work o cache só recebe a entidade depois do commit.
+    O cache guarda cópias, então alterar a entidade retornada não altera o cache.
+    """
+
+    inner: CustomerRepository
+    cache: LRUCache[str, Customer]
+
+    def __init__(self, inner: CustomerRepository, max_size: int = 10_000, ttl: float = 60.0):
+        self.inner = inner
+        self.cache = LRUCache(max_size, ttl)
+
+    @override
+    async def add(self, customer: Customer) -> None:
+        await self._write_through(customer, self.inner.add)
+
+    @override
+    async def get(self, customer_id: str) -> Customer | None:
+        customer = await _get_cached(self.cache, customer_id, lambda: self.inner.get(customer_id))
+        return replace(customer) if customer else None
+
+    @override
+    async def get_many(self, customer_ids: list[str]) -> dict[str, Customer]:
+        return await _get_many_cached(self.cache, customer_ids, self.inner.get_many)
+
+    @override
+    async def update(self, customer: Customer) -> None:
+        await self._write_through(customer, self.inner.update)
+
+    @override
+    async def update_many(self, customers: list[Customer]) -> None:
+        try:
+            await self.inner.update_many(customers)
+        except Exception:
+            for customer in customers:
+                self.cache.invalidate(customer.customer_id)
+            raise
+
+        for customer in customers:
+            _written(self.cache, customer.customer_id, replace(customer))
+
+    @override
+    async def touch_last_interaction(self, customer_id: str, now: datetime) -> Customer | None:
+        try:
+            customer = await self.inner.touch_last_interaction(customer_id, now)
+        except Exception:
+            self.cache.invalidate(customer_id)
+            raise
+
+        # A linha gravada substitui a cópia do cache, que pode estar desatualizada
+        _written(self.cache, customer_id, replace(customer) if customer else None)
+        return customer
+
+    @override
+    async def get_waiting_customers(self, department: Department) -> list[Customer]:
+        return await self.inner.get_waiting_customers(department)
+
+    @override
+    async def claim_next_waiting(self, department: Department, agent_id: str) -> Customer | None:
+        customer = await self.inner.claim_next_waiting(department, agent_id)
+        if customer:
+            _written(self.cache, customer.customer_id, replace(customer))
+        return customer
+
+    @override
+    async def list_active_customers(self) -> list[Customer]:
+        return await self.inner.list_active_customers()
+
+    @override
+    async def expire_conversations(self, customer_ids: list[str], now: datetime) -> list[Customer]:
+        try:
+            expired = await self.inner.expire_conversations(customer_ids, now)
+        except Exception:
+            for customer_id in customer_ids:
+                self.cache.invalidate(customer_id)
+            raise
+
+        for customer in expired:
+            _written(self.cache, customer.customer_id, replace(customer))
+        return expired
+
+    def stats(self) -> CacheStats:
+        return self.cache.stats()
+
+    async def _write_through(self, customer: Customer, write: Callable[[Customer], Awaitable[None]]) -> None:
+        try:
+            await write(customer)
+        except Exception:
+            self.cache.invalidate(customer.customer_id)
+            raise
+
+        _written(self.cache, customer.customer_id, replace(customer))
+
+
+class CachedAgentRepository(AgentRepository):
+    """
+    Decorator com cache read-through para qualquer AgentRepository.
+    get_available_agent sempre consulta o repositório interno, mas aproveita o resultado para aquecer o cache.
+    """
+
+    inner: AgentRepository
+    cache: LRUCache[str, Agent]
+
+    def __init__(self, inner: AgentRepository, max_size: int = 10_000, ttl: float = 60.0):
+        self.inner = inner
+        self.cache = LRUCache(max_size, ttl)
+
+    @override
+    async def get_available_agent(self, department: Department) -> Agent | None:
+        version = self.cache.version
+        agent = await self.inner.get_available_agent(department)
+        if agent:
+            _loaded(self.cache, agent.agent_id, replace(agent), version)
+        return agent
+
+    @override
+    async def update_agent_status(self, agent_id: str, is_available: bool, current_customer_id: str | None = None) -> None:
+        try:
+            await self.inner.update_agent_status(agent_id, is_available, current_customer_id)
+        except Exception:
+            self.cache.invalidate(agent_id)
+            raise
+
+        cached = self.cache.peek(agent_id)
+        _written(
+            self.cache,
+            agent_id,
+            replace(cached, is_available=is_available, current_customer_id=current_customer_id) if cached else None
+        )
+
+    @override
+    async def update_agents_status(self, agent_ids: list[str], is_available: bool) -> list[str]:
+        try:
+            updated = await self.inner.update_agents_status(agent_ids, is_available)
+        except Exception:
+            for agent_id in agent_ids:
+                self.cache.invalidate(agent_id)
+            raise
+
+        for agent_id in updated:
+            cached = self.cache.peek(agent_id)
+            _written(self.cache, agent_id, replace(cached, is_available=is_available, current_customer_id=None) if cached else None)
+        return updated
+
+    @override
+    async def update_many(self, agents: list[Agent]) -> None:
+        try:
+            await self.inner.update_many(agents)
+        except Exception:
+            for agent in agents:
+                self.cache.invalidate(agent.agent_id)
+            raise
+
+        for agent in agents:
+            _written(self.cache, agent.agent_id, replace(agent))
+
+    @override
+    async def get_by_id(self, agent_id: str) -> Agent | None:
+        agent = await _get_cached(self.cache, agent_id, lambda: self.inner.get_by_id(agent_id))
+        return replace(agent) if agent else None
+
+    @override
+    async def get_many(self, agent_ids: list[str]) -> dict[str, Agent]:
+        return await _get_many_cached(self.cache, agent_ids, self.inner.get_many)
+
+    @override
+    async def list_agents(self) -> list[Agent]:
+        return await self.inner.list_agents()
+
+    @override
+    async def release_agents(self, customer_ids: list[str]) -> list[str]:
+        released = await self.inner.release_agents(customer_ids)
+        for agent_id in released:
+            cached = self.cache.peek(agent_id)
+            _written(self.cache, agent_id, replace(cached, is_available=True, current_customer_id=None) if cached else None)
+        return released
+
+    def stats(self) -> CacheStats:
+        return self.cache.stats()
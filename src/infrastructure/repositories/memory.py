@@ -0,0 +1,328 @@
+import heapq
+import logging
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+from typing import override
+from src.domain.entities import Customer, Agent, Department, CustomerStatus
+from src.domain.messages import OutboxMessage, OutboxStatus
+from src.domain.repositories import CustomerRepository, AgentRepository, OutboxRepository, ProcessedMessageRepository
+from ..memory.store import MemoryStore, OutboxRecord
+
+logger = logging.getLogger(__name__)
+
+# Os repositórios devolvem e gravam cópias: quem altera uma entidade lida
+# só muda o store quando chama update(), como acontece com o banco
+
+
+class MemoryCustomerRepository(CustomerRepository):
+    store: MemoryStore
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    @override
+    async def add(self, customer: Customer) -> None:
+        async with self.store.transaction() as transaction:
+            if customer.customer_id in self.store.customers:
+                raise ValueError(f"Customer {customer.customer_id} already exists")
+            transaction.put_customer(replace(customer))
+
+    @override
+    async def get(self, customer_id: str) -> Customer | None:
+        async with self.store.read():
+            customer = self.store.customers.get(customer_id)
+            return replace(customer) if customer else None
+
+    @override
+    async def get_many(self, customer_ids: list[str]) -> dict[str, Customer]:
+        async with self.store.read():
+            customers = self.store.customers
+            return {
+                customer_id: replace(customers[customer_id])
+                for customer_id in customer_ids
+                if customer_id in customers
+            }
+
+    @override
+    async def update(self, customer: Customer) -> None:
+        async with self.store.transaction() as transaction:
+            transaction.put_customer(replace(customer))
+
+    @override
+    async def update_many(self, customers: list[Customer]) -> None:
+        async with self.store.transaction() as transaction:
+            for customer in customers:
+                transaction.put_customer(replace(customer))
+
+    @override
+    async def touch_last_interaction(self, customer_id: str, now: datetime) -> Customer | None:
+        async with self.store.transaction() as transaction:
+            customer = self.store.customers.get(customer_id)
+            if customer is None:
+                return None
+            customer = replace(customer, last_interaction=now)
+            transaction.put_customer(customer)
+        return replace(customer)
+
+    @override
+    async def get_waiting_customers(self, department: Department) -> list[Customer]:
+        async with self.store.read():
+            return [replace(self.store.customers[customer_id]) for customer_id in self.store.queues.waiting(department)]
+
+    @override
+    async def claim_next_waiting(self, department: Department, agent_id: str) -> Customer | None:
+        # Dentro da transação (com o lock do store) ninguém mais retira clientes da fila
+        async with self.store.transaction() as transaction:
+            customer_id = self.store.queues.peek(department)
+            if customer_id is None:
+                return None
+
+            customer = replace(
+                self.store.customers[customer_id],
+                status=CustomerStatus.IN_SERVICE,
+                current_agent_id=agent_id,
+                last_interaction=datetime.now(timezone.utc)
+            )
+            transaction.put_customer(customer)
+            return replace(customer)
+
+    @override
+    async def list_active_customers(self) -> list[Customer]:
+        async with self.store.read():
+            return [
+                replace(customer)
+                for customer in self.store.customers.values()
+                if customer.status != CustomerStatus.FINISHED
+            ]
+
+    @override
+    async def expire_conversations(self, customer_ids: list[str], now: datetime) -> list[Customer]:
+        expired: list[Customer] = []
+        async with self.store.transaction() as transaction:
+            for customer_id in customer_ids:
+                customer = self.store.customers.get(customer_id)
+                if customer is None or customer.status == CustomerStatus.FINISHED:
+                    continue
+
+                expires_at = customer.expires_at()
+                if expires_at is None or expires_at > now:
+                    continue
+
+                customer = replace(customer, status=CustomerStatus.FINISHED, current_agent_id=None)
+                transaction.put_customer(customer)
+                expired.append(replace(customer))
+        return expired
+
+class MemoryAgentRepository(AgentRepository):
+    store: MemoryStore
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    async def add(self, agent: Agent) -> None:
+        """
+        Cadastra um agente. No banco os agentes são cadastrados fora do serviço;
+        aqui não há outro caminho para criá-los.
+        """
+        async with self.store.transaction() as transaction:
+            if agent.agent_id in self.store.agents:
+                raise ValueError(f"Agent {agent.agent_id} already exists")
+            transaction.put_agent(replace(agent))
+
+    @override
+    async def get_available_agent(self, department: Department) -> Agent | None:
+        async with self.store.read():
+            agent_id = next(iter(self.store.available_agents[department]), None)
+            if agent_id is None:
+                return None
+            return replace(self.store.agents[agent_id])
+
+    @override
+    async def update_agent_status(self, agent_id: str, is_available: bool, current_customer_id: str | None = None) -> None:
+        async with self.store.transaction() as transaction:
+            agent = self.store.agents.get(agent_id)
+            if agent is None:
+                logger.warning("Agent status update for unknown agent", extra={"agent_id": agent_id})
+                return
+            transaction.put_agent(replace(agent, is_available=is_available, current_customer_id=current_customer_id))
+
+    @override
+    async def update_agents_status(self, agent_ids: list[str], is_available: bool) -> list[str]:
+        updated: list[str] = []
+        async with self.store.transaction() as transaction:
+            for agent_id in agent_ids:
+                agent = self.store.agents.get(agent_id)
+                if agent is None:
+                    continue
+                transaction.put_agent(replace(agent, is_available=is_available, current_customer_id=None))
+                updated.append(agent_id)
+        return updated
+
+    @override
+    async def update_many(self, agents: list[Agent]) -> None:
+        async with self.store.transaction() as transaction:
+            for agent in agents:
+                current = self.store.agents.get(agent.agent_id)
+                if current is None:
+                    continue
+                transaction.put_agent(
+                    replace(current, is_available=agent.is_available, current_customer_id=agent.current_customer_id)
+                )
+
+    @override
+    async def get_by_id(self, agent_id: str) -> Agent | None:
+        async with self.store.read():
+            agent = self.store.agents.get(agent_id)
+            return replace(agent) if agent else None
+
+    @override
+    async def get_many(self, agent_ids: list[str]) -> dict[str, Agent]:
+        async with self.store.read():
+            agents = self.store.agents
+            return {agent_id: replace(agents[agent_id]) for agent_id in agent_ids if agent_id in agents}
+
+    @override
+    async def list_agents(self) -> list[Agent]:
+        async with self.store.read():
+            return [replace(agent) for agent in self.store.agents.values()]
+
+    @override
+    async def release_agents(self, customer_ids: list[str]) -> list[str]:
+        released: list[str] = []
+        async with self.store.transaction() as transaction:
+            for customer_id in customer_ids:
+                agent_id = self.store.agent_by_customer.get(customer_id)
+                if agent_id is None:
+                    continue
+                transaction.put_agent(replace(self.store.agents[agent_id], is_available=True, current_customer_id=None))
+                released.append(agent_id)
+        return released
+
+class MemoryOutboxRepository(OutboxRepository):
+    store: MemoryStore
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    @override
+    async def add_many(self, messages: list[OutboxMessage]) -> int:
+        inserted = 0
+        async with self.store.transaction() as transaction:
+            for outbox_message in messages:
+                if outbox_message.dedup_key in self.store.outbox_by_key:
+                    continue
+                transaction.put_outbox(OutboxRecord(
+                    outbox_id=self.store.next_outbox_id(),
+                    dedup_key=outbox_message.dedup_key,
+                    message=outbox_message.message,
+                    status=OutboxStatus.PENDING,
+                    attempts=0,
+                    available_at=datetime.now(timezone.utc)
+                ))
+                inserted += 1
+        return inserted
+
+    @override
+    async def claim_batch(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        now = datetime.now(timezone.utc)
+        claimed: list[OutboxMessage] = []
+        async with self.store.transaction() as transaction:
+            outbox = self.store.outbox
+            available = (outbox_id for outbox_id in self.store.pending_outbox if outbox[outbox_id].available_at <= now)
+            for outbox_id in heapq.nsmallest(limit, available):
+                record = replace(
+                    outbox[outbox_id],
+                    available_at=now + timedelta(seconds=lease_seconds),
+                    attempts=outbox[outbox_id].attempts + 1
+                )
+                transaction.put_outbox(record)
+                if record.message is not None:
+                    claimed.append(OutboxMessage(
+                        dedup_key=record.dedup_key,
+                        message=record.message,
+                        outbox_id=record.outbox_id,
+                        attempts=record.attempts
+                    ))
+        return claimed
+
+    @override
+    async def mark_sent(self, outbox_ids: list[int]) -> None:
+        now = datetime.now(timezone.utc)
+        async with self.store.transaction() as transaction:
+            for outbox_id in outbox_ids:
+                record = self.store.outbox.get(outbox_id)
+                if record is None:
+                    continue
+                transaction.put_outbox(
+                    replace(record, status=OutboxStatus.SENT, message=None, sent_at=now, last_error=None)
+                )
+
+    @override
+    async def mark_failed(self, outbox_id: int, error: str, retry_at: datetime | None) -> None:
+        async with self.store.transaction() as transaction:
+            record = self.store.outbox.get(outbox_id)
+            if record is None:
+                return
+            transaction.put_outbox(replace(
+                record,
+                status=OutboxStatus.PENDING if retry_at else OutboxStatus.FAILED,
+                available_at=retry_at or datetime.now(timezone.utc),
+                last_error=error
+            ))
+
+    @override
+    async def defer(self, outbox_id: int, retry_at: datetime) -> None:
+        async with self.store.transaction() as transaction:
+            record = self.store.outbox.get(outbox_id)
+            if record is None or record.attempts == 0:
+                return
+            transaction.put_outbox(replace(record, available_at=retry_at, attempts=record.attempts - 1))
+
+    @override
+    async def prune(self, older_than: datetime) -> int:
+        async with self.store.transaction() as transaction:
+            sent = [
+                record.outbox_id
+                for record in self.store.outbox.values()
+                if record.status == OutboxStatus.SENT and record.sent_at is not None and record.sent_at < older_than
+            ]
+            for outbox_id in sent:
+                transaction.delete_outbox(outbox_id)
+        return len(sent)
+
+class MemoryProcessedMessageRepository(ProcessedMessageRepository):
+    store: MemoryStore
+
+    def __init__(self, store: MemoryStore):
+        self.store = store
+
+    @override
+    async def claim(self, external_ids: list[str]) -> set[str]:
+        claimed: set[str] = set()
+        now = datetime.now(timezone.utc)
+        async with self.store.transaction() as transaction:
+            for external_id in dict.fromkeys(external_ids):
+                if external_id in self.store.processed:
+                    continue
+                transaction.put_processed(external_id, now)
+                claimed.add(external_id)
+        return claimed
+
+    @override
+    async def release(self, external_ids: list[str]) -> None:
+        async with self.store.transaction() as transaction:
+            for external_id in external_ids:
+                if external_id in self.store.processed:
+                    transaction.delete_processed(external_id)
+
+    @override
+    async def prune(self, older_than: datetime) -> int:
+        async with self.store.transaction() as transaction:
+            expired = [
+                external_id
+                for external_id, received_at in self.store.processed.values()
+                if received_at < older_than
+            ]
+            for external_id in expired:
+                transaction.delete_processed(external_id)
+        return len(expired)
@@ -0,0 +1,94 @@
+from collections.abc import Callable
+from dataclasses import replace
+from datetime import datetime
+from typing import override
+
+from src.domain.entities import Customer, Department
+from src.domain.repositories import CustomerRepository
+from src.domain.unit_of_work import current_unit_of_work
+
+CustomerListener = Callable[[Customer], None]
+
+
+class ObservedCustomerRepository(CustomerRepository):
+    """
+    Decorator que avisa os listeners sobre cada cliente gravado (índices em memória,
+    filas, etc.). Dentro de uma unit of work o aviso só acontece depois do commit.
+    """
+
+    inner: CustomerRepository
+    listeners: list[CustomerListener]
+
+    def __init__(self, inner: CustomerRepository, listeners: list[CustomerListener] | None = None):
+        self.inner = inner
+        self.listeners = listeners or []
+
+    def add_listener(self, listener: CustomerListener) -> None:
+        self.listeners.append(listener)
+
+    @override
+    async def add(self, customer: Customer) -> None:
+        await self.inner.add(customer)
+        self._notify(customer)
+
+    @override
+    async def get(self, customer_id: str) -> Customer | None:
+        return await self.inner.get(customer_id)
+
+    @override
+    async def get_many(self, customer_ids: list[str]) -> dict[str, Customer]:
+        return await self.inner.get_many(customer_ids)
+
+    @override
+    async def update(self, customer: Customer) -> None:
+        await self.inner.update(customer)
+        self._notify(customer)
+
+    @override
+    async def update_many(self, customers: list[Customer]) -> None:
+        await self.inner.update_many(customers)
+        for customer in customers:
+            self._notify(customer)
+
+    @override
+    async def touch_last_interaction(self, customer_id: str, now: datetime) -> Customer | None:
+        customer = await self.inner.touch_last_interaction(customer_id, now)
+        if customer:
+            self._notify(customer)
+        return customer
+
+    @override
+    async def get_waiting_customers(self, department: Department) -> list[Customer]:
+        return await self.inner.get_waiting_customers(department)
+
+    @override
+    async def claim_next_waiting(self, department: Department, agent_id: str) -> Customer | None:
+        customer = await self.inner.claim_next_waiting(department, agent_id)
+        if customer:
+            self._notify(customer)
+        return customer
+
+    @override
+    async def list_active_customers(self) -> list[Customer]:
+        return await self.inner.list_active_customers()
+
+    @override
+    async def expire_conversations(self, customer_ids: list[str], now: datetime) -> list[Customer]:
+        expired = await self.inner.expire_conversations(customer_ids, now)
+        for customer in expired:
+            self._notify(customer)
+        return expired
+
+    def _notify(self, customer: Customer) -> None:
+        # Cópia: quem chamou pode continuar alterando a entidade antes do commit
+        customer = replace(customer)
+
+        def notify() -> None:
+            for listener in self.listeners:
+                listener(customer)
+
+        unit_of_work = current_unit_of_work()
+        if unit_of_work is not None:
+            unit_of_work.on_commit(notify)
+        else:
+            notify()
@@ -1,19 +1,239 @@
-from typing import override
-from sqlalchemy import select
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import TypeVar, override
+from uuid import UUID
+from sqlalchemy import DateTime, bindparam, delete, func, select, type_coerce, update
+from sqlalchemy.dialects import postgresql, sqlite
 from src.domain.entities import Customer, Agent, Department, CustomerStatus
-from src.domain.repositories import CustomerRepository, AgentRepository
-from ..database.models import CustomerModel, AgentModel
+from src.domain.messages import OutboxMessage, OutboxStatus, WhatsAppMessage
+from src.domain.repositories import CustomerRepository, AgentRepository, OutboxRepository, ProcessedMessageRepository
+from ..database.models import Base, CustomerModel, AgentModel, OutboxMessageModel, ProcessedMessageModel
 from ..database.connection import Database
 
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Linhas por statement nas operações em lote, abaixo do limite de parâmetros do PostgreSQL
+BULK_CHUNK_SIZE = 1000
+
+
+def _insert(db: Database, model: type[Base]):
+    """INSERT com suporte a ON CONFLICT no dialeto do banco configurado (PostgreSQL ou SQLite)"""
+    if db.dialect == "sqlite":
+        return sqlite.insert(model)
+    return postgresql.insert(model)
+
+
+def _as_utc(value: datetime | None) -> datetime | None:
+    # O SQLite devolve datetimes sem fuso; todos os horários são gravados em UTC
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _to_customer(db_customer: CustomerModel) -> Customer:
+    return Customer(
+        customer_id=db_customer.customer_id,
+        department=db_customer.department,
+        status=db_customer.status,
+        current_agent_id=db_customer.current_agent_id,
+        waiting_since=_as_utc(db_customer.waiting_since),
+        last_interaction=_as_utc(db_customer.last_interaction),
+        conversation_expiration=db_customer.conversation_expiration
+    )
+
+
+_CUSTOMER_COLUMNS = (
+    "customer_id",
+    "department",
+    "status",
+    "current_agent_id",
+    "waiting_since",
+    "last_interaction",
+    "conversation_expiration",
+)
+
+
+def _customer_values(customer: Customer) -> dict[str, object]:
+    return {
+        "customer_id": customer.customer_id,
+        "department": customer.department,
+        "status": customer.status,
+        "current_agent_id": customer.current_agent_id,
+        "waiting_since": customer.waiting_since,
+        "last_interaction": customer.last_interaction,
+        "conversation_expiration": customer.conversation_expiration,
+    }
+
+
+def _chunks(items: list[T]) -> list[list[T]]:
+    return [items[start:start + BULK_CHUNK_SIZE] for start in range(0, len(items), BULK_CHUNK_SIZE)]
+
+
+# Statements dos caminhos quentes montados uma única vez, com os valores em bindparams: cada chamada
+# só passa os parâmetros, sem reconstruir a expressão nem recalcular a chave do cache de SQL compilado.
+# Os SELECTs usam populate_existing e os UPDATEs não sincronizam a sessão: o SET vem de bindparams,
+# que o ORM não consegue avaliar, então quem lê depois na mesma unit of work recarrega a linha.
+_SELECT_CUSTOMER = (
+    select(CustomerModel)
+    .where(CustomerModel.customer_id == bindparam("customer_id"))
+    .execution_options(populate_existing=True)
+)
+_SELECT_CUSTOMERS = (
+    select(CustomerModel)
+    .where(CustomerModel.customer_id.in_(bindparam("customer_ids", expanding=True)))
+    .execution_options(populate_existing=True)
+)
+_SELECT_WAITING_CUSTOMERS = (
+    select(CustomerModel)
+    .where(
+        CustomerModel.department == bindparam("department"),
+        CustomerModel.status == CustomerStatus.WAITING
+    )
+    .order_by(CustomerModel.waiting_since)
+    .execution_options(populate_existing=True)
+)
+# FOR UPDATE SKIP LOCKED: agentes concorrentes pulam a linha já travada e pegam a seguinte,
+# em vez de esperar pelo mesmo cliente. O SQLite ignora a cláusula e serializa as escritas.
+# Dentro de UPDATE um bindparam não pode ter o nome de uma coluna da tabela
+_NEXT_WAITING = (
+    select(CustomerModel.customer_id)
+    .where(
+        CustomerModel.department == bindparam("queue_department"),
+        CustomerModel.status == CustomerStatus.WAITING
+    )
+    .order_by(CustomerModel.waiting_since)
+    .limit(1)
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()
+)
+_CLAIM_NEXT_WAITING = (
+    update(CustomerModel)
+    .where(
+        CustomerModel.customer_id == _NEXT_WAITING,
+        CustomerModel.status == CustomerStatus.WAITING
+    )
+    .values(
+        status=CustomerStatus.IN_SERVICE,
+        current_agent_id=bindparam("agent_id"),
+        last_interaction=bindparam("now")
+    )
+    .returning(CustomerModel)
+    .execution_options(synchronize_session=False, populate_existing=True)
+)
+_TOUCH_CUSTOMER = (
+    update(CustomerModel)
+    .where(CustomerModel.customer_id == bindparam("target_customer_id"))
+    .values(last_interaction=bindparam("now"))
+    .returning(CustomerModel)
+    .execution_options(synchronize_session=False, populate_existing=True)
+)
+_SELECT_AVAILABLE_AGENT = (
+    select(AgentModel)
+    .where(
+        AgentModel.department == bindparam("department"),
+        AgentModel.is_available == True
+    )
+    .limit(1)
+    .execution_options(populate_existing=True)
+)
+_SELECT_AGENT = (
+    select(AgentModel)
+    .where(AgentModel.agent_id == bindparam("agent_id"))
+    .execution_options(populate_existing=True)
+)
+_SELECT_AGENTS = (
+    select(AgentModel)
+    .where(AgentModel.agent_id.in_(bindparam("agent_ids", expanding=True)))
+    .execution_options(populate_existing=True)
+)
+_UPDATE_AGENT_STATUS = (
+    update(AgentModel)
+    .where(AgentModel.agent_id == bindparam("target_agent_id"))
+    .values(is_available=bindparam("available"), current_customer_id=bindparam("customer_id"))
+    .returning(AgentModel.agent_id)
+    .execution_options(synchronize_session=False)
+)
+_RELEASE_AGENTS = (
+    update(AgentModel)
+    .where(AgentModel.current_customer_id.in_(bindparam("customer_ids", expanding=True)))
+    .values(is_available=True, current_customer_id=None)
+    .returning(AgentModel.agent_id)
+    .execution_options(synchronize_session=False)
+)
+# SKIP LOCKED permite vários relays drenando o outbox sem disputar as mesmas linhas
+_PENDING_OUTBOX = (
+    select(OutboxMessageModel.id)
+    .where(
+        OutboxMessageModel.status == OutboxStatus.PENDING,
+        OutboxMessageModel.available_at <= bindparam("now")
+    )
+    .order_by(OutboxMessageModel.id)
+    .limit(bindparam("limit"))
+    .with_for_update(skip_locked=True)
+)
+_CLAIM_OUTBOX = (
+    update(OutboxMessageModel)
+    .where(OutboxMessageModel.id.in_(_PENDING_OUTBOX))
+    .values(
+        available_at=bindparam("lease_until"),
+        attempts=OutboxMessageModel.attempts + 1
+    )
+    .returning(OutboxMessageModel)
+    .execution_options(synchronize_session=False, populate_existing=True)
+)
+_MARK_OUTBOX_SENT = (
+    update(OutboxMessageModel)
+    .where(OutboxMessageModel.id.in_(bindparam("outbox_ids", expanding=True)))
+    .values(status=OutboxStatus.SENT, sent_at=bindparam("now"), last_error=None)
+    .execution_options(synchronize_session=False)
+)
+_PRUNE_OUTBOX = (
+    delete(OutboxMessageModel)
+    .where(OutboxMessageModel.status == OutboxStatus.SENT, OutboxMessageModel.sent_at < bindparam("older_than"))
+    .returning(OutboxMessageModel.id)
+    .execution_options(synchronize_session=False)
+)
+_MARK_OUTBOX_FAILED = (
+    update(OutboxMessageModel)
+    .where(OutboxMessageModel.id == bindparam("outbox_id"))
+    .values(status=bindparam("new_status"), available_at=bindparam("retry_at"), last_error=bindparam("error"))
+    .execution_options(synchronize_session=False)
+)
+_DEFER_OUTBOX = (
+    update(OutboxMessageModel)
+    .where(OutboxMessageModel.id == bindparam("outbox_id"), OutboxMessageModel.attempts > 0)
+    .values(available_at=bindparam("retry_at"), attempts=OutboxMessageModel.attempts - 1)
+    .execution_options(synchronize_session=False)
+)
+
+
+def _conversation_deadline(db: Database):
+    """last_interaction + conversation_expiration calculado no próprio banco"""
+    if db.dialect == "sqlite":
+        return type_coerce(
+            func.strftime(
+                "%Y-%m-%d %H:%M:%f",
+                CustomerModel.last_interaction,
+                func.printf("+%d seconds", CustomerModel.conversation_expiration)
+            ),
+            DateTime
+        )
+    return CustomerModel.last_interaction + func.make_interval(0, 0, 0, 0, 0, 0, CustomerModel.conversation_expiration)
+
+
 class SQLAlchemyCustomerRepository(CustomerRepository):
     db: Database
 
     def __init__(self, database: Database):
         self.db = database
+        # O upsert depende do dialeto, então é montado por repositório e não no módulo
+        self._upsert_one = self._upsert_statement()
     
     @override
     async def add(self, customer: Customer) -> None:
-        async with self.db.async_session() as session:
+        async with self.db.session() as session:
             db_customer = CustomerModel(
                 customer_id=customer.customer_id,
                 department=customer.department,
@@ -24,66 +244,129 @@ class SQLAlchemyCustomerRepository(CustomerRepository):
                 conversation_expiration=customer.conversation_expiration,
             )
             session.add(db_customer)
-            await session.commit()
     
     @override
     async def get(self, customer_id: str) -> Customer | None:
-        async with self.db.async_session() as session:
-            result = await session.execute(
-                select(CustomerModel).where(CustomerModel.customer_id == customer_id)
-            )
+        async with self.db.session() as session:
+            result = await session.execute(_SELECT_CUSTOMER, {"customer_id": customer_id})
             db_customer = result.scalar_one_or_none()
             
             if not db_customer:
                 return None
             
-            return Customer(
-                customer_id=db_customer.customer_id,
-                department=db_customer.department,
-                status=db_customer.status,
-                current_agent_id=db_customer.current_agent_id,
-                waiting_since=db_customer.waiting_since
-            )
+            return _to_customer(db_customer)
+
+    @override
+    async def get_many(self, customer_ids: list[str]) -> dict[str, Customer]:
+        if not customer_ids:
+            return {}
+
+        async with self.db.session() as session:
+            result = await session.execute(_SELECT_CUSTOMERS, {"customer_ids": customer_ids})
+
+            return {
+                db_customer.customer_id: _to_customer(db_customer)
+                for db_customer in result.scalars().all()
+            }
     
     @override
     async def update(self, customer: Customer) -> None:
-        async with self.db.async_session() as session:
+        """
+        Upsert em um único statement: INSERT ... ON CONFLICT DO UPDATE.
+        Clientes novos (ex.: o menu de boas-vindas) também são gravados.
+        """
+        async with self.db.session() as session:
+            _ = await session.execute(self._upsert_one, _customer_values(customer))
+
+    @override
+    async def update_many(self, customers: list[Customer]) -> None:
+        """
+        Mesmo upsert de update(), com um VALUES de várias linhas por statement.
+        """
+        # Um cliente repetido no mesmo statement faria o ON CONFLICT falhar; vale a última versão
+        latest = {customer.customer_id: customer for customer in customers}
+        async with self.db.session() as session:
+            for chunk in _chunks(list(latest.values())):
+                _ = await session.execute(self._upsert([_customer_values(customer) for customer in chunk]))
+
+    def _upsert(self, rows: list[dict[str, object]]):
+        statement = _insert(self.db, CustomerModel).values(rows)
+        return statement.on_conflict_do_update(
+            index_elements=[CustomerModel.customer_id],
+            set_={
+                column: statement.excluded[column]
+                for column in rows[0]
+                if column != "customer_id"
+            }
+        )
+
+    def _upsert_statement(self):
+        """Upsert de uma linha sem valores embutidos, executado por update() com _customer_values()"""
+        statement = _insert(self.db, CustomerModel)
+        return statement.on_conflict_do_update(
+            index_elements=[CustomerModel.customer_id],
+            set_={column: statement.excluded[column] for column in _CUSTOMER_COLUMNS if column != "customer_id"}
+        )
+    
+    @override
+    async def touch_last_interaction(self, customer_id: str, now: datetime) -> Customer | None:
+        async with self.db.session() as session:
+            result = await session.execute(_TOUCH_CUSTOMER, {"target_customer_id": customer_id, "now": now})
+            db_customer = result.scalar_one_or_none()
+            return _to_customer(db_customer) if db_customer else None
+
+    @override
+    async def claim_next_waiting(self, department: Department, agent_id: str) -> Customer | None:
+        async with self.db.session() as session:
             result = await session.execute(
-                select(CustomerModel).where(CustomerModel.customer_id == customer.customer_id)
+                _CLAIM_NEXT_WAITING,
+                {"queue_department": department, "agent_id": agent_id, "now": datetime.now(timezone.utc)}
             )
             db_customer = result.scalar_one_or_none()
-            
-            if db_customer:
-                db_customer.department = customer.department
-                db_customer.status = customer.status
-                db_customer.current_agent_id = customer.current_agent_id
-                db_customer.waiting_since = customer.waiting_since
-                db_customer.last_interaction = customer.last_interaction
-                db_customer.conversation_expiration = customer.conversation_expiration
-                await session.commit()
+
+            if not db_customer:
+                return None
+
+            return _to_customer(db_customer)
     
+    @override
     async def get_waiting_customers(self, department: Department) -> list[Customer]:
-        async with self.db.async_session() as session:
+        async with self.db.session() as session:
+            result = await session.execute(_SELECT_WAITING_CUSTOMERS, {"department": department})
+            db_customers = result.scalars().all()
+            
+            return [_to_customer(db_customer) for db_customer in db_customers]
+
+    @override
+    async def list_active_customers(self) -> list[Customer]:
+        async with self.db.session() as session:
+            result = await session.execute(
+                select(CustomerModel).where(CustomerModel.status != CustomerStatus.FINISHED)
+            )
+
+            return [_to_customer(db_customer) for db_customer in result.scalars().all()]
+
+    @override
+    async def expire_conversations(self, customer_ids: list[str], now: datetime) -> list[Customer]:
+        if not customer_ids:
+            return []
+
+        # O prazo é conferido de novo no banco: uma interação gravada depois que o
+        # cliente foi escolhido para expirar mantém a conversa aberta
+        async with self.db.session() as session:
             result = await session.execute(
-                select(CustomerModel)
+                update(CustomerModel)
                 .where(
-                    CustomerModel.department == department,
-                    CustomerModel.status == CustomerStatus.WAITING
+                    CustomerModel.customer_id.in_(customer_ids),
+                    CustomerModel.status != CustomerStatus.FINISHED,
+                    _conversation_deadline(self.db) <= now
                 )
-                .order_by(CustomerModel.waiting_since)
+                .values(status=CustomerStatus.FINISHED, current_agent_id=None)
+                .returning(CustomerModel)
+                .execution_options(synchronize_session=False)
             )
-            db_customers = result.scalars().all()
-            
-            return [
-                Customer(
-                    customer_id=db_customer.customer_id,
-                    department=db_customer.department,
-                    status=db_customer.status,
-                    current_agent_id=db_customer.current_agent_id,
-                    waiting_since=db_customer.waiting_since
-                )
-                for db_customer in db_customers
-            ]
+
+            return [_to_customer(db_customer) for db_customer in result.scalars().all()]
 
 class SQLAlchemyAgentRepository(AgentRepository):
     def __init__(self, database: Database):
@@ -91,15 +374,8 @@ class SQLAlchemyAgentRepository(AgentRepository):
     
     @override
     async def get_available_agent(self, department: Department) -> Agent | None:
-        async with self.db.async_session() as session:
-            result = await session.execute(
-                select(AgentModel)
-                .where(
-                    AgentModel.department == department,
-                    AgentModel.is_available == True
-                )
-                .limit(1)
-            )
+        async with self.db.session() as session:
+            result = await session.execute(_SELECT_AVAILABLE_AGENT, {"department": department})
             db_agent = result.scalar_one_or_none()
             
             if not db_agent:
@@ -114,10 +390,8 @@ class SQLAlchemyAgentRepository(AgentRepository):
     
     @override
     async def get_by_id(self, agent_id: str) -> Agent | None:
-        async with self.db.async_session() as session:
-            result = await session.execute(
-                select(AgentModel).where(AgentModel.agent_id == agent_id)
-            )
+        async with self.db.session() as session:
+            result = await session.execute(_SELECT_AGENT, {"agent_id": agent_id})
             db_agent = result.scalar_one_or_none()
             
             if not db_agent:
@@ -130,15 +404,237 @@ class SQLAlchemyAgentRepository(AgentRepository):
                 current_customer_id=db_agent.current_customer_id
             )
     
+    @override
+    async def get_many(self, agent_ids: list[str]) -> dict[str, Agent]:
+        if not agent_ids:
+            return {}
+
+        async with self.db.session() as session:
+            result = await session.execute(_SELECT_AGENTS, {"agent_ids": agent_ids})
+
+            return {
+                db_agent.agent_id: Agent(
+                    agent_id=db_agent.agent_id,
+                    department=db_agent.department,
+                    is_available=db_agent.is_available,
+                    current_customer_id=db_agent.current_customer_id
+                )
+                for db_agent in result.scalars().all()
+            }
+    
+    @override
+    async def list_agents(self) -> list[Agent]:
+        async with self.db.session() as session:
+            result = await session.execute(select(AgentModel))
+
+            return [
+                Agent(
+                    agent_id=db_agent.agent_id,
+                    department=db_agent.department,
+                    is_available=db_agent.is_available,
+                    current_customer_id=db_agent.current_customer_id
+                )
+                for db_agent in result.scalars().all()
+            ]
+    
     @override
     async def update_agent_status(self, agent_id: str, is_available: bool, current_customer_id: str | None = None) -> None:
-        async with self.db.async_session() as session:
+        async with self.db.session() as session:
             result = await session.execute(
-                select(AgentModel).where(AgentModel.agent_id == agent_id)
+                _UPDATE_AGENT_STATUS,
+                {"target_agent_id": agent_id, "available": is_available, "customer_id": current_customer_id}
             )
-            db_agent = result.scalar_one_or_none()
-            
-            if db_agent:
-                db_agent.is_available = is_available
-                db_agent.current_customer_id = current_customer_id
-                await session.commit()
\ No newline at end of file
+            updated = result.scalar_one_or_none()
+
+            if updated is None:
+                logger.warning("Agent status update for unknown agent", extra={"agent_id": agent_id})
+
+    @override
+    async def update_agents_status(self, agent_ids: list[str], is_available: bool) -> list[str]:
+        if not agent_ids:
+            return []
+
+        updated: list[str] = []
+        async with self.db.session() as session:
+            for chunk in _chunks(agent_ids):
+                result = await session.execute(
+                    update(AgentModel)
+                    .where(AgentModel.agent_id.in_(chunk))
+                    .values(is_available=is_available, current_customer_id=None)
+                    .returning(AgentModel.agent_id)
+                )
+                updated.extend(result.scalars().all())
+        return updated
+
+    @override
+    async def update_many(self, agents: list[Agent]) -> None:
+        if not agents:
+            return
+
+        # UPDATE por chave primária com executemany: um statement preparado para o lote inteiro
+        async with self.db.session() as session:
+            _ = await session.execute(
+                update(AgentModel),
+                [
+                    {
+                        "agent_id": agent.agent_id,
+                        "is_available": agent.is_available,
+                        "current_customer_id": agent.current_customer_id,
+                    }
+                    for agent in agents
+                ]
+            )
+
+    @override
+    async def release_agents(self, customer_ids: list[str]) -> list[str]:
+        if not customer_ids:
+            return []
+
+        async with self.db.session() as session:
+            result = await session.execute(_RELEASE_AGENTS, {"customer_ids": customer_ids})
+            return list(result.scalars().all())
+
+class SQLAlchemyOutboxRepository(OutboxRepository):
+    db: Database
+
+    def __init__(self, database: Database):
+        self.db = database
+
+    @override
+    async def add_many(self, messages: list[OutboxMessage]) -> int:
+        if not messages:
+            return 0
+
+        async with self.db.session() as session:
+            result = await session.execute(
+                _insert(self.db, OutboxMessageModel)
+                .values([
+                    {
+                        "dedup_key": outbox_message.dedup_key,
+                        "message_id": str(outbox_message.message.message_id),
+                        "sender_id": outbox_message.message.sender_id,
+                        "recipient_id": outbox_message.message.recipient_id,
+                        "content": outbox_message.message.content,
+                        "message_type": outbox_message.message.message_type,
+                        "message_metadata": outbox_message.message.metadata,
+                        "status": OutboxStatus.PENDING,
+                        "attempts": 0,
+                        "available_at": datetime.now(timezone.utc),
+                    }
+                    for outbox_message in messages
+                ])
+                .on_conflict_do_nothing(index_elements=[OutboxMessageModel.dedup_key])
+                .returning(OutboxMessageModel.id)
+            )
+            inserted = len(result.all())
+            return inserted
+
+    @override
+    async def claim_batch(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        now = datetime.now(timezone.utc)
+        async with self.db.session() as session:
+            result = await session.execute(
+                _CLAIM_OUTBOX,
+                {"now": now, "limit": limit, "lease_until": now + timedelta(seconds=lease_seconds)}
+            )
+            db_messages = sorted(result.scalars().all(), key=lambda db_message: db_message.id)
+
+            return [
+                OutboxMessage(
+                    dedup_key=db_message.dedup_key,
+                    message=WhatsAppMessage(
+                        message_id=UUID(db_message.message_id),
+                        sender_id=db_message.sender_id,
+                        recipient_id=db_message.recipient_id,
+                        content=db_message.content,
+                        message_type=db_message.message_type,
+                        timestamp=db_message.created_at,
+                        metadata=db_message.message_metadata
+                    ),
+                    outbox_id=db_message.id,
+                    attempts=db_message.attempts
+                )
+                for db_message in db_messages
+            ]
+
+    @override
+    async def mark_sent(self, outbox_ids: list[int]) -> None:
+        if not outbox_ids:
+            return
+
+        async with self.db.session() as session:
+            _ = await session.execute(
+                _MARK_OUTBOX_SENT,
+                {"outbox_ids": outbox_ids, "now": datetime.now(timezone.utc)}
+            )
+
+    @override
+    async def mark_failed(self, outbox_id: int, error: str, retry_at: datetime | None) -> None:
+        async with self.db.session() as session:
+            _ = await session.execute(
+                _MARK_OUTBOX_FAILED,
+                {
+                    "outbox_id": outbox_id,
+                    "new_status": OutboxStatus.PENDING if retry_at else OutboxStatus.FAILED,
+                    "retry_at": retry_at or datetime.now(timezone.utc),
+                    "error": error,
+                }
+            )
+
+    @override
+    async def defer(self, outbox_id: int, retry_at: datetime) -> None:
+        async with self.db.session() as session:
+            _ = await session.execute(_DEFER_OUTBOX, {"outbox_id": outbox_id, "retry_at": retry_at})
+
+    @override
+    async def prune(self, older_than: datetime) -> int:
+        async with self.db.session() as session:
+            result = await session.execute(_PRUNE_OUTBOX, {"older_than": older_than})
+            return len(result.all())
+
+class SQLAlchemyProcessedMessageRepository(ProcessedMessageRepository):
+    db: Database
+
+    def __init__(self, database: Database):
+        self.db = database
+
+    @override
+    async def claim(self, external_ids: list[str]) -> set[str]:
+        if not external_ids:
+            return set()
+
+        # ON CONFLICT DO NOTHING + RETURNING: só voltam as linhas que este statement inseriu
+        claimed: set[str] = set()
+        async with self.db.session() as session:
+            for chunk in _chunks(list(dict.fromkeys(external_ids))):
+                result = await session.execute(
+                    _insert(self.db, ProcessedMessageModel)
+                    .values([
+                        {"external_id": external_id, "received_at": datetime.now(timezone.utc)}
+                        for external_id in chunk
+                    ])
+                    .on_conflict_do_nothing(index_elements=[ProcessedMessageModel.external_id])
+                    .returning(ProcessedMessageModel.external_id)
+                )
+                claimed.update(result.scalars().all())
+        return claimed
+
+    @override
+    async def release(self, external_ids: list[str]) -> None:
+        if not external_ids:
+            return
+
+        async with self.db.session() as session:
+            _ = await session.execute(
+                delete(ProcessedMessageModel).where(ProcessedMessageModel.external_id.in_(external_ids))
+            )
+
+    @override
+    async def prune(self, older_than: datetime) -> int:
+        async with self.db.session() as session:
+            result = await session.execute(
+                delete(ProcessedMessageModel)
+                .where(ProcessedMessageModel.received_at < older_than)
+                .returning(ProcessedMessageModel.external_id)
+            )
+            return len(result.all())
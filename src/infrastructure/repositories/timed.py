@@ -0,0 +1,191 @@
+from contextlib import AbstractContextManager
+from datetime import datetime
+from typing import override
+
+from src.domain.entities import Agent, Customer, Department
+from src.domain.messages import OutboxMessage
+from src.domain.repositories import AgentRepository, CustomerRepository, OutboxRepository, ProcessedMessageRepository
+from ..metrics.registry import REPOSITORY_SECONDS, Metrics
+
+# Decorators que medem cada método do repositório em whatsapp_repository_seconds{method="<repositório>.<método>"}.
+# Ficam logo acima do backend, abaixo dos caches: só contam as chamadas que chegam ao armazenamento.
+
+
+class _Timed:
+    metrics: Metrics
+    name: str
+
+    def __init__(self, metrics: Metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def _span(self, method: str) -> AbstractContextManager[None]:
+        stage = f"{self.name}.{method}"
+        return self.metrics.span(stage, REPOSITORY_SECONDS, method=stage)
+
+
+class TimedCustomerRepository(_Timed, CustomerRepository):
+    inner: CustomerRepository
+
+    def __init__(self, inner: CustomerRepository, metrics: Metrics, name: str = "customers"):
+        super().__init__(metrics, name)
+        self.inner = inner
+
+    @override
+    async def add(self, customer: Customer) -> None:
+        with self._span("add"):
+            await self.inner.add(customer)
+
+    @override
+    async def get(self, customer_id: str) -> Customer | None:
+        with self._span("get"):
+            return await self.inner.get(customer_id)
+
+    @override
+    async def get_many(self, customer_ids: list[str]) -> dict[str, Customer]:
+        with self._span("get_many"):
+            return await self.inner.get_many(customer_ids)
+
+    @override
+    async def update(self, customer: Customer) -> None:
+        with self._span("update"):
+            await self.inner.update(customer)
+
+    @override
+    async def update_many(self, customers: list[Customer]) -> None:
+        with self._span("update_many"):
+            await self.inner.update_many(customers)
+
+    @override
+    async def touch_last_interaction(self, customer_id: str, now: datetime) -> Customer | None:
+        with self._span("touch_last_interaction"):
+            return await self.inner.touch_last_interaction(customer_id, now)
+
+    @override
+    async def get_waiting_customers(self, department: Department) -> list[Customer]:
+        with self._span("get_waiting_customers"):
+            return await self.inner.get_waiting_customers(department)
+
+    @override
+    async def claim_next_waiting(self, department: Department, agent_id: str) -> Customer | None:
+        with self._span("claim_next_waiting"):
+            return await self.inner.claim_next_waiting(department, agent_id)
+
+    @override
+    async def list_active_customers(self) -> list[Customer]:
+        with self._span("list_active_customers"):
+            return await self.inner.list_active_customers()
+
+    @override
+    async def expire_conversations(self, customer_ids: list[str], now: datetime) -> list[Customer]:
+        with self._span("expire_conversations"):
+            return await self.inner.expire_conversations(customer_ids, now)
+
+
+class TimedAgentRepository(_Timed, AgentRepository):
+    inner: AgentRepository
+
+    def __init__(self, inner: AgentRepository, metrics: Metrics, name: str = "agents"):
+        super().__init__(metrics, name)
+        self.inner = inner
+
+    @override
+    async def get_available_agent(self, department: Department) -> Agent | None:
+        with self._span("get_available_agent"):
+            return await self.inner.get_available_agent(department)
+
+    @override
+    async def update_agent_status(self, agent_id: str, is_available: bool, current_customer_id: str | None = None) -> None:
+        with self._span("update_agent_status"):
+            await self.inner.update_agent_status(agent_id, is_available, current_customer_id)
+
+    @override
+    async def update_agents_status(self, agent_ids: list[str], is_available: bool) -> list[str]:
+        with self._span("update_agents_status"):
+            return await self.inner.update_agents_status(agent_ids, is_available)
+
+    @override
+    async def update_many(self, agents: list[Agent]) -> None:
+        with self._span("update_many"):
+            await self.inner.update_many(agents)
+
+    @override
+    async def get_by_id(self, agent_id: str) -> Agent | None:
+        with self._span("get_by_id"):
+            return await self.inner.get_by_id(agent_id)
+
+    @override
+    async def get_many(self, agent_ids: list[str]) -> dict[str, Agent]:
+        with self._span("get_many"):
+            return await self.inner.get_many(agent_ids)
+
+    @override
+    async def list_agents(self) -> list[Agent]:
+        with self._span("list_agents"):
+            return await self.inner.list_agents()
+
+    @override
+    async def release_agents(self, customer_ids: list[str]) -> list[str]:
+        with self._span("release_agents"):
+            return await self.inner.release_agents(customer_ids)
+
+
+class TimedOutboxRepository(_Timed, OutboxRepository):
+    inner: OutboxRepository
+
+    def __init__(self, inner: OutboxRepository, metrics: Metrics, name: str = "outbox"):
+        super().__init__(metrics, name)
+        self.inner = inner
+
+    @override
+    async def add_many(self, messages: list[OutboxMessage]) -> int:
+        with self._span("add_many"):
+            return await self.inner.add_many(messages)
+
+    @override
+    async def claim_batch(self, limit: int, lease_seconds: float) -> list[OutboxMessage]:
+        with self._span("claim_batch"):
+            return await self.inner.claim_batch(limit, lease_seconds)
+
+    @override
+    async def mark_sent(self, outbox_ids: list[int]) -> None:
+        with self._span("mark_sent"):
+            await self.inner.mark_sent(outbox_ids)
+
+    @override
+    async def mark_failed(self, outbox_id: int, error: str, retry_at: datetime | None) -> None:
+        with self._span("mark_failed"):
+            await self.inner.mark_failed(outbox_id, error, retry_at)
+
+    @override
+    async def defer(self, outbox_id: int, retry_at: datetime) -> None:
+        with self._span("defer"):
+            await self.inner.defer(outbox_id, retry_at)
+
+    @override
+    async def prune(self, older_than: datetime) -> int:
+        with self._span("prune"):
+            return await self.inner.prune(older_than)
+
+
+class TimedProcessedMessageRepository(_Timed, ProcessedMessageRepository):
+    inner: ProcessedMessageRepository
+
+    def __init__(self, inner: ProcessedMessageRepository, metrics: Metrics, name: str = "processed_messages"):
+        super().__init__(metrics, name)
+        self.inner = inner
+
+    @override
+    async def claim(self, external_ids: list[str]) -> set[str]:
+        with self._span("claim"):
+            return await self.inner.claim(external_ids)
+
+    @override
+    async def release(self, external_ids: list[str]) -> None:
+        with self._span("release"):
+            await self.inner.release(external_ids)
+
+    @override
+    async def prune(self, older_than: datetime) -> int:
+        with self._span("prune"):
+            return await self.inner.prune(older_than)
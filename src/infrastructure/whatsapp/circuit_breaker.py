@@ -0,0 +1,157 @@
+import time
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from enum import Enum
+
+
+class CircuitState(Enum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+StateListener = Callable[[CircuitState, CircuitState], None]
+
+
+@dataclass
+class CircuitBreakerStats:
+    state: CircuitState
+    consecutive_failures: int
+    opened: int
+    half_opened: int
+    closed: int
+    rejected: int
+    successes: int
+    failures: int
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker com três estados:
+    - CLOSED: requisições passam normalmente; failure_threshold falhas seguidas abrem o circuito
+    - OPEN: requisições são recusadas até recovery_timeout segundos depois da abertura
+    - HALF_OPEN: até half_open_max_calls requisições de teste passam; success_threshold
+      sucessos fecham o circuito e qualquer falha o abre novamente
+
+    As vagas de teste ficam ocupadas até o fim do bloco de request(), qualquer que seja o desfecho
+    da requisição (sucesso, falha, exceção ou cancelamento).
+    """
+
+    name: str
+    failure_threshold: int
+    recovery_timeout: float
+    half_open_max_calls: int
+    success_threshold: int
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        success_threshold: int = 1,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self.success_threshold = success_threshold
+        self._state = CircuitState.CLOSED
+        self._opened_at = 0.0
+        self._consecutive_failures = 0
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        # Muda a cada transição: vagas ocupadas num HALF_OPEN anterior não são devolvidas ao atual
+        self._generation = 0
+        self._listeners: list[StateListener] = []
+        self._transitions = {state: 0 for state in CircuitState}
+        self._rejected = 0
+        self._successes = 0
+        self._failures = 0
+
+    @property
+    def state(self) -> CircuitState:
+        if self._state == CircuitState.OPEN and time.monotonic() - self._opened_at >= self.recovery_timeout:
+            self._transition(CircuitState.HALF_OPEN)
+        return self._state
+
+    def add_listener(self, listener: StateListener) -> None:
+        self._listeners.append(listener)
+
+    @contextmanager
+    def request(self) -> Generator[bool, None, None]:
+        """
+        Indica se a requisição pode ser feita. No HALF_OPEN, a vaga de teste ocupada
+        é devolvida ao sair do bloco.
+        """
+        allowed = self.allow_request()
+        probe = allowed and self._state == CircuitState.HALF_OPEN
+        generation = self._generation
+        try:
+            yield allowed
+        finally:
+            if probe and generation == self._generation:
+                self._half_open_calls = max(self._half_open_calls - 1, 0)
+
+    def allow_request(self) -> bool:
+        """
+        Verifica e, no HALF_OPEN, ocupa uma vaga de teste. Prefira request(), que a devolve.
+        """
+        state = self.state
+
+        if state == CircuitState.CLOSED:
+            return True
+
+        if state == CircuitState.HALF_OPEN and self._half_open_calls < self.half_open_max_calls:
+            self._half_open_calls += 1
+            return True
+
+        self._rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        self._successes += 1
+        self._consecutive_failures = 0
+
+        if self._state == CircuitState.HALF_OPEN:
+            self._half_open_successes += 1
+            if self._half_open_successes >= self.success_threshold:
+                self._transition(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._consecutive_failures += 1
+
+        if self._state == CircuitState.HALF_OPEN:
+            self._transition(CircuitState.OPEN)
+        elif self._state == CircuitState.CLOSED and self._consecutive_failures >= self.failure_threshold:
+            self._transition(CircuitState.OPEN)
+
+    def stats(self) -> CircuitBreakerStats:
+        return CircuitBreakerStats(
+            state=self.state,
+            consecutive_failures=self._consecutive_failures,
+            opened=self._transitions[CircuitState.OPEN],
+            half_opened=self._transitions[CircuitState.HALF_OPEN],
+            closed=self._transitions[CircuitState.CLOSED],
+            rejected=self._rejected,
+            successes=self._successes,
+            failures=self._failures,
+        )
+
+    def _transition(self, new_state: CircuitState) -> None:
+        old_state = self._state
+        if old_state == new_state:
+            return
+
+        self._state = new_state
+        self._transitions[new_state] += 1
+        self._generation += 1
+        self._half_open_calls = 0
+        self._half_open_successes = 0
+        if new_state == CircuitState.OPEN:
+            self._opened_at = time.monotonic()
+
+        for listener in self._listeners:
+            listener(old_state, new_state)
@@ -6,7 +6,37 @@ class WhatsAppConfig:
     access_token: str
     api_version: str = "v18.0"
     base_url: str = "https://graph.facebook.com"
+    # Throughput da Cloud API por número de telefone: 80 msg/s no padrão, até 1000 msg/s após upgrade
+    messages_per_second: float = 80.0
+    # Limite por par empresa/usuário: 1 mensagem a cada 6 segundos, com rajada de até 45
+    recipient_messages_per_second: float = 1 / 6
+    recipient_burst: int = 45
+    # Espera máxima (s) pelo limite do destinatário; acima disso o envio falha com RecipientThrottledError
+    # e volta para a fila em vez de ocupar uma vaga de envio esperando
+    max_recipient_wait: float = 1.0
+    max_backoff: float = 30.0
+    # Pool de conexões HTTP com a Graph API (um único host)
+    max_connections: int = 32
+    keepalive_timeout: float = 60.0
+    dns_cache_ttl: int = 300
+    connect_timeout: float = 5.0
+    request_timeout: float = 30.0
+    # Conexões abertas no start(), para que os primeiros envios não paguem o handshake TLS
+    prewarm_connections: int = 4
+    # Tempo máximo que close() espera os envios em andamento
+    shutdown_timeout: float = 10.0
+    # Mídias repassadas recentemente (media ID recebido -> ID aceito no envio)
+    media_cache_size: int = 1024
+    # Tamanho de cada pedaço lido do download e escrito no upload durante o repasse de uma mídia
+    media_chunk_size: int = 64 * 1024
 
     @property
     def api_url(self) -> str:
-        return f"{self.base_url}/{self.api_version}/{self.phone_number_id}/messages"
\ No newline at end of file
+        return f"{self.base_url}/{self.api_version}/{self.phone_number_id}/messages"
+
+    @property
+    def media_upload_url(self) -> str:
+        return f"{self.base_url}/{self.api_version}/{self.phone_number_id}/media"
+
+    def media_url(self, media_id: str) -> str:
+        return f"{self.base_url}/{self.api_version}/{media_id}"
@@ -1,4 +1,21 @@
+from src.domain.interfaces.messaging import SendThrottledError
+
+
 class WhatsAppAPIError(Exception):
-    def __init__(self, message: str, status_code: int | None = None):
+    def __init__(self, message: str, status_code: int | None = None, error_code: int | None = None):
         self.status_code = status_code
-        super().__init__(message)
\ No newline at end of file
+        # error.code do corpo da resposta da Graph API
+        self.error_code = error_code
+        super().__init__(message)
+
+
+class CircuitOpenError(WhatsAppAPIError):
+    def __init__(self, circuit: str):
+        self.circuit = circuit
+        super().__init__(f"Circuit open for {circuit}, request not sent")
+
+
+class RecipientThrottledError(SendThrottledError):
+    def __init__(self, recipient_id: str, retry_after: float):
+        self.recipient_id = recipient_id
+        super().__init__(f"Recipient {recipient_id} is rate limited for {retry_after:.1f}s, send deferred", retry_after)
@@ -0,0 +1,188 @@
+import asyncio
+import logging
+import mimetypes
+from collections import OrderedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import cast
+
+import aiohttp
+from aiohttp.payload import AsyncIterablePayload
+
+from src.domain.messages import MessageType, WhatsAppMessage
+from .config import WhatsAppConfig
+from .exceptions import WhatsAppAPIError
+
+logger = logging.getLogger(__name__)
+
+MEDIA_TYPES = {MessageType.IMAGE, MessageType.AUDIO, MessageType.VIDEO, MessageType.DOCUMENT}
+
+# Erros da Cloud API ao enviar com um media ID que este número não pode usar: parâmetro inválido,
+# valor de parâmetro inválido e erro de upload da mídia
+MEDIA_REJECTED_ERROR_CODES = {100, 131009, 131053}
+
+
+def media_id(message: WhatsAppMessage) -> str | None:
+    """media ID recebido no webhook, para mensagens de mídia"""
+    if message.message_type not in MEDIA_TYPES:
+        return None
+    value = message.metadata.get("media_id")
+    return value if isinstance(value, str) and value else None
+
+
+@dataclass
+class MediaRelayStats:
+    cached: int
+    capacity: int
+    hits: int
+    reused: int
+    uploads: int
+    uploaded_bytes: int
+    failures: int
+
+
+class MediaRelay:
+    """
+    Repasse de mídias recebidas (imagem, áudio, vídeo, documento) para outro destinatário.
+
+    O envio tenta primeiro o próprio media ID recebido. Se a Graph API o recusar, a mídia é baixada
+    do endpoint de mídia e enviada de novo ao /media em streaming: cada pedaço do download é escrito
+    no upload (multipart com transfer-encoding chunked), sem guardar o arquivo em memória ou em disco.
+    A memória fica limitada ao buffer de leitura do aiohttp e a um chunk_size por repasse em andamento.
+
+    Um LRU guarda o ID aceito para cada mídia repassada recentemente, para que reenvios e
+    encaminhamentos repetidos não repitam a tentativa recusada nem o upload.
+    """
+
+    config: WhatsAppConfig
+
+    def __init__(self, config: WhatsAppConfig):
+        self.config = config
+        self._relayed: OrderedDict[str, str] = OrderedDict()
+        # Um upload por mídia: repasses simultâneos da mesma mídia esperam o que já está em andamento
+        self._uploads: dict[str, asyncio.Task[str]] = {}
+        self._hits = 0
+        self._reused = 0
+        self._uploads_done = 0
+        self._uploaded_bytes = 0
+        self._failures = 0
+
+    def lookup(self, source_id: str) -> str | None:
+        relayed = self._relayed.get(source_id)
+        if relayed is not None:
+            self._relayed.move_to_end(source_id)
+            self._hits += 1
+        return relayed
+
+    def remember(self, source_id: str, relayed_id: str) -> None:
+        if relayed_id == source_id and source_id not in self._relayed:
+            self._reused += 1
+        self._relayed[source_id] = relayed_id
+        self._relayed.move_to_end(source_id)
+        while len(self._relayed) > self.config.media_cache_size:
+            _ = self._relayed.popitem(last=False)
+
+    def forget(self, source_id: str) -> None:
+        _ = self._relayed.pop(source_id, None)
+
+    async def reupload(
+        self,
+        session: aiohttp.ClientSession,
+        source_id: str,
+        mime_type: str | None = None,
+        filename: str | None = None
+    ) -> str:
+        """
+        Baixa a mídia source_id e a envia de novo ao /media deste número, em streaming.
+        Retorna o novo media ID, que fica no LRU.
+        """
+        task = self._uploads.get(source_id)
+        if task is None:
+            task = asyncio.create_task(self._reupload(session, source_id, mime_type, filename))
+            self._uploads[source_id] = task
+            task.add_done_callback(lambda _: self._uploads.pop(source_id, None))
+        # shield: o cancelamento de quem espera não interrompe o upload dos demais
+        return await asyncio.shield(task)
+
+    def stats(self) -> MediaRelayStats:
+        return MediaRelayStats(
+            cached=len(self._relayed),
+            capacity=self.config.media_cache_size,
+            hits=self._hits,
+            reused=self._reused,
+            uploads=self._uploads_done,
+            uploaded_bytes=self._uploaded_bytes,
+            failures=self._failures,
+        )
+
+    async def _reupload(
+        self,
+        session: aiohttp.ClientSession,
+        source_id: str,
+        mime_type: str | None,
+        filename: str | None
+    ) -> str:
+        try:
+            async with session.get(self.config.media_url(source_id)) as response:
+                info = await response.json()
+                if response.status != 200:
+                    raise _api_error("Media lookup failed", response.status, info)
+
+            url = info.get("url")
+            if not isinstance(url, str) or not url:
+                raise WhatsAppAPIError("Media lookup returned no download URL", response.status)
+            content_type: str = info.get("mime_type") or mime_type or "application/octet-stream"
+            filename = filename or f"{source_id}{mimetypes.guess_extension(content_type) or ''}"
+
+            async with session.get(url) as download:
+                if download.status != 200:
+                    raise WhatsAppAPIError("Media download failed", download.status)
+
+                with aiohttp.MultipartWriter("form-data") as form:
+                    form.append("whatsapp").set_content_disposition("form-data", name="messaging_product")
+                    form.append(content_type).set_content_disposition("form-data", name="type")
+                    file = form.append_payload(AsyncIterablePayload(self._chunks(download), content_type=content_type))
+                    file.set_content_disposition("form-data", name="file", filename=filename)
+
+                # O Content-Type padrão da sessão é JSON; o multipart leva o boundary no próprio header
+                async with session.post(
+                    self.config.media_upload_url,
+                    data=form,
+                    headers={"Content-Type": form.content_type}
+                ) as upload:
+                    result = await upload.json()
+                    if upload.status != 200:
+                        raise _api_error("Media upload failed", upload.status, result)
+
+            relayed_id = result.get("id")
+            if not isinstance(relayed_id, str) or not relayed_id:
+                raise WhatsAppAPIError("Media upload returned no media ID", upload.status)
+        except (aiohttp.ClientError, TimeoutError) as e:
+            self._failures += 1
+            raise WhatsAppAPIError(f"Network error while relaying media: {str(e)}")
+        except WhatsAppAPIError:
+            self._failures += 1
+            raise
+
+        self._uploads_done += 1
+        self.remember(source_id, relayed_id)
+        logger.info("Media re-uploaded", extra={"source_id": source_id, "media_id": relayed_id, "mime_type": content_type})
+        return relayed_id
+
+    async def _chunks(self, download: aiohttp.ClientResponse) -> AsyncIterator[bytes]:
+        async for chunk in download.content.iter_chunked(self.config.media_chunk_size):
+            self._uploaded_bytes += len(chunk)
+            yield chunk
+
+
+def _api_error(prefix: str, status: int, body: object) -> WhatsAppAPIError:
+    error = cast(dict[str, object], body).get("error") if isinstance(body, dict) else None
+    if not isinstance(error, dict):
+        return WhatsAppAPIError(prefix, status)
+    details = cast(dict[str, object], error)
+    code = details.get("code")
+    return WhatsAppAPIError(
+        f"{prefix}: {details.get('message', 'Unknown error')}",
+        status,
+        code if isinstance(code, int) else None
+    )
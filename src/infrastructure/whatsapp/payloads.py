@@ -0,0 +1,87 @@
+from collections.abc import Callable
+from typing import TypedDict
+
+from src.domain.messages import MessageType, WhatsAppMessage
+from ..json_encoding import JsonEncoder, default_json_encoder, stdlib_json_encoder
+
+
+class WhatsAppButton(TypedDict):
+    id: str
+    title: str
+
+
+# Fragmentos fixos dos corpos, já em bytes: por mensagem só o destinatário e o conteúdo são codificados
+_RECIPIENT = b'{"messaging_product":"whatsapp","recipient_type":"individual","to":'
+_TEXT_BODY = b',"type":"text","text":{"body":'
+_TEXT_END = b"}}"
+_BUTTON_BODY = b',"type":"interactive","interactive":{"type":"button","body":{"text":'
+_BUTTON_ACTION = b'},"action":{"buttons":'
+_BUTTON_END = b"}}}"
+_MEDIA_BODY = {
+    message_type: f',"type":"{message_type.value}","{message_type.value}":{{"id":'.encode()
+    for message_type in (MessageType.IMAGE, MessageType.AUDIO, MessageType.VIDEO, MessageType.DOCUMENT)
+}
+_CAPTION = b',"caption":'
+_FILENAME = b',"filename":'
+_FALLBACK = _TEXT_BODY + stdlib_json_encoder("Desculpe, algo deu errado") + _TEXT_END
+
+
+class PayloadTemplates:
+    """
+    Corpos JSON do endpoint /messages da Cloud API, montados com um template por MessageType.
+    Mídias são enviadas pelo metadata["media_id"] (ver MediaRelay); sem ele, e para tipos sem template,
+    vai a mensagem de erro padrão.
+    """
+
+    encoder: JsonEncoder
+
+    def __init__(self, encoder: JsonEncoder | None = None):
+        self.encoder = encoder or default_json_encoder()
+        self._templates: dict[MessageType, Callable[[WhatsAppMessage], bytes]] = {
+            MessageType.TEXT: self._text,
+            MessageType.BUTTON_RESPONSE: self._buttons,
+            **{message_type: self._media for message_type in _MEDIA_BODY},
+        }
+
+    def encode(self, message: WhatsAppMessage) -> bytes:
+        template = self._templates.get(message.message_type)
+        if template is None:
+            return self._fallback(message)
+        return template(message)
+
+    def _fallback(self, message: WhatsAppMessage) -> bytes:
+        return b"".join((_RECIPIENT, self.encoder(message.recipient_id), _FALLBACK))
+
+    def _text(self, message: WhatsAppMessage) -> bytes:
+        encode = self.encoder
+        return b"".join((_RECIPIENT, encode(message.recipient_id), _TEXT_BODY, encode(message.content), _TEXT_END))
+
+    def _buttons(self, message: WhatsAppMessage) -> bytes:
+        buttons = message.metadata.get("buttons", [])
+        buttons_list: list[WhatsAppButton] = buttons if isinstance(buttons, list) else []
+        encode = self.encoder
+        return b"".join((
+            _RECIPIENT,
+            encode(message.recipient_id),
+            _BUTTON_BODY,
+            encode(message.content),
+            _BUTTON_ACTION,
+            encode([{"type": "reply", "reply": {"id": btn["id"], "title": btn["title"]}} for btn in buttons_list]),
+            _BUTTON_END,
+        ))
+
+    def _media(self, message: WhatsAppMessage) -> bytes:
+        media_id = message.metadata.get("media_id")
+        if not isinstance(media_id, str) or not media_id:
+            return self._fallback(message)
+
+        encode = self.encoder
+        parts = [_RECIPIENT, encode(message.recipient_id), _MEDIA_BODY[message.message_type], encode(media_id)]
+        # Áudio não aceita legenda
+        if message.content and message.message_type != MessageType.AUDIO:
+            parts += (_CAPTION, encode(message.content))
+        filename = message.metadata.get("filename")
+        if message.message_type == MessageType.DOCUMENT and isinstance(filename, str) and filename:
+            parts += (_FILENAME, encode(filename))
+        parts.append(_TEXT_END)
+        return b"".join(parts)
@@ -0,0 +1,168 @@
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from .exceptions import RecipientThrottledError
+
+
+class TokenBucket:
+    """
+    Token bucket com reserva: cada chamada reserva um token imediatamente (o saldo pode
+    ficar negativo) e recebe o tempo que precisa esperar. Assim as chamadas concorrentes
+    são atendidas na ordem em que chegaram, sem precisar de lock.
+    """
+
+    rate: float
+    capacity: float
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def available(self) -> float:
+        self._refill(time.monotonic())
+        return self.tokens
+
+    def reserve(self) -> float:
+        """
+        Reserva um token e retorna quantos segundos esperar antes de usá-lo.
+        """
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        if self.tokens >= 0:
+            return 0.0
+        return -self.tokens / self.rate
+
+    def cancel(self) -> None:
+        """Devolve o token de uma reserva que não vai ser usada"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    def penalize(self, seconds: float) -> None:
+        """
+        Esvazia o bucket para que nenhum token fique disponível pelos próximos `seconds`.
+        Usado quando a API responde 429 com Retry-After.
+        """
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+@dataclass
+class RateLimiterStats:
+    global_rate: float
+    global_capacity: float
+    global_tokens: float
+    at_cap: bool
+    acquired: int
+    throttled: int
+    recipient_throttled: int
+    recipient_deferred: int
+    penalties: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+    tracked_recipients: int
+
+
+class RateLimiter:
+    """
+    Limitador do lado do cliente para a Cloud API: um bucket global para o throughput
+    do número de telefone e um bucket por destinatário para o limite por par de usuários.
+    """
+
+    max_tracked_recipients: int
+
+    def __init__(
+        self,
+        messages_per_second: float,
+        burst: float | None = None,
+        recipient_messages_per_second: float = 1 / 6,
+        recipient_burst: float = 45,
+        max_tracked_recipients: int = 10_000,
+    ):
+        self.global_bucket = TokenBucket(messages_per_second, burst if burst is not None else messages_per_second)
+        self.recipient_rate = recipient_messages_per_second
+        self.recipient_burst = recipient_burst
+        self.max_tracked_recipients = max_tracked_recipients
+        self._recipients: OrderedDict[str, TokenBucket] = OrderedDict()
+        self._acquired = 0
+        self._throttled = 0
+        self._recipient_throttled = 0
+        self._recipient_deferred = 0
+        self._penalties = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def _recipient_bucket(self, recipient_id: str) -> TokenBucket:
+        bucket = self._recipients.get(recipient_id)
+        if bucket is None:
+            bucket = TokenBucket(self.recipient_rate, self.recipient_burst)
+            self._recipients[recipient_id] = bucket
+            if len(self._recipients) > self.max_tracked_recipients:
+                _ = self._recipients.popitem(last=False)
+        else:
+            self._recipients.move_to_end(recipient_id)
+        return bucket
+
+    async def acquire(self, recipient_id: str, max_recipient_wait: float | None = None) -> float:
+        """
+        Aguarda até que o envio para o destinatário seja permitido pelos dois buckets.
+        Retorna o tempo total de espera em segundos.
+        Se o destinatário exigir uma espera maior que max_recipient_wait, nada é reservado e
+        RecipientThrottledError informa em quanto tempo tentar de novo.
+        """
+        waited = 0.0
+
+        recipient_bucket = self._recipient_bucket(recipient_id)
+        recipient_wait = recipient_bucket.reserve()
+        if max_recipient_wait is not None and recipient_wait > max_recipient_wait:
+            recipient_bucket.cancel()
+            self._recipient_deferred += 1
+            raise RecipientThrottledError(recipient_id, recipient_wait)
+
+        if recipient_wait > 0:
+            self._recipient_throttled += 1
+            await asyncio.sleep(recipient_wait)
+            waited += recipient_wait
+
+        global_wait = self.global_bucket.reserve()
+        if global_wait > 0:
+            await asyncio.sleep(global_wait)
+            waited += global_wait
+
+        self._acquired += 1
+        if waited > 0:
+            self._throttled += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        return waited
+
+    def penalize(self, seconds: float, recipient_id: str | None = None) -> None:
+        self._penalties += 1
+        if recipient_id is not None:
+            self._recipient_bucket(recipient_id).penalize(seconds)
+        else:
+            self.global_bucket.penalize(seconds)
+
+    def stats(self) -> RateLimiterStats:
+        tokens = self.global_bucket.available()
+        return RateLimiterStats(
+            global_rate=self.global_bucket.rate,
+            global_capacity=self.global_bucket.capacity,
+            global_tokens=tokens,
+            at_cap=tokens < 1,
+            acquired=self._acquired,
+            throttled=self._throttled,
+            recipient_throttled=self._recipient_throttled,
+            recipient_deferred=self._recipient_deferred,
+            penalties=self._penalties,
+            total_wait_seconds=self._total_wait,
+            max_wait_seconds=self._max_wait,
+            tracked_recipients=len(self._recipients),
+        )
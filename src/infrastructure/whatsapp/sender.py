@@ -1,39 +1,220 @@
-from typing import override, TypedDict
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from collections import deque
+from dataclasses import dataclass, replace
+from types import TracebackType
+from typing import Self, override
 import aiohttp
 import asyncio
 import logging
+import random
+import time
 
-from src.domain.interfaces.messaging import MessageSender
-from src.domain.messages import WhatsAppMessage, MessageType
+from src.domain.interfaces.messaging import MessageSender, SendResult
+from src.domain.messages import WhatsAppMessage
+from ..json_encoding import JsonEncoder
+from ..metrics.registry import GRAPH_API_SECONDS, Metrics, MetricsConfig
+from .circuit_breaker import CircuitBreaker, CircuitState
 from .config import WhatsAppConfig
-from .exceptions import WhatsAppAPIError
+from .exceptions import CircuitOpenError, WhatsAppAPIError
+from .media import MEDIA_REJECTED_ERROR_CODES, MediaRelay, media_id
+from .payloads import PayloadTemplates
+from .rate_limiter import RateLimiter
 
 logger = logging.getLogger(__name__)
 
-class WhatsAppButton(TypedDict):
-    id: str
-    title: str
+# Código de erro da Cloud API para o limite por par empresa/usuário
+PAIR_RATE_LIMIT_ERROR_CODE = 131056
+
+# Respostas que indicam degradação da Graph API e contam como falha no circuit breaker
+CIRCUIT_FAILURE_STATUSES = {408, 500, 502, 503, 504}
+
+@dataclass
+class ConnectionPoolStats:
+    """
+    Limites do pool e o que os hooks do TraceConfig observam. O aiohttp não expõe
+    quantas conexões estão ociosas ou em uso; in_flight_sends é o que mais se aproxima.
+    """
+    limit: int
+    limit_per_host: int
+    waiting: int
+    created: int
+    reused: int
+    prewarmed: int
+    in_flight_sends: int
 
 
 class WhatsAppMessageSender(MessageSender):
     config: WhatsAppConfig
     max_retries: int
     retry_delay: float
+    max_concurrency: int
+    rate_limiter: RateLimiter
+    circuit_breaker: CircuitBreaker
+    defer_when_open: bool
+    metrics: Metrics
+    payloads: PayloadTemplates
+    media: MediaRelay
 
-    def __init__(self, config: WhatsAppConfig, max_retries: int = 3, retry_delay: float = 1.0):
+    def __init__(
+        self,
+        config: WhatsAppConfig,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        max_concurrency: int = 8,
+        rate_limiter: RateLimiter | None = None,
+        circuit_breaker: CircuitBreaker | None = None,
+        defer_when_open: bool = False,
+        max_deferred: int = 10_000,
+        metrics: Metrics | None = None,
+        json_encoder: JsonEncoder | None = None
+    ):
         self.config = config
         self.max_retries = max_retries
         self.retry_delay = retry_delay
+        self.max_concurrency = max_concurrency
+        self.rate_limiter = rate_limiter or RateLimiter(
+            messages_per_second=config.messages_per_second,
+            recipient_messages_per_second=config.recipient_messages_per_second,
+            recipient_burst=config.recipient_burst
+        )
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(config.api_url)
+        self.circuit_breaker.add_listener(self._on_circuit_change)
+        # Com o circuito aberto as mensagens ficam aqui e são reenviadas quando ele fechar
+        self.defer_when_open = defer_when_open
+        self.deferred: deque[WhatsAppMessage] = deque(maxlen=max_deferred)
+        self.deferred_dropped = 0
+        # Latência por status HTTP da Graph API, retries e espera no rate limiter
+        self.metrics = metrics or Metrics(MetricsConfig(enabled=False))
+        # Corpos das requisições já em bytes (orjson quando instalado), sem o json.dumps do aiohttp
+        self.payloads = PayloadTemplates(json_encoder)
+        # Encaminhamento de mídias recebidas: reaproveita o media ID ou refaz o upload em streaming
+        self.media = MediaRelay(config)
+        self._flush_task: asyncio.Task[list[SendResult]] | None = None
         self.session: aiohttp.ClientSession | None = None
-    
-    async def __aenter__(self):
-        self.session = aiohttp.ClientSession(headers=self._get_headers())
+        self._connector: aiohttp.TCPConnector | None = None
+        # Envios em andamento, esperados por close()
+        self._in_flight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._waiting = 0
+        self._created = 0
+        self._reused = 0
+        self._prewarmed = 0
+
+    async def __aenter__(self) -> Self:
+        await self.start()
         return self
-    
-    # async def __aexit__(self, exc_type, exc_val, exc_tb):
-    async def __aexit__(self):
-        if self.session:
-            await self.session.close()
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None
+    ) -> None:
+        await self.close()
+
+    async def start(self) -> None:
+        """
+        Abre a sessão HTTP com um pool de conexões keep-alive para a Graph API
+        e já estabelece config.prewarm_connections conexões.
+        """
+        if self.session is not None:
+            return
+
+        # Todas as requisições vão para o mesmo host: o limite por host é o próprio limite do pool
+        self._connector = aiohttp.TCPConnector(
+            limit=self.config.max_connections,
+            limit_per_host=self.config.max_connections,
+            keepalive_timeout=self.config.keepalive_timeout,
+            use_dns_cache=True,
+            ttl_dns_cache=self.config.dns_cache_ttl,
+            enable_cleanup_closed=True
+        )
+        trace = aiohttp.TraceConfig()
+        trace.on_connection_queued_start.append(self._on_connection_queued_start)
+        trace.on_connection_queued_end.append(self._on_connection_queued_end)
+        trace.on_connection_create_end.append(self._on_connection_create_end)
+        trace.on_connection_reuseconn.append(self._on_connection_reuseconn)
+        self.session = aiohttp.ClientSession(
+            headers=self._get_headers(),
+            connector=self._connector,
+            timeout=aiohttp.ClientTimeout(total=self.config.request_timeout, connect=self.config.connect_timeout),
+            trace_configs=[trace]
+        )
+        _ = await self.prewarm(self.config.prewarm_connections)
+
+    async def prewarm(self, connections: int) -> int:
+        """
+        Abre `connections` conexões simultâneas com a Graph API (DNS, TCP e TLS) e as devolve ao pool.
+        Falhas só são registradas: o serviço sobe mesmo com a API fora do ar.
+        Retorna quantas conexões ficaram prontas.
+        """
+        if self.session is None or connections <= 0:
+            return 0
+
+        # As requisições ficam abertas até todas conectarem, para que cada uma use uma conexão diferente
+        results = await asyncio.gather(
+            *(self.session.head(self.config.base_url, allow_redirects=False) for _ in range(connections)),
+            return_exceptions=True
+        )
+        ready = 0
+        for result in results:
+            if isinstance(result, aiohttp.ClientResponse):
+                result.release()
+                ready += 1
+            else:
+                logger.warning("Connection prewarm failed", extra={"error": str(result)})
+
+        self._prewarmed += ready
+        logger.info("Connection pool prewarmed", extra={"connections": ready, "requested": connections})
+        return ready
+
+    async def close(self, timeout: float | None = None) -> None:
+        """
+        Espera os envios em andamento (até config.shutdown_timeout) e fecha a sessão.
+        """
+        if self.session is None:
+            return
+
+        if self._flush_task is not None and not self._flush_task.done():
+            _ = await asyncio.wait({self._flush_task}, timeout=timeout or self.config.shutdown_timeout)
+
+        try:
+            _ = await asyncio.wait_for(self._idle.wait(), timeout=timeout or self.config.shutdown_timeout)
+        except TimeoutError:
+            logger.warning("Closing sender with sends still in flight", extra={"in_flight": self._in_flight})
+
+        if self.deferred:
+            logger.warning("Closing sender with deferred messages", extra={"deferred": len(self.deferred)})
+
+        session, self.session = self.session, None
+        await session.close()
+        self._connector = None
+
+    def pool_stats(self) -> ConnectionPoolStats:
+        connector = self._connector
+        return ConnectionPoolStats(
+            limit=connector.limit if connector else self.config.max_connections,
+            limit_per_host=connector.limit_per_host if connector else self.config.max_connections,
+            waiting=self._waiting,
+            created=self._created,
+            reused=self._reused,
+            prewarmed=self._prewarmed,
+            in_flight_sends=self._in_flight,
+        )
+
+    async def _on_connection_queued_start(self, *_args: object) -> None:
+        self._waiting += 1
+
+    async def _on_connection_queued_end(self, *_args: object) -> None:
+        self._waiting -= 1
+
+    async def _on_connection_create_end(self, *_args: object) -> None:
+        self._created += 1
+
+    async def _on_connection_reuseconn(self, *_args: object) -> None:
+        self._reused += 1
     
     def _get_headers(self) -> dict[str, str]:
         return {
@@ -48,100 +229,194 @@ class WhatsAppMessageSender(MessageSender):
         Retorna True se enviado com sucesso, False caso contrário.
         """
         if not self.session:
-            raise RuntimeError("WhatsAppMessageSender must be used as a context manager")
-        
-        payload = self._create_payload(message)
-        
-        for attempt in range(self.max_retries):
+            raise RuntimeError("WhatsAppMessageSender is not started; call start() or use it as a context manager")
+
+        self._in_flight += 1
+        self._idle.clear()
+        try:
+            with self.metrics.span("send"):
+                return await self._send(self.session, message)
+        finally:
+            self._in_flight -= 1
+            if not self._in_flight:
+                self._idle.set()
+
+    async def _send(self, session: aiohttp.ClientSession, message: WhatsAppMessage) -> bool:
+        source_id = media_id(message)
+        if source_id is None:
+            return await self._post(session, message, self.payloads.encode(message))
+
+        relayed_id = self.media.lookup(source_id)
+        if relayed_id is not None:
             try:
-                async with self.session.post(self.config.api_url, json=payload) as response:
-                    response_data = await response.json()
+                return await self._post(session, message, self._media_body(message, relayed_id))
+            except WhatsAppAPIError as e:
+                # ID do LRU que deixou de valer: a próxima tentativa começa do zero
+                if e.error_code in MEDIA_REJECTED_ERROR_CODES:
+                    self.media.forget(source_id)
+                raise
+
+        try:
+            sent = await self._post(session, message, self.payloads.encode(message))
+        except WhatsAppAPIError as e:
+            if e.error_code not in MEDIA_REJECTED_ERROR_CODES:
+                raise
+            logger.info(
+                "Media ID rejected, re-uploading media",
+                extra={"message_id": str(message.message_id), "media_id": source_id}
+            )
+            mime_type = message.metadata.get("mime_type")
+            filename = message.metadata.get("filename")
+            with self.metrics.span("media_reupload"):
+                relayed_id = await self.media.reupload(
+                    session,
+                    source_id,
+                    mime_type if isinstance(mime_type, str) else None,
+                    filename if isinstance(filename, str) else None
+                )
+            return await self._post(session, message, self._media_body(message, relayed_id))
+
+        if sent:
+            self.media.remember(source_id, source_id)
+        return sent
+
+    def _media_body(self, message: WhatsAppMessage, relayed_id: str) -> bytes:
+        return self.payloads.encode(replace(message, metadata={**message.metadata, "media_id": relayed_id}))
+
+    async def _post(self, session: aiohttp.ClientSession, message: WhatsAppMessage, body: bytes) -> bool:
+        for attempt in range(self.max_retries):
+            # A vaga de teste do HALF_OPEN é devolvida ao fim da tentativa, mesmo com cancelamento ou exceção
+            with self.circuit_breaker.request() as allowed:
+                if not allowed:
+                    return self._handle_open_circuit(message)
+
+                with self.metrics.span("rate_limit_wait"):
+                    _ = await self.rate_limiter.acquire(message.recipient_id, self.config.max_recipient_wait)
+
+                started = time.perf_counter()
+                try:
+                    async with session.post(self.config.api_url, data=body) as response:
+                        response_data = await response.json()
+                        self.metrics.record_span(
+                            f"graph_api.{response.status}", started, GRAPH_API_SECONDS, status=str(response.status)
+                        )
+                    
+                        if response.status in CIRCUIT_FAILURE_STATUSES:
+                            self.circuit_breaker.record_failure()
+                        else:
+                            self.circuit_breaker.record_success()
+
+                        if response.status == 200:
+                            logger.info(
+                                "Message sent successfully",
+                                extra={
+                                    "message_id": str(message.message_id),
+                                    "recipient": message.recipient_id,
+                                    "type": message.message_type.value
+                                }
+                            )
+                            return True
                     
-                    if response.status == 200:
-                        logger.info(
-                            "Message sent successfully",
+                        error_message = response_data.get("error", {}).get("message", "Unknown error")
+                        logger.error(
+                            f"Failed to send message: {error_message}",
                             extra={
                                 "message_id": str(message.message_id),
-                                "recipient": message.recipient_id,
-                                "type": message.message_type.value
+                                "status_code": response.status,
+                                "attempt": attempt + 1
                             }
                         )
-                        return True
                     
-                    error_message = response_data.get("error", {}).get("message", "Unknown error")
+                        if not self._should_retry(response.status):
+                            error_code = response_data.get("error", {}).get("code")
+                            raise WhatsAppAPIError(error_message, response.status, error_code)
+
+                        retry_after = self._parse_retry_after(response.headers.get("Retry-After"))
+                        delay = self._backoff_delay(attempt, retry_after)
+                        if attempt < self.max_retries - 1:
+                            self.metrics.count_retry(str(response.status))
+
+                        if response.status == 429:
+                            # O limitador segura esta e as próximas tentativas até o fim da penalidade
+                            error_code = response_data.get("error", {}).get("code")
+                            self.rate_limiter.penalize(
+                                delay,
+                                message.recipient_id if error_code == PAIR_RATE_LIMIT_ERROR_CODE else None
+                            )
+                        elif attempt < self.max_retries - 1:
+                            await asyncio.sleep(delay)
+                    
+                except (aiohttp.ClientError, TimeoutError) as e:
+                    self.metrics.record_span("graph_api.error", started, GRAPH_API_SECONDS, status="error")
+                    self.circuit_breaker.record_failure()
                     logger.error(
-                        f"Failed to send message: {error_message}",
-                        extra={
-                            "message_id": str(message.message_id),
-                            "status_code": response.status,
-                            "attempt": attempt + 1
-                        }
+                        f"Network error while sending message: {str(e)}",
+                        extra={"message_id": str(message.message_id), "attempt": attempt + 1}
                     )
-                    
-                    if not self._should_retry(response.status):
-                        raise WhatsAppAPIError(error_message, response.status)
-                    
-                    await asyncio.sleep(self.retry_delay * (attempt + 1))
-                    
-            except aiohttp.ClientError as e:
-                logger.error(
-                    f"Network error while sending message: {str(e)}",
-                    extra={"message_id": str(message.message_id), "attempt": attempt + 1}
-                )
-                if attempt == self.max_retries - 1:
-                    raise WhatsAppAPIError(f"Network error: {str(e)}")
-                await asyncio.sleep(self.retry_delay * (attempt + 1))
+                    if attempt == self.max_retries - 1:
+                        raise WhatsAppAPIError(f"Network error: {str(e)}")
+                    self.metrics.count_retry("network")
+                    await asyncio.sleep(self._backoff_delay(attempt))
         
         return False
     
-    def _create_payload(self, message: WhatsAppMessage) -> dict[str, object]:
-        base_payload = {
-            "messaging_product": "whatsapp",
-            "recipient_type": "individual",
-            "to": message.recipient_id,
-        }
-        
-        if message.message_type == MessageType.TEXT:
-            return {
-                **base_payload,
-                "type": "text",
-                "text": {"body": message.content}
-            }
-        
-        elif message.message_type == MessageType.BUTTON_RESPONSE:
-            buttons = message.metadata.get("buttons", [])
-            buttons_list: list[WhatsAppButton] = []
-
-            if isinstance(buttons, list):
-                buttons_list= buttons
-                
-            return {
-                **base_payload,
-                "type": "interactive",
-                "interactive": {
-                    "type": "button",
-                    "body": {"text": message.content},
-                    "action": {
-                        "buttons": [
-                            {
-                                "type": "reply",
-                                "reply": {
-                                    "id": btn["id"],
-                                    "title": btn["title"]
-                                }
-                            }
-                            for btn in buttons_list
-                        ]
-                    }
-                }
-            }
-        
-        return {
-                **base_payload,
-                "type": "text",
-                "text": {"body": "Desculpe, algo deu errado"}
-            }
-    
+    async def flush_deferred(self) -> list[SendResult]:
+        """
+        Reenvia as mensagens adiadas enquanto o circuito estava aberto.
+        """
+        messages = list(self.deferred)
+        self.deferred.clear()
+        return await self.send_messages(messages)
+
+    def _handle_open_circuit(self, message: WhatsAppMessage) -> bool:
+        if not self.defer_when_open:
+            raise CircuitOpenError(self.config.api_url)
+
+        if len(self.deferred) == self.deferred.maxlen:
+            self.deferred_dropped += 1
+        self.deferred.append(message)
+        logger.warning(
+            "Circuit open, message deferred",
+            extra={"message_id": str(message.message_id), "deferred": len(self.deferred)}
+        )
+        return False
+
+    def _on_circuit_change(self, old_state: CircuitState, new_state: CircuitState) -> None:
+        logger.warning(
+            f"Circuit breaker {old_state.value} -> {new_state.value}",
+            extra={"circuit": self.circuit_breaker.name}
+        )
+
+        if new_state == CircuitState.CLOSED and self.deferred and (self._flush_task is None or self._flush_task.done()):
+            self._flush_task = asyncio.create_task(self.flush_deferred())
+
+    def _backoff_delay(self, attempt: int, retry_after: float | None = None) -> float:
+        """
+        Backoff exponencial com full jitter, limitado a max_backoff.
+        Nunca espera menos do que o Retry-After informado pela API.
+        """
+        delay = random.uniform(0, min(self.config.max_backoff, self.retry_delay * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _parse_retry_after(self, value: str | None) -> float | None:
+        """Interpreta o header Retry-After, que pode vir em segundos ou como data HTTP"""
+        if not value:
+            return None
+
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            pass
+
+        try:
+            retry_at = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+
+        return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
     def _should_retry(self, status_code: int) -> bool:
         """Determina se deve tentar reenviar a mensagem baseado no status code"""
         return status_code in {
@@ -0,0 +1,88 @@
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import pytest
+
+from src.domain.entities import Agent
+from src.domain.repositories import AgentRepository, CustomerRepository, OutboxRepository, ProcessedMessageRepository
+from src.domain.unit_of_work import UnitOfWork
+from src.infrastructure.database.connection import Database
+from src.infrastructure.database.models import AgentModel
+from src.infrastructure.database.unit_of_work import SQLAlchemyUnitOfWork
+from src.infrastructure.memory.store import MemoryStore, MemoryStoreConfig
+from src.infrastructure.memory.unit_of_work import MemoryUnitOfWork
+from src.infrastructure.repositories.memory import (
+    MemoryAgentRepository,
+    MemoryCustomerRepository,
+    MemoryOutboxRepository,
+    MemoryProcessedMessageRepository,
+)
+from src.infrastructure.repositories.sqlalchemy import (
+    SQLAlchemyAgentRepository,
+    SQLAlchemyCustomerRepository,
+    SQLAlchemyOutboxRepository,
+    SQLAlchemyProcessedMessageRepository,
+)
+
+
+@dataclass
+class Backend:
+    """
+    Repositórios de um backend de armazenamento, para rodar os mesmos testes nos dois.
+    """
+    name: str
+    customers: CustomerRepository
+    agents: AgentRepository
+    outbox: OutboxRepository
+    processed: ProcessedMessageRepository
+    unit_of_work: Callable[[], UnitOfWork]
+    # Os agentes são cadastrados fora do serviço; cada backend tem o próprio caminho
+    add_agent: Callable[[Agent], Awaitable[None]]
+
+
+@pytest.fixture
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(params=["sqlalchemy", "memory"])
+async def backend(request: pytest.FixtureRequest, tmp_path: Path) -> AsyncIterator[Backend]:
+    if request.param == "sqlalchemy":
+        database = Database(f"sqlite+aiosqlite:///{tmp_path / 'whatsapp.db'}")
+        await database.create_tables()
+
+        async def add_agent(agent: Agent) -> None:
+            async with database.session() as session:
+                session.add(AgentModel(
+                    agent_id=agent.agent_id,
+                    department=agent.department,
+                    is_available=agent.is_available,
+                    current_customer_id=agent.current_customer_id
+                ))
+
+        yield Backend(
+            name="sqlalchemy",
+            customers=SQLAlchemyCustomerRepository(database),
+            agents=SQLAlchemyAgentRepository(database),
+            outbox=SQLAlchemyOutboxRepository(database),
+            processed=SQLAlchemyProcessedMessageRepository(database),
+            unit_of_work=lambda: SQLAlchemyUnitOfWork(database),
+            add_agent=add_agent,
+        )
+        await database.engine.dispose()
+    else:
+        store = MemoryStore(MemoryStoreConfig(path=str(tmp_path / "whatsapp.wal")))
+        store.load()
+        agents = MemoryAgentRepository(store)
+
+        yield Backend(
+            name="memory",
+            customers=MemoryCustomerRepository(store),
+            agents=agents,
+            outbox=MemoryOutboxRepository(store),
+            processed=MemoryProcessedMessageRepository(store),
+            unit_of_work=lambda: MemoryUnitOfWork(store),
+            add_agent=agents.add,
+        )
+        store.close()
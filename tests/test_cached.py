@@ -0,0 +1,65 @@
+import asyncio
+from contextvars import Context
+from dataclasses import replace
+
+import pytest
+
+from src.domain.entities import Customer, CustomerStatus, Department
+from src.infrastructure.cache import LRUCache
+from src.infrastructure.repositories.cached import CachedCustomerRepository
+from .conftest import Backend
+
+pytestmark = pytest.mark.anyio
+
+
+class Boom(Exception):
+    pass
+
+
+async def test_cache_only_holds_committed_writes(backend: Backend):
+    customers = CachedCustomerRepository(backend.customers)
+    customer = Customer("5511000000001", Department.SALES, CustomerStatus.WAITING)
+    finished = replace(customer, status=CustomerStatus.FINISHED)
+    await customers.update(customer)
+    assert customers.cache.peek(customer.customer_id) == customer
+
+    reader: asyncio.Task[Customer | None] | None = None
+    with pytest.raises(Boom):
+        async with backend.unit_of_work():
+            await customers.update(finished)
+            assert customers.cache.peek(customer.customer_id) is None
+            assert await customers.get(customer.customer_id) == finished
+            # Uma leitura de outra lane durante a transação não põe a versão antiga de volta no cache
+            reader = asyncio.create_task(customers.get(customer.customer_id), context=Context())
+            await asyncio.sleep(0.01)
+            raise Boom()
+
+    assert reader is not None and await reader == customer
+    assert customers.cache.peek(customer.customer_id) is None
+    assert await customers.get(customer.customer_id) == customer
+
+    async with backend.unit_of_work():
+        await customers.update(finished)
+        assert customers.cache.peek(customer.customer_id) is None
+
+    assert customers.cache.peek(customer.customer_id) == finished
+
+
+def test_a_load_older_than_a_write_is_not_cached():
+    cache: LRUCache[str, str] = LRUCache()
+
+    version = cache.version
+    cache.set("key", "written")
+    cache.fill("key", "loaded before the write", version)
+    assert cache.get("key") == "written"
+
+    cache.hold("key")
+    cache.fill("key", "loaded during the write", cache.version)
+    assert cache.get("key") is None
+    cache.release("key", "committed")
+    assert cache.get("key") == "committed"
+
+    cache.hold("key")
+    cache.release("key", None)
+    cache.fill("key", "loaded after the rollback", cache.version)
+    assert cache.get("key") == "loaded after the rollback"
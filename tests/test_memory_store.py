@@ -0,0 +1,179 @@
+import asyncio
+import shutil
+from contextvars import Context
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from src.domain.messages import OutboxMessage, WhatsAppMessage
+from src.infrastructure.memory.store import MemoryStore, MemoryStoreConfig
+from src.infrastructure.memory.unit_of_work import MemoryUnitOfWork
+from src.infrastructure.repositories.memory import (
+    MemoryAgentRepository,
+    MemoryCustomerRepository,
+    MemoryOutboxRepository,
+    MemoryProcessedMessageRepository,
+)
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+
+
+def open_store(path: Path, snapshot_interval: int = 10_000) -> MemoryStore:
+    store = MemoryStore(MemoryStoreConfig(path=str(path), snapshot_interval=snapshot_interval))
+    store.load()
+    return store
+
+
+def crash_copy(path: Path, target: Path) -> Path:
+    """
+    Cópia do WAL e do snapshot como estavam no disco, como se o processo tivesse caído agora.
+    """
+    target.mkdir()
+    for source in path.parent.glob(f"{path.name}*"):
+        _ = shutil.copy(source, target / source.name)
+    return target / path.name
+
+
+def customer(index: int) -> Customer:
+    return Customer(
+        customer_id=f"55110000000{index:02d}",
+        department=Department.SUPPORT,
+        status=CustomerStatus.WAITING,
+        waiting_since=NOW,
+        last_interaction=NOW,
+    )
+
+
+async def test_wal_replay_restores_every_table(tmp_path: Path):
+    path = tmp_path / "store" / "whatsapp.wal"
+    path.parent.mkdir()
+    store = open_store(path)
+    customers = MemoryCustomerRepository(store)
+    agents = MemoryAgentRepository(store)
+    outbox = MemoryOutboxRepository(store)
+
+    await agents.add(Agent("AGENT_1", Department.SUPPORT))
+    await customers.update_many([customer(1), customer(2)])
+    claimed = await customers.claim_next_waiting(Department.SUPPORT, "AGENT_1")
+    assert claimed is not None
+    await agents.update_agent_status("AGENT_1", False, claimed.customer_id)
+    _ = await outbox.add_many([
+        OutboxMessage(dedup_key="m1:0", message=WhatsAppMessage.create_system_message(claimed.customer_id, "oi"))
+    ])
+    _ = await MemoryProcessedMessageRepository(store).claim(["wamid.1"])
+
+    recovered = open_store(crash_copy(path, tmp_path / "crash"))
+
+    assert recovered.customers == store.customers
+    assert recovered.agents == store.agents
+    assert recovered.outbox == store.outbox
+    assert recovered.processed == store.processed
+    # Os índices são refeitos no replay
+    assert recovered.queues.waiting(Department.SUPPORT) == ["5511000000002"]
+    assert recovered.agent_by_customer == {claimed.customer_id: "AGENT_1"}
+    assert await MemoryOutboxRepository(recovered).add_many([
+        OutboxMessage(dedup_key="m1:0", message=WhatsAppMessage.create_system_message(claimed.customer_id, "oi"))
+    ]) == 0
+
+    recovered.close()
+    store.close()
+
+
+async def test_wal_replay_on_top_of_a_snapshot(tmp_path: Path):
+    path = tmp_path / "store" / "whatsapp.wal"
+    path.parent.mkdir()
+    store = open_store(path, snapshot_interval=3)
+    customers = MemoryCustomerRepository(store)
+
+    for index in range(5):
+        await customers.update(customer(index))
+    # O quinto commit ainda está só no WAL
+    assert store.stats().snapshots == 2
+    assert store.stats().wal_records == 2
+
+    recovered = open_store(crash_copy(path, tmp_path / "crash"))
+    assert recovered.customers == store.customers
+
+    recovered.close()
+    store.close()
+
+
+async def test_wal_replay_discards_a_torn_last_line(tmp_path: Path):
+    path = tmp_path / "store" / "whatsapp.wal"
+    path.parent.mkdir()
+    store = open_store(path)
+    customers = MemoryCustomerRepository(store)
+
+    for index in range(3):
+        await customers.update(customer(index))
+    store.close()
+
+    # As três primeiras ficam no snapshot; as seguintes, no WAL. Queda no meio da gravação
+    # da última transação: metade da linha, sem o \n
+    store = open_store(path)
+    customers = MemoryCustomerRepository(store)
+    for index in range(3, 6):
+        await customers.update(customer(index))
+    crashed = crash_copy(path, tmp_path / "crash")
+    lines = crashed.read_bytes().splitlines(keepends=True)
+    assert len(lines) == 3
+    _ = crashed.write_bytes(b"".join(lines[:2]) + lines[2][:len(lines[2]) // 2])
+
+    recovered = open_store(crashed)
+    assert sorted(recovered.customers) == [customer(index).customer_id for index in range(5)]
+
+    # O WAL recomeça limpo: novas escritas sobrevivem a outra recuperação
+    await MemoryCustomerRepository(recovered).update(customer(9))
+    again = open_store(crash_copy(crashed, tmp_path / "crash-again"))
+    assert sorted(again.customers) == sorted([customer(index).customer_id for index in range(5)] + [customer(9).customer_id])
+
+    again.close()
+    recovered.close()
+    store.close()
+
+
+async def test_rolled_back_transaction_never_reaches_the_wal(tmp_path: Path):
+    path = tmp_path / "store" / "whatsapp.wal"
+    path.parent.mkdir()
+    store = open_store(path)
+
+    with pytest.raises(RuntimeError):
+        async with store.transaction() as transaction:
+            transaction.put_customer(customer(1))
+            raise RuntimeError()
+
+    assert store.customers == {}
+    assert store.stats().wal_records == 0
+    recovered = open_store(crash_copy(path, tmp_path / "crash"))
+    assert recovered.customers == {}
+
+    recovered.close()
+    store.close()
+
+
+async def test_reads_outside_the_unit_of_work_wait_for_the_commit(tmp_path: Path):
+    store = open_store(tmp_path / "whatsapp.wal")
+    customers = MemoryCustomerRepository(store)
+    await customers.update(customer(1))
+    finished = Customer(
+        customer_id=customer(1).customer_id,
+        department=Department.SUPPORT,
+        status=CustomerStatus.FINISHED,
+        waiting_since=NOW,
+        last_interaction=NOW,
+    )
+
+    async with MemoryUnitOfWork(store):
+        await customers.update(finished)
+        # Dentro da unit of work a leitura enxerga a própria escrita
+        assert await customers.get(finished.customer_id) == finished
+        reader = asyncio.create_task(customers.get(finished.customer_id), context=Context())
+        await asyncio.sleep(0.01)
+        assert not reader.done()
+
+    assert await reader == finished
+    store.close()
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.domain.messages import OutboxMessage, WhatsAppMessage
+from .conftest import Backend
+
+pytestmark = pytest.mark.anyio
+
+
+def outbox_message(dedup_key: str) -> OutboxMessage:
+    return OutboxMessage(dedup_key=dedup_key, message=WhatsAppMessage.create_system_message("5511000000001", dedup_key))
+
+
+async def test_add_many_skips_known_dedup_keys(backend: Backend):
+    assert await backend.outbox.add_many([outbox_message("m1:0"), outbox_message("m1:1")]) == 2
+    assert await backend.outbox.add_many([outbox_message("m1:1"), outbox_message("m2:0")]) == 1
+
+    claimed = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert [message.dedup_key for message in claimed] == ["m1:0", "m1:1", "m2:0"]
+
+
+async def test_claim_batch_leases_the_oldest_messages(backend: Backend):
+    _ = await backend.outbox.add_many([outbox_message(f"m{index}:0") for index in range(5)])
+
+    first = await backend.outbox.claim_batch(3, lease_seconds=60)
+    assert [message.dedup_key for message in first] == ["m0:0", "m1:0", "m2:0"]
+    assert all(message.attempts == 1 and message.outbox_id is not None for message in first)
+    assert first[0].message.content == "m0:0"
+
+    # As linhas com lease não voltam até o lease expirar
+    second = await backend.outbox.claim_batch(10, lease_seconds=0)
+    assert [message.dedup_key for message in second] == ["m3:0", "m4:0"]
+
+    again = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert [(message.dedup_key, message.attempts) for message in again] == [("m3:0", 2), ("m4:0", 2)]
+
+
+async def test_mark_sent_and_mark_failed(backend: Backend):
+    _ = await backend.outbox.add_many([outbox_message("sent:0"), outbox_message("retry:0"), outbox_message("dead:0")])
+    sent, retry, dead = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert sent.outbox_id is not None and retry.outbox_id is not None and dead.outbox_id is not None
+
+    await backend.outbox.mark_sent([sent.outbox_id])
+    await backend.outbox.mark_failed(retry.outbox_id, "503", datetime.now(timezone.utc) - timedelta(seconds=1))
+    await backend.outbox.mark_failed(dead.outbox_id, "400", None)
+
+    claimed = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert [(message.dedup_key, message.attempts) for message in claimed] == [("retry:0", 2)]
+
+
+async def test_prune_deletes_only_sent_messages_older_than_the_cutoff(backend: Backend):
+    _ = await backend.outbox.add_many([outbox_message("sent:0"), outbox_message("pending:0")])
+    sent, _pending = await backend.outbox.claim_batch(10, lease_seconds=0)
+    assert sent.outbox_id is not None
+    await backend.outbox.mark_sent([sent.outbox_id])
+
+    assert await backend.outbox.prune(datetime.now(timezone.utc) - timedelta(hours=1)) == 0
+    assert await backend.outbox.prune(datetime.now(timezone.utc) + timedelta(seconds=1)) == 1
+    assert await backend.outbox.prune(datetime.now(timezone.utc) + timedelta(seconds=1)) == 0
+
+    claimed = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert [message.dedup_key for message in claimed] == ["pending:0"]
+
+
+async def test_processed_messages_claim_release_and_prune(backend: Backend):
+    assert await backend.processed.claim(["wamid.1", "wamid.2", "wamid.1"]) == {"wamid.1", "wamid.2"}
+    assert await backend.processed.claim(["wamid.2", "wamid.3"]) == {"wamid.3"}
+    assert await backend.processed.claim([]) == set()
+
+    await backend.processed.release(["wamid.2", "wamid.9"])
+    assert await backend.processed.claim(["wamid.1", "wamid.2"]) == {"wamid.2"}
+
+    assert await backend.processed.prune(datetime.now(timezone.utc) - timedelta(hours=1)) == 0
+    assert await backend.processed.prune(datetime.now(timezone.utc) + timedelta(seconds=1)) == 3
+    assert await backend.processed.claim(["wamid.1"]) == {"wamid.1"}
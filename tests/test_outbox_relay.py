@@ -0,0 +1,64 @@
+import asyncio
+from typing import override
+
+import pytest
+
+from src.application.workers.outbox_relay import OutboxRelay, OutboxRelayConfig
+from src.domain.interfaces.messaging import MessageSender
+from src.domain.messages import OutboxMessage, WhatsAppMessage
+from src.infrastructure.whatsapp.exceptions import RecipientThrottledError
+from .conftest import Backend
+
+pytestmark = pytest.mark.anyio
+
+
+class ThrottledSender(MessageSender):
+    """
+    Recusa todo envio como o RateLimiter com o destinatário no limite.
+    """
+
+    def __init__(self, retry_after: float):
+        self.retry_after = retry_after
+
+    @override
+    async def send_message(self, message: WhatsAppMessage) -> bool:
+        raise RecipientThrottledError(message.recipient_id, self.retry_after)
+
+
+def outbox_message(dedup_key: str) -> OutboxMessage:
+    return OutboxMessage(dedup_key=dedup_key, message=WhatsAppMessage.create_system_message("5511000000001", dedup_key))
+
+
+async def test_prune_keeps_sent_messages_inside_the_retention_window(backend: Backend):
+    relay = OutboxRelay(backend.outbox, ThrottledSender(0), OutboxRelayConfig(retention=0.2))
+    _ = await backend.outbox.add_many([outbox_message("old:0"), outbox_message("recent:0")])
+    old, recent = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert old.outbox_id is not None and recent.outbox_id is not None
+
+    await backend.outbox.mark_sent([old.outbox_id])
+    await asyncio.sleep(0.3)
+    await backend.outbox.mark_sent([recent.outbox_id])
+
+    assert await relay.prune() == 1
+    assert relay.stats().pruned == 1
+    # Só a mensagem enviada dentro da janela continua no outbox
+    assert await relay.prune() == 0
+    await asyncio.sleep(0.3)
+    assert await relay.prune() == 1
+
+
+async def test_throttled_message_is_deferred_without_spending_an_attempt(backend: Backend):
+    relay = OutboxRelay(backend.outbox, ThrottledSender(0.05), OutboxRelayConfig(max_attempts=1))
+    _ = await backend.outbox.add_many([outbox_message("m1:0")])
+
+    assert await relay.relay_once() == 1
+    assert await backend.outbox.claim_batch(10, lease_seconds=60) == []
+
+    await asyncio.sleep(0.1)
+    assert await relay.relay_once() == 1
+    stats = relay.stats()
+    assert (stats.throttled, stats.retried, stats.dead) == (2, 0, 0)
+
+    await asyncio.sleep(0.1)
+    claimed = await backend.outbox.claim_batch(10, lease_seconds=60)
+    assert [(message.dedup_key, message.attempts) for message in claimed] == [("m1:0", 1)]
@@ -0,0 +1,186 @@
+import asyncio
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from .conftest import Backend
+
+pytestmark = pytest.mark.anyio
+
+NOW = datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+
+
+def waiting(customer_id: str, department: Department, minutes_ago: int) -> Customer:
+    return Customer(
+        customer_id=customer_id,
+        department=department,
+        status=CustomerStatus.WAITING,
+        waiting_since=NOW - timedelta(minutes=minutes_ago),
+        last_interaction=NOW - timedelta(minutes=minutes_ago),
+    )
+
+
+async def test_get_unknown_customer(backend: Backend):
+    assert await backend.customers.get("5511000000000") is None
+
+
+async def test_update_inserts_and_overwrites(backend: Backend):
+    customer = waiting("5511000000001", Department.SALES, 5)
+    await backend.customers.update(customer)
+    assert await backend.customers.get(customer.customer_id) == customer
+
+    finished = replace(customer, status=CustomerStatus.FINISHED, last_interaction=NOW)
+    await backend.customers.update(finished)
+    assert await backend.customers.get(customer.customer_id) == finished
+
+
+async def test_returned_customer_is_a_copy(backend: Backend):
+    customer = waiting("5511000000001", Department.SALES, 5)
+    await backend.customers.update(customer)
+
+    loaded = await backend.customers.get(customer.customer_id)
+    assert loaded is not None
+    loaded.status = CustomerStatus.FINISHED
+    assert await backend.customers.get(customer.customer_id) == customer
+
+
+async def test_get_many_skips_unknown_customers(backend: Backend):
+    first = waiting("5511000000001", Department.SALES, 5)
+    second = waiting("5511000000002", Department.SUPPORT, 3)
+    await backend.customers.update_many([first, second])
+
+    found = await backend.customers.get_many([first.customer_id, "5511000000099", second.customer_id])
+    assert found == {first.customer_id: first, second.customer_id: second}
+    assert await backend.customers.get_many([]) == {}
+
+
+async def test_update_many_keeps_the_last_version_of_a_repeated_customer(backend: Backend):
+    customer = waiting("5511000000001", Department.SALES, 5)
+    await backend.customers.update(customer)
+
+    last = replace(customer, status=CustomerStatus.FINISHED)
+    await backend.customers.update_many([replace(customer, department=Department.BILLING), last])
+    assert await backend.customers.get(customer.customer_id) == last
+
+
+async def test_touch_last_interaction_changes_only_the_interaction(backend: Backend):
+    customer = waiting("5511000000001", Department.SALES, 5)
+    await backend.customers.update(customer)
+
+    touched = await backend.customers.touch_last_interaction(customer.customer_id, NOW)
+    assert touched == replace(customer, last_interaction=NOW)
+    assert await backend.customers.get(customer.customer_id) == touched
+    assert await backend.customers.touch_last_interaction("5511000000099", NOW) is None
+
+
+async def test_claim_next_waiting_takes_the_oldest_customer_of_the_department(backend: Backend):
+    await backend.add_agent(Agent("AGENT_1", Department.SALES))
+    await backend.add_agent(Agent("AGENT_2", Department.SALES))
+    await backend.customers.update_many([
+        waiting("5511000000001", Department.SALES, 5),
+        waiting("5511000000002", Department.SALES, 10),
+        waiting("5511000000003", Department.SUPPORT, 30),
+    ])
+
+    first = await backend.customers.claim_next_waiting(Department.SALES, "AGENT_1")
+    assert first is not None
+    assert first.customer_id == "5511000000002"
+    assert first.status == CustomerStatus.IN_SERVICE
+    assert first.current_agent_id == "AGENT_1"
+    assert await backend.customers.get(first.customer_id) == first
+
+    second = await backend.customers.claim_next_waiting(Department.SALES, "AGENT_2")
+    assert second is not None
+    assert second.customer_id == "5511000000001"
+
+    assert await backend.customers.claim_next_waiting(Department.SALES, "AGENT_1") is None
+    assert [customer.customer_id for customer in await backend.customers.get_waiting_customers(Department.SUPPORT)] == [
+        "5511000000003"
+    ]
+
+
+async def test_expire_conversations_finishes_only_expired_conversations(backend: Backend):
+    await backend.add_agent(Agent("AGENT_1", Department.SALES, is_available=False, current_customer_id="5511000000001"))
+    expired = replace(
+        waiting("5511000000001", Department.SALES, 90),
+        status=CustomerStatus.IN_SERVICE,
+        current_agent_id="AGENT_1"
+    )
+    recent = waiting("5511000000002", Department.SALES, 5)
+    finished = replace(waiting("5511000000003", Department.SALES, 90), status=CustomerStatus.FINISHED)
+    await backend.customers.update_many([expired, recent, finished])
+
+    customer_ids = [expired.customer_id, recent.customer_id, finished.customer_id, "5511000000099"]
+    result = await backend.customers.expire_conversations(customer_ids, NOW - timedelta(minutes=20))
+
+    assert result == [replace(expired, status=CustomerStatus.FINISHED, current_agent_id=None)]
+    assert await backend.customers.get(recent.customer_id) == recent
+    assert await backend.customers.get(finished.customer_id) == finished
+
+
+async def test_agent_status_updates(backend: Backend):
+    for index in range(3):
+        await backend.add_agent(Agent(f"AGENT_{index}", Department.SUPPORT))
+
+    await backend.agents.update_agent_status("AGENT_0", False, "5511000000001")
+    assert await backend.agents.get_by_id("AGENT_0") == Agent("AGENT_0", Department.SUPPORT, False, "5511000000001")
+    assert await backend.agents.get_by_id("AGENT_9") is None
+
+    updated = await backend.agents.update_agents_status(["AGENT_0", "AGENT_1", "AGENT_9"], False)
+    assert sorted(updated) == ["AGENT_0", "AGENT_1"]
+
+    agents = await backend.agents.get_many(["AGENT_0", "AGENT_1", "AGENT_2", "AGENT_9"])
+    assert agents == {
+        "AGENT_0": Agent("AGENT_0", Department.SUPPORT, False, None),
+        "AGENT_1": Agent("AGENT_1", Department.SUPPORT, False, None),
+        "AGENT_2": Agent("AGENT_2", Department.SUPPORT, True, None),
+    }
+
+    available = await backend.agents.get_available_agent(Department.SUPPORT)
+    assert available is not None and available.agent_id == "AGENT_2"
+    assert await backend.agents.get_available_agent(Department.SALES) is None
+
+
+async def test_agent_update_many(backend: Backend):
+    await backend.add_agent(Agent("AGENT_0", Department.BILLING))
+    await backend.add_agent(Agent("AGENT_1", Department.BILLING, is_available=False))
+
+    await backend.agents.update_many([
+        Agent("AGENT_0", Department.BILLING, False, "5511000000001"),
+        Agent("AGENT_1", Department.BILLING, True, None),
+    ])
+
+    assert sorted(await backend.agents.list_agents(), key=lambda agent: agent.agent_id) == [
+        Agent("AGENT_0", Department.BILLING, False, "5511000000001"),
+        Agent("AGENT_1", Department.BILLING, True, None),
+    ]
+
+
+async def test_release_agents_frees_the_agents_of_the_customers(backend: Backend):
+    await backend.add_agent(Agent("AGENT_0", Department.SALES, is_available=False, current_customer_id="5511000000001"))
+    await backend.add_agent(Agent("AGENT_1", Department.SALES, is_available=False, current_customer_id="5511000000002"))
+
+    released = await backend.agents.release_agents(["5511000000001", "5511000000099"])
+
+    assert released == ["AGENT_0"]
+    assert await backend.agents.get_by_id("AGENT_0") == Agent("AGENT_0", Department.SALES, True, None)
+    assert await backend.agents.get_by_id("AGENT_1") == Agent("AGENT_1", Department.SALES, False, "5511000000002")
+
+
+async def test_concurrent_claims_never_hand_out_the_same_customer(backend: Backend):
+    agents = [f"AGENT_{index}" for index in range(12)]
+    for agent_id in agents:
+        await backend.add_agent(Agent(agent_id, Department.SUPPORT))
+    await backend.customers.update_many([waiting(f"55110000000{index:02d}", Department.SUPPORT, index) for index in range(8)])
+
+    claimed = await asyncio.gather(*(backend.customers.claim_next_waiting(Department.SUPPORT, agent_id) for agent_id in agents))
+
+    assigned = [customer for customer in claimed if customer is not None]
+    assert len(assigned) == 8
+    assert len({customer.customer_id for customer in assigned}) == 8
+    assert len({customer.current_agent_id for customer in assigned}) == 8
+    assert await backend.customers.get_waiting_customers(Department.SUPPORT) == []
+    for customer in assigned:
+        assert await backend.customers.get(customer.customer_id) == customer
@@ -0,0 +1,91 @@
+import asyncio
+from contextvars import Context
+from dataclasses import replace
+
+import pytest
+
+from src.domain.entities import Agent, Customer, CustomerStatus, Department
+from src.domain.messages import OutboxMessage, WhatsAppMessage
+from .conftest import Backend
+
+pytestmark = pytest.mark.anyio
+
+
+class Boom(Exception):
+    pass
+
+
+async def test_rollback_discards_every_write_of_the_unit_of_work(backend: Backend):
+    customer = Customer("5511000000001", Department.SALES, CustomerStatus.WAITING)
+    await backend.customers.update(customer)
+    await backend.add_agent(Agent("AGENT_1", Department.SALES))
+    hooks: list[str] = []
+
+    with pytest.raises(Boom):
+        async with backend.unit_of_work() as unit_of_work:
+            unit_of_work.on_commit(lambda: hooks.append("commit"))
+            unit_of_work.on_rollback(lambda: hooks.append("rollback"))
+
+            claimed = await backend.customers.claim_next_waiting(Department.SALES, "AGENT_1")
+            assert claimed is not None
+            await backend.agents.update_agent_status("AGENT_1", False, customer.customer_id)
+            _ = await backend.outbox.add_many([
+                OutboxMessage(dedup_key="m1:0", message=WhatsAppMessage.create_system_message(customer.customer_id, "oi"))
+            ])
+            _ = await backend.processed.claim(["wamid.1"])
+            raise Boom()
+
+    assert hooks == ["rollback"]
+    assert await backend.customers.get(customer.customer_id) == customer
+    assert await backend.agents.get_by_id("AGENT_1") == Agent("AGENT_1", Department.SALES)
+    assert await backend.outbox.claim_batch(10, lease_seconds=60) == []
+    assert await backend.processed.claim(["wamid.1"]) == {"wamid.1"}
+
+    # Depois do rollback o cliente continua na fila
+    claimed = await backend.customers.claim_next_waiting(Department.SALES, "AGENT_1")
+    assert claimed is not None and claimed.customer_id == customer.customer_id
+
+
+async def test_commit_keeps_the_writes_and_runs_the_commit_hooks(backend: Backend):
+    customer = Customer("5511000000001", Department.SALES, CustomerStatus.WAITING)
+    hooks: list[str] = []
+
+    async with backend.unit_of_work() as unit_of_work:
+        unit_of_work.on_commit(lambda: hooks.append("commit"))
+        unit_of_work.on_rollback(lambda: hooks.append("rollback"))
+        await backend.customers.update(customer)
+        # A própria unit of work enxerga o que escreveu
+        assert await backend.customers.get(customer.customer_id) == customer
+
+    assert hooks == ["commit"]
+    assert await backend.customers.get(customer.customer_id) == customer
+
+
+async def test_nested_unit_of_work_joins_the_outer_transaction(backend: Backend):
+    customer = Customer("5511000000001", Department.SALES, CustomerStatus.WAITING)
+    await backend.customers.update(customer)
+
+    with pytest.raises(Boom):
+        async with backend.unit_of_work():
+            async with backend.unit_of_work():
+                await backend.customers.update(replace(customer, status=CustomerStatus.FINISHED))
+            raise Boom()
+
+    assert await backend.customers.get(customer.customer_id) == customer
+
+
+async def test_other_tasks_never_read_writes_that_are_rolled_back(backend: Backend):
+    customer = Customer("5511000000001", Department.SALES, CustomerStatus.WAITING)
+    await backend.customers.update(customer)
+
+    reader: asyncio.Task[Customer | None] | None = None
+    with pytest.raises(Boom):
+        async with backend.unit_of_work():
+            await backend.customers.update(replace(customer, status=CustomerStatus.FINISHED))
+            # Outra lane (fora do contexto da unit of work) lê no meio da transação:
+            # vê a versão confirmada ou espera a transação terminar
+            reader = asyncio.create_task(backend.customers.get(customer.customer_id), context=Context())
+            await asyncio.sleep(0.01)
+            raise Boom()
+
+    assert reader is not None and await reader == customer